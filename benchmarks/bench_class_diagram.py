@@ -0,0 +1,31 @@
+""" bench_class_diagram.py - Time drawing generated class diagrams """
+
+# Flatland
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+from conftest import scales
+from generators import class_diagram, write
+
+# Stages of a class diagram worth timing on their own
+stages = {'model parse', 'layout parse', 'canvas', 'frame', 'node placement', 'grid solve', 'canvas render',
+          'tablet render'}
+
+
+def bench_class_diagram(bench, flatland_db, scale, tmp_path):
+    args = scales[scale]['class']
+    model_path, layout_path = write(class_diagram(**args), tmp_path, f"class_{scale}", '.xcm')
+    generalizations = {f"R{r}" for r in range(args['associations'] + 1, args['associations'] + args['trees'] + 1)}
+
+    def draw():
+        d = XumlClassDiagram(xuml_model_path=model_path, flatland_layout_path=layout_path,
+                             diagram_file_path=tmp_path / "class.svg", show_grid=False, nodes_only=False,
+                             no_color=False, show_rulers=False, show_ref_types=False, no_parse_cache=True)
+        d.build()
+        d.render()
+
+    def stage(span):
+        if span.stage == 'connector':
+            # Tree connectors are timed apart from binary connectors
+            return 'tree connectors' if span.detail in generalizations else 'binary connectors'
+        return span.stage if span.stage in stages else None
+
+    bench(draw, stage=stage)
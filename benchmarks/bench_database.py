@@ -0,0 +1,22 @@
+""" bench_database.py - Time building and loading the flatland database """
+
+# Model Integration
+from pyral.database import Database
+
+# Flatland
+from flatland.names import app
+from flatland.database.flatland_db import FlatlandDB
+
+
+def create_db(rebuild: bool):
+    # Only one session may be open at a time
+    Database.close_session(name=app)
+    FlatlandDB.create_db(rebuild=rebuild)
+
+
+def bench_database_build(bench, flatland_db):
+    bench(lambda: create_db(rebuild=True))
+
+
+def bench_database_load(bench, flatland_db):
+    bench(lambda: create_db(rebuild=False))
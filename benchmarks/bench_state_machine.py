@@ -0,0 +1,24 @@
+""" bench_state_machine.py - Time drawing generated state machine diagrams """
+
+# Flatland
+from flatland.xuml.xuml_statemachine_diagram import XumlStateMachineDiagram
+from conftest import scales
+from generators import state_machine_diagram, write
+
+# Stages of a state machine diagram worth timing on their own
+stages = {'model parse', 'layout parse', 'canvas', 'frame', 'node placement', 'grid solve', 'connector',
+          'canvas render', 'tablet render'}
+
+
+def bench_state_machine(bench, flatland_db, scale, tmp_path):
+    args = scales[scale]['state']
+    model_path, layout_path = write(state_machine_diagram(**args), tmp_path, f"state_{scale}", '.xsm')
+
+    def draw():
+        d = XumlStateMachineDiagram(xuml_model_path=model_path, flatland_layout_path=layout_path,
+                                    diagram_file_path=tmp_path / "state.svg", show_grid=False, nodes_only=False,
+                                    no_color=False, show_rulers=False, no_parse_cache=True)
+        d.build()
+        d.render()
+
+    bench(draw, stage=lambda s: s.stage if s.stage in stages else None)
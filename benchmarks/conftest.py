@@ -0,0 +1,140 @@
+""" conftest.py - Fixtures and reporting shared by the flatland benchmarks
+
+Run from the repository root:
+
+    pytest benchmarks [--bench-scale small,medium,large] [--bench-rounds 5] [--bench-json results.json]
+
+Each benchmark draws a generated diagram a few times, timing each stage of the drawing, and then once
+more to measure peak Python memory. The results are printed as a table at the end of the run. Save them
+as json to compare the numbers before and after a change. Render server latency is measured on its own
+by server_latency.py.
+"""
+
+# System
+import sys
+import json
+import time
+import statistics
+import tracemalloc
+from pathlib import Path
+from typing import NamedTuple, Callable, Optional
+
+import pytest
+
+# Flatland
+from flatland.instrumentation import Instrumentation, Span
+from flatland.database.flatland_db import FlatlandDB
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Generator arguments for each size of diagram, see generators.py
+scales = {
+    'small': {'class': dict(classes=16, associations=24, trees=2, subclasses=3),
+              'state': dict(states=16, transitions=40)},
+    'medium': {'class': dict(classes=64, associations=100, trees=6, subclasses=4),
+               'state': dict(states=49, transitions=150)},
+    'large': {'class': dict(classes=196, associations=360, trees=12, subclasses=4),
+              'state': dict(states=225, transitions=800)},
+}
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    stages: dict[str, list[float]]  # Seconds taken by each stage in each round
+    peak_memory: int  # Most bytes of Python memory allocated while running once more
+
+
+class Bench:
+    """
+    Runs benchmarks and keeps their results for the end of session report
+    """
+    results: list[BenchmarkResult] = []
+
+    def __init__(self, name: str, rounds: int):
+        self.Name = name
+        self.Rounds = rounds
+
+    def __call__(self, run: Callable[[], None], stage: Optional[Callable[[Span], Optional[str]]] = None):
+        """
+        Times each stage of a run, recorded as instrumentation spans, along with the run as a whole
+
+        :param run: Whatever is being measured, called once per round
+        :param stage: Names the stage of a span, or None to leave it out, by default its own stage name
+        """
+        stage = stage or (lambda s: s.stage)
+        stages = {}
+        was_enabled = Instrumentation.enabled
+        Instrumentation.enabled = True
+        try:
+            for r in range(self.Rounds):
+                Instrumentation.drain()
+                start = time.perf_counter()
+                run()
+                total = time.perf_counter() - start
+                round_stages = {}
+                for s in Instrumentation.drain():
+                    name = stage(s)
+                    if name:
+                        round_stages[name] = round_stages.get(name, 0.0) + s.seconds
+                for name, seconds in list(round_stages.items()) + [('total', total)]:
+                    stages.setdefault(name, [0.0] * r).append(seconds)
+        finally:
+            Instrumentation.enabled = was_enabled
+            Instrumentation.drain()
+
+        # Tracing every allocation slows the run down, so memory is measured separately
+        tracemalloc.start()
+        try:
+            run()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        Bench.results.append(BenchmarkResult(name=self.Name, stages=stages, peak_memory=peak_memory))
+
+
+def pytest_addoption(parser):
+    parser.addoption('--bench-scale', default='small,medium',
+                     help=f"Comma separated diagram sizes to benchmark, of: {', '.join(scales)}")
+    parser.addoption('--bench-rounds', type=int, default=3, help='Times each benchmark is run')
+    parser.addoption('--bench-json', help='Save the results in this json file')
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        selected = [s.strip() for s in metafunc.config.getoption('bench_scale').split(',')]
+        unknown = set(selected) - set(scales)
+        if unknown:
+            raise pytest.UsageError(f"Unknown benchmark scale: {', '.join(sorted(unknown))}")
+        metafunc.parametrize('scale', selected)
+
+
+@pytest.fixture(scope='session')
+def flatland_db():
+    FlatlandDB.create_db()
+
+
+@pytest.fixture
+def bench(request) -> Bench:
+    return Bench(name=request.node.name, rounds=request.config.getoption('bench_rounds'))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not Bench.results:
+        return
+    terminalreporter.section("flatland benchmarks")
+    width = max(len(stage) for r in Bench.results for stage in r.stages) + 2
+    for r in Bench.results:
+        terminalreporter.write_line(f"{r.name}  (peak Python memory {r.peak_memory / 2 ** 20:.1f} MB)")
+        terminalreporter.write_line(f"  {'Stage':<{width}} {'Min ms':>10} {'Median ms':>10} {'Max ms':>10}")
+        for stage, seconds in r.stages.items():
+            ms = [s * 1000 for s in seconds]
+            terminalreporter.write_line(f"  {stage:<{width}} {min(ms):>10.1f} {statistics.median(ms):>10.1f}"
+                                        f" {max(ms):>10.1f}")
+    json_file = config.getoption('bench_json')
+    if json_file:
+        results = {r.name: {'peak_memory': r.peak_memory,
+                            'stages': {stage: {'min': min(s), 'median': statistics.median(s), 'rounds': s}
+                                       for stage, s in r.stages.items()}}
+                   for r in Bench.results}
+        Path(json_file).write_text(json.dumps(results, indent=2))
+        terminalreporter.write_line(f"Results saved: {json_file}")
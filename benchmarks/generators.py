@@ -0,0 +1,182 @@
+""" generators.py - Synthesize class and state models with matching layouts at any scale """
+
+# System
+import math
+from pathlib import Path
+from typing import NamedTuple
+
+
+class GeneratedDiagram(NamedTuple):
+    model: str  # Text of an xcm or xsm model file
+    layout: str  # Text of the matching mls layout file
+    nodes: int
+    connectors: int
+
+
+class Cell(NamedTuple):
+    row: int
+    col: int
+
+
+def label(i: int) -> str:
+    """
+    Names the i-th item with letters, A to Z then AA and so on, since model names can't contain digits
+    """
+    letters = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        letters = chr(ord('A') + r) + letters
+    return letters
+
+
+def neighbor_pairs(cells: list[Cell], cols: int) -> list[tuple[int, int, str]]:
+    """
+    Pairs each node with the nodes to its right and above, horizontal pairs first
+
+    :param cells: Node positions, row by row, cols to a row
+    :param cols: Nodes in each row
+    :return: (node, neighbor, 'h' or 'v') for each pair of adjacent nodes
+    """
+    horizontal = [(i, i + 1, 'h') for i in range(len(cells) - 1) if (i + 1) % cols]
+    vertical = [(i, i + cols, 'v') for i in range(len(cells) - cols)]
+    return horizontal + vertical
+
+
+def grid_cells(count: int) -> tuple[list[Cell], int]:
+    """
+    Lays out count nodes in a roughly square grid
+
+    :return: Node positions and the number of nodes in each row
+    """
+    cols = max(1, math.ceil(math.sqrt(count)))
+    return [Cell(row=1 + i // cols, col=1 + i % cols) for i in range(count)], cols
+
+
+def class_diagram(classes: int, associations: int, trees: int = 0, subclasses: int = 3,
+                  sheet: str = 'E') -> GeneratedDiagram:
+    """
+    Generates a class model with its layout
+
+    Classes are placed on a grid with each association joining two neighbors with a straight connector.
+    Generalization trees are placed in bands above them, the superclass centered over its subclasses.
+
+    :param classes: Number of classes joined by associations
+    :param associations: Number of associations, at most about twice the number of classes
+    :param trees: Number of generalizations
+    :param subclasses: Number of subclasses in each generalization
+    :param sheet: Sheet name, large enough for the diagram
+    """
+    cells, cols = grid_cells(classes)
+    pairs = neighbor_pairs(cells, cols)
+    if associations > len(pairs):
+        raise ValueError(f"At most {len(pairs)} associations fit between {classes} classes")
+
+    model = ["metadata", "    Title : Generated Benchmark", "domain Benchmark, BENCH",
+             "subsystem Main, MAIN 1-9999"]
+    nodes = []
+    connectors = []
+    rels = []
+    refs = {i: [] for i in range(classes)}
+
+    for r, (a, b, direction) in enumerate(pairs[:associations], start=1):
+        refs[b].append(f"Class {label(a)} ref {{R{r}}}")
+        rels += [f"    R{r}", f"    relates to, Mc Class {label(b)}", f"    is related to, 1 Class {label(a)}",
+                 f"    Class {label(b)}.Class {label(a)} ref -> Class {label(a)}.ID", "--"]
+        if direction == 'h':
+            connectors.append(f"    -R{r} : +/1 r|Class {label(a)} : +/2 l*|Class {label(b)}")
+        else:
+            connectors.append(f"    -R{r} : +/1 t|Class {label(a)} : +/2 b*|Class {label(b)}")
+
+    for i, cell in enumerate(cells):
+        model += [f"class Class {label(i)}, C{i}", "attributes", "    ID : Nominal {I}"] + \
+                 [f"    {ref}" for ref in refs[i]] + ["--"]
+        nodes.append(f"    Class {label(i)} {cell.row},{cell.col}")
+
+    # Each generalization takes a band of two rows above the associated classes, superclass over subclasses
+    band = cells[-1].row + 1 if cells else 1
+    trees_per_band = max(1, cols // subclasses)
+    rnum = associations
+    for t in range(trees):
+        rnum += 1
+        base_row = band + 2 * (t // trees_per_band)
+        first_col = 1 + subclasses * (t % trees_per_band)
+        leaves = [f"Subclass {label(t)} {label(s)}" for s in range(subclasses)]
+        model += [f"class Superclass {label(t)}, SUP{t}", "attributes", "    ID : Nominal {I}", "--"]
+        nodes.append(f"    Superclass {label(t)} {base_row + 1},{first_col + subclasses // 2}")
+        for s, leaf in enumerate(leaves):
+            model += [f"class {leaf}, SUB{t}_{s}", "attributes", f"    ID {{I, R{rnum}}}", "--"]
+            nodes.append(f"    {leaf} {base_row},{first_col + s}")
+        rels += [f"    R{rnum}", f"    Superclass {label(t)} +"] + [f"        {leaf}" for leaf in leaves] + \
+                [f"    <subclass>.ID -> Superclass {label(t)}.ID", "--"]
+        connectors.append(f"    +R{rnum} : b|Superclass {label(t)} {{ " + ", ".join(f"t|{leaf}" for leaf in leaves) + " }")
+
+    if rels:
+        model += ["relationships"] + rels
+    layout = ["diagram class", "notation xUML", "presentation default", "orientation landscape",
+              f"sheet {sheet}", "nodes"] + nodes
+    if connectors:
+        layout += ["connectors"] + connectors
+    return GeneratedDiagram(model="\n".join(model) + "\n", layout="\n".join(layout) + "\n",
+                            nodes=len(nodes), connectors=len(connectors))
+
+
+def state_machine_diagram(states: int, transitions: int, sheet: str = 'E') -> GeneratedDiagram:
+    """
+    Generates a state model with its layout
+
+    States are placed on a grid with each transition joining two neighbors with a straight connector,
+    in either direction. An initial transition enters the first state.
+
+    :param states: Number of states
+    :param transitions: Number of transitions between states, at most about four times the number of states
+    :param sheet: Sheet name, large enough for the diagram
+    """
+    cells, cols = grid_cells(states)
+    pairs = neighbor_pairs(cells, cols)
+    if transitions > 2 * len(pairs):
+        raise ValueError(f"At most {2 * len(pairs)} transitions fit between {states} states")
+
+    # Each pair of neighbors takes a transition in each direction, on opposite sides of center
+    stems = {'h': ('r', 'l'), 'v': ('t', 'b')}
+    leaving = {i: [] for i in range(states)}
+    connectors = ["    +Start : t|State A"]
+    for e in range(transitions):
+        a, b, direction = pairs[e % len(pairs)]
+        from_face, to_face = stems[direction]
+        if e >= len(pairs):
+            a, b = b, a
+            from_face, to_face = to_face, from_face
+            offset = "-1"
+        else:
+            offset = "+1"
+        leaving[a].append(f"    Event {label(e)} > State {label(b)}")
+        connectors.append(f"    +Event {label(e)} : {from_face}{offset}|State {label(a)} : {to_face}*|State {label(b)}")
+
+    model = ["metadata", "    Title : Generated Benchmark", "domain Benchmark", "class Machine",
+             "interaction events", "    Start"] + [f"    Event {label(e)}" for e in range(transitions)] + ["--",
+             "initial transitions", "    Start > State A", "--"]
+    for i in range(states):
+        model += [f"state State {label(i)}", "activity", f"    // Activity of state {i}"]
+        if leaving[i]:
+            model += ["transitions"] + leaving[i]
+        model.append("--")
+    layout = ["diagram state machine", "notation xUML", "presentation default", "orientation landscape",
+              f"sheet {sheet}", "nodes"] + [f"    State {label(i)} {c.row},{c.col}" for i, c in enumerate(cells)] + \
+             ["connectors"] + connectors
+    return GeneratedDiagram(model="\n".join(model) + "\n", layout="\n".join(layout) + "\n",
+                            nodes=states, connectors=len(connectors))
+
+
+def write(diagram: GeneratedDiagram, directory: Path, name: str, model_suffix: str) -> tuple[Path, Path]:
+    """
+    Saves a generated model and layout
+
+    :return: Paths to the model and layout files
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    model_path = directory / f"{name}{model_suffix}"
+    layout_path = directory / f"{name}.mls"
+    model_path.write_text(diagram.model)
+    layout_path.write_text(diagram.layout)
+    return model_path, layout_path
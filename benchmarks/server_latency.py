@@ -0,0 +1,78 @@
+""" server_latency.py - Compare render server request latency with a cold command line run
+
+Run from the repository root:
+
+    python benchmarks/server_latency.py [-n 50] [--socket]
+"""
+
+# System
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+# Flatland
+from flatland.database.flatland_db import FlatlandDB
+from flatland.server import RenderServer, RenderClient
+
+tests_dir = Path(__file__).parent.parent / "tests"
+diagrams = [
+    ("class_diagrams/aircraft2.xcm", "model_style_sheets/xUML_cd/t001_straight_binary_horiz.mls"),
+    ("class_diagrams/aircraft_tree4.xcm", "model_style_sheets/xUML_cd/t055_p2_three_branch_one_graft.mls"),
+    ("class_diagrams/elevator.xcm", "model_style_sheets/Starr_cd/elevator_Starr.mls"),
+]
+
+
+def summarize(name: str, seconds: list[float]):
+    ms = sorted(s * 1000 for s in seconds)
+    p95 = ms[min(len(ms) - 1, round(0.95 * (len(ms) - 1)))]
+    print(f"{name:<44} n={len(ms):<4} mean {statistics.mean(ms):8.1f}ms  p50 {statistics.median(ms):8.1f}ms"
+          f"  p95 {p95:8.1f}ms")
+
+
+def cold_cli(model: Path, layout: Path, runs: int) -> list[float]:
+    times = []
+    with tempfile.TemporaryDirectory() as out:
+        for i in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-m", "flatland", "-m", str(model), "-l", str(layout),
+                            "-d", str(Path(out) / "diagram.svg")], check=True, capture_output=True, cwd=out)
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render server latency benchmark')
+    parser.add_argument('-n', '--requests', type=int, default=50, help='Requests per diagram')
+    parser.add_argument('--cli_runs', type=int, default=3, help='Cold command line runs for comparison')
+    parser.add_argument('--socket', action='store_true', help='Use the unix domain socket rather than http')
+    args = parser.parse_args()
+
+    FlatlandDB.create_db()
+    with tempfile.TemporaryDirectory() as tmp:
+        server = RenderServer(port=None if args.socket else 0,
+                              socket_path=Path(tmp) / "flatland.sock" if args.socket else None)
+        server.start()
+        client = RenderClient(port=server.Port, socket_path=server.Socket_path)
+        try:
+            for model, layout in diagrams:
+                model, layout = tests_dir / model, tests_dir / layout
+                client.render(model_path=model, layout_path=layout)  # First request loads styles and fonts
+                times = []
+                for _ in range(args.requests):
+                    start = time.perf_counter()
+                    client.render(model_path=model, layout_path=layout)
+                    times.append(time.perf_counter() - start)
+                summarize(f"server {layout.stem}", times)
+                if args.cli_runs:
+                    summarize(f"cold cli {layout.stem}", cold_cli(model, layout, args.cli_runs))
+        finally:
+            client.close()
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,8 @@ import argparse
 from pathlib import Path
 
 # Flatland
-from flatland.xuml.xuml_classdiagram import XumlClassDiagram
-from flatland.xuml.xuml_statemachine_diagram import XumlStateMachineDiagram
-from flatland.database.flatland_db import FlatlandDB
+# Everything that draws is imported only once we know we are drawing, since loading the parsers,
+# tabletsvg and the database takes far longer than printing the version, for example
 from flatland import version
 
 _logpath = Path("flatland.log")
@@ -30,14 +29,23 @@ def get_logger():
 
 # Configure the expected parameters and actions for the argparse module
 def parse(cl_input):
-    parser = argparse.ArgumentParser(description='Flatland model diagram generator')
+    parser = argparse.ArgumentParser(description='Flatland model diagram generator',
+                                     epilog="Run 'flatland serve -h' for the long running render server")
     parser.add_argument('-m', '--model', action='store',
                         help='xuml model file name defining model connectivity without any layout information')
     parser.add_argument('-l', '--layout', action='store',
                         help='Flatland layout file defining all layout information with light\
                          references to model file.')
     parser.add_argument('-d', '--diagram', action='store', default='diagram.pdf',
-                        help='Name of file to generate; the extension selects the format (.pdf or .svg)')
+                        help='Name of file to generate; the extension selects the format (.pdf, .svg or .png)')
+    parser.add_argument('-B', '--batch', action='store',
+                        help='Render each diagram listed in a toml or yaml manifest, or each model file in a\
+                         directory or glob paired with the layout of the same name. Diagrams not named in the\
+                         manifest take the --diagram file format.')
+    parser.add_argument('-J', '--jobs', action='store', type=int, default=1,
+                        help='Number of processes rendering batch diagrams in parallel, 0 for one per cpu')
+    parser.add_argument('-W', '--watch', action='store_true',
+                        help='Keep running and update the diagram each time the model or layout file is saved')
     parser.add_argument('-CF', '--configuration', action='store_true',
                         help="Create a new configuration directory in user's flatland home")
     parser.add_argument('-E', '--examples', action='store_true',
@@ -57,8 +65,26 @@ def parse(cl_input):
                         help='Display referential attribute types on class diagrams')
     parser.add_argument('-RUL', '--rulers', action='store_true',
                         help='Print the ruler grid so you check canvas positions')
+    parser.add_argument('-NPC', '--no_parse_cache', action='store_true',
+                        help='Parse the model and layout files even if they were parsed before')
+    parser.add_argument('-NTC', '--no_text_cache', action='store_true',
+                        help='Measure all text rather than loading the text sizes saved by earlier runs')
+    parser.add_argument('-NCC', '--no_config_cache', action='store_true',
+                        help='Parse the yaml configuration files even if they were parsed by earlier runs')
+    parser.add_argument('-F', '--formats', action='store',
+                        help='Also write the diagram in these comma separated formats, such as svg,pdf,png, '
+                             'each named after the diagram file')
+    parser.add_argument('-SS', '--stream_svg', action='store_true',
+                        help='Write svg output a layer at a time to use less memory drawing large diagrams')
+    parser.add_argument('-P', '--profile', action='store_true',
+                        help='Print the time spent in each stage of drawing, such as parsing, layout and rendering')
+    parser.add_argument('-T', '--trace', action='store_true',
+                        help='Save the stage timings next to the diagram as a Chrome trace (.trace.json) for\
+                         viewing in chrome://tracing or ui.perfetto.dev')
+    parser.add_argument('-CP', '--cprofile', action='store_true',
+                        help='Profile every function call with cProfile and save the stats next to the diagram (.prof)')
     parser.add_argument('-R', '--rebuild', action='store_true',
-                        help='Rebuild the flatland database. Necessary only if corrupted.')
+                        help='Rebuild the flatland database rather than loading the saved snapshot. Necessary only if corrupted.')
     parser.add_argument('-X', '--debug', action='store_true',
                         help='Debug mode -- outputs db and diagnostics to stdout')
     return parser.parse_args(cl_input)
@@ -72,6 +98,13 @@ def main():
     # Keep track of whether or not Config has been run by some command line option so we don't re-run it
     already_configured = False
 
+    if sys.argv[1:2] == ['serve']:
+        # Keep a warm database and render diagrams on request, the server has its own command line
+        from flatland.server import serve
+        atexit.register(clean_up)
+        serve(sys.argv[2:])
+        return
+
     # Parse the command line args
     args = parse(sys.argv[1:])
 
@@ -101,6 +134,14 @@ def main():
 
     # User is not requesting information, so they must be trying to generate a diagram
     # Ensure the necessary args are supplied
+    if args.batch and (args.model or args.layout):
+        logger.error("Specify either a batch or a single model and layout, not both.")
+        sys.exit(1)
+
+    if args.watch and not args.model:
+        logger.error("Watch needs a single model and layout to update.")
+        sys.exit(1)
+
     if args.model and not args.layout:
         logger.error("A layout file must be specified for your model.")
         sys.exit(1)
@@ -111,21 +152,82 @@ def main():
 
     # At this point we either have both model and layout or neither
     # If neither, the only thing we might do at this point is rebuild the database if requested
+    if not (args.batch or args.model or args.rebuild or args.debug):
+        # Nothing to draw, so no need to load the database either
+        logger.info("No problemo")
+        return
+
+    from flatland.text.text_metrics import TextMetrics
+    from flatland.configuration.config_loader import ConfigLoader
+    from flatland.node_subsystem.svg_stream import SVGStream
+    from flatland.node_subsystem.output_formats import OutputFormats, converters
+    from flatland.database.flatland_db import FlatlandDB
+
+    if args.no_text_cache:
+        TextMetrics.persist = False
+
+    if args.no_config_cache:
+        ConfigLoader.persist = False
+    # Every configuration file, including those of each Tablet, is parsed just once
+    ConfigLoader.activate()
+
+    if args.stream_svg:
+        SVGStream.enabled = True
+
+    if args.formats:
+        formats = [f.strip().lower().removeprefix('.') for f in args.formats.split(',') if f.strip()]
+        unknown = [f for f in formats if f not in converters]
+        if unknown:
+            logger.error(f"Unsupported output formats {unknown}, choose from {', '.join(converters)}")
+            sys.exit(1)
+        OutputFormats.formats = tuple(formats)
+
+    if args.profile or args.trace or args.cprofile:
+        from flatland.instrumentation import RunProfile
+        # Timings are saved next to the diagram, or the batch manifest
+        if args.batch:
+            base = Path(args.batch) if Path(args.batch).is_file() else Path.cwd() / 'flatland_batch'
+        else:
+            base = Path(args.diagram)
+        run_profile = RunProfile(table=args.profile,
+                                 trace_file=base.with_suffix('.trace.json') if args.trace else None,
+                                 cprofile_file=base.with_suffix('.prof') if args.cprofile else None)
+        run_profile.start()
+        # Reported however we exit, the time taken by each configuration file after the stages
+        if args.profile:
+            atexit.register(ConfigLoader.report)
+        atexit.register(run_profile.finish)
 
     # Do any configuration tasks necessary before starting up the app
     # The database will be rebuilt if requested
     if not already_configured:
         FlatlandDB.create_db(debug=args.debug, rebuild=args.rebuild)
 
-    # if args.model and args.layout:  # Just making sure we have them both
+    if args.batch:
+        # Render every diagram with the one database we just loaded
+        from flatland.batch import Batch
+        from flatland.exceptions import BatchManifestError
+        options = {'show_grid': args.grid, 'show_rulers': args.rulers, 'nodes_only': args.nodes_only,
+                   'no_color': args.no_color, 'show_ref_types': args.show_ref_types,
+                   'no_parse_cache': args.no_parse_cache}
+        try:
+            batch = Batch.load(source=args.batch, options=options, diagram_suffix=Path(args.diagram).suffix)
+        except BatchManifestError:
+            sys.exit(1)
+        batch.run(workers=args.jobs)
+        batch.report()
+        sys.exit(1 if batch.failed else 0)
+
+    if args.model and args.layout:  # Just making sure we have them both
         model_path = Path(args.model)
         layout_path = Path(args.layout)
         diagram_path = Path(args.diagram)
 
-        # Generate the xuml class diagram (we don't do anything with the returned variable yet)
+        # Generate the xuml class or state machine diagram
         mtype = model_path.suffix
         if mtype == '.xcm':
-            XumlClassDiagram(
+            from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+            diagram = XumlClassDiagram(
                 xuml_model_path=model_path,
                 flatland_layout_path=layout_path,
                 diagram_file_path=diagram_path,
@@ -133,10 +235,12 @@ def main():
                 nodes_only=args.nodes_only,
                 no_color=args.no_color,
                 show_rulers=args.rulers,
-                show_ref_types=args.show_ref_types
+                show_ref_types=args.show_ref_types,
+                no_parse_cache=args.no_parse_cache
             )
         elif mtype == '.xsm':
-            statemodel_diagram = XumlStateMachineDiagram(
+            from flatland.xuml.xuml_statemachine_diagram import XumlStateMachineDiagram
+            diagram = XumlStateMachineDiagram(
                 xuml_model_path=model_path,
                 flatland_layout_path=layout_path,
                 diagram_file_path=diagram_path,
@@ -144,7 +248,18 @@ def main():
                 nodes_only=args.nodes_only,
                 show_rulers=args.rulers,
                 no_color=args.no_color,
+                no_parse_cache=args.no_parse_cache
             )
+        else:
+            logger.error(f"Unrecognized model file type: {model_path}, expected .xcm or .xsm")
+            sys.exit(1)
+
+        if args.watch:
+            from flatland.watch import watch
+            watch(diagram, paths=[model_path, layout_path])
+        else:
+            diagram.build()
+            diagram.render()
 
     logger.info("No problemo")  # We didn't die on an exception, basically
     if args.debug:
@@ -0,0 +1,311 @@
+""" batch.py - Render many model and layout pairs in one process """
+
+# System
+import os
+import sys
+import glob
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import NamedTuple, Optional
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.11
+    import tomli as tomllib
+import yaml
+
+# Flatland
+from flatland.exceptions import BatchManifestError
+from flatland.instrumentation import Instrumentation
+from flatland.configuration.config_loader import ConfigLoader
+from flatland.text.text_metrics import TextMetrics
+from flatland.node_subsystem.svg_stream import SVGStream
+from flatland.node_subsystem.output_formats import OutputFormats
+from flatland.database.flatland_db import FlatlandDB
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+from flatland.xuml.xuml_statemachine_diagram import XumlStateMachineDiagram
+
+_logger = logging.getLogger(__name__)
+
+# Diagram options that a manifest entry may set, each defaulting to the corresponding command line flag
+option_names = ('show_grid', 'show_rulers', 'nodes_only', 'no_color', 'show_ref_types', 'no_parse_cache')
+
+model_suffixes = ('.xcm', '.xsm')
+
+
+class BatchJob(NamedTuple):
+    model: Path
+    layout: Path
+    diagram: Path
+    options: dict
+
+
+class JobResult(NamedTuple):
+    job: BatchJob
+    seconds: float
+    error: Optional[str]  # None if the diagram was rendered
+    spans: tuple = ()  # Stage timings recorded by a worker process
+
+
+def init_worker(instrument: bool = False, persist_text: bool = True, stream_svg: bool = False,
+                formats: tuple = (), persist_config: bool = True):
+    """
+    Prepares a batch worker process to render any number of diagrams
+
+    :param instrument: Time each stage like the parent process does
+    :param persist_text: Load and save measured text sizes like the parent process does
+    :param stream_svg: Write svg files a layer at a time like the parent process does
+    :param formats: Write each diagram in the same additional formats as the parent process does
+    :param persist_config: Load and save parsed configuration files like the parent process does
+    """
+    if instrument:
+        Instrumentation.enable()
+    TextMetrics.persist = persist_text
+    SVGStream.enabled = stream_svg
+    OutputFormats.formats = formats
+    ConfigLoader.persist = persist_config
+    FlatlandDB.create_db()
+    ConfigLoader.activate()
+
+
+class Batch:
+    """
+    Renders a list of diagrams with the already populated Flatland database, recording how long each one
+    takes and why it failed, if it did. A failed diagram does not stop the rest of the batch. Nor does a
+    worker process that dies outright, though every diagram that worker and the others sharing its pool
+    had yet to finish is then reported as failed.
+
+    The diagrams are listed in a manifest file, toml or yaml, or selected by a glob of model files.
+    """
+
+    def __init__(self, jobs: list[BatchJob]):
+        """
+        :param jobs: The diagrams to render, in order
+        """
+        self.logger = logging.getLogger(__name__)
+        self.Jobs = jobs
+        self.Results = []
+        self.Elapsed = 0.0  # Wall clock seconds taken by the last run
+
+    @classmethod
+    def load(cls, source: str, options: dict, diagram_suffix: str = '.pdf') -> 'Batch':
+        """
+        Creates a batch from a manifest file or a model file glob
+
+        A toml manifest lists each diagram in a [[diagram]] table, a yaml manifest under a diagrams key:
+
+            [[diagram]]
+            model = "models/elevator.xcm"
+            layout = "layouts/elevator.mls"
+            diagram = "out/elevator.svg"
+            show_grid = true  # Any option not specified is taken from the command line
+
+        Relative paths are resolved against the manifest's directory. If the diagram is omitted, it is
+        named after the model and written in the manifest's directory.
+
+        Any other source is taken as a directory or a glob of model files. Each model is paired with the
+        layout of the same name in its directory and the diagram is written next to it.
+
+        :param source: Manifest file path, directory or model file glob
+        :param options: Default diagram options, keyed by option name
+        :param diagram_suffix: Output format of any diagram not named in the manifest
+        :return: The batch
+        """
+        source_path = Path(source)
+        if source_path.suffix in ('.toml', '.yaml', '.yml'):
+            return cls(jobs=cls.read_manifest(source_path, options, diagram_suffix))
+
+        pattern = str(source_path / '*') if source_path.is_dir() else source
+        jobs = []
+        for m in sorted(glob.glob(pattern)):
+            model = Path(m)
+            if model.suffix not in model_suffixes:
+                continue
+            jobs.append(BatchJob(model=model, layout=model.with_suffix('.mls'),
+                                 diagram=model.with_suffix(diagram_suffix), options=dict(options)))
+        if not jobs:
+            _logger.error(f"No model files found in: {source}")
+            raise BatchManifestError
+        return cls(jobs=jobs)
+
+    @classmethod
+    def read_manifest(cls, manifest: Path, options: dict, diagram_suffix: str) -> list[BatchJob]:
+        """
+        Reads each diagram entry in a toml or yaml manifest
+
+        :param manifest: Path to the manifest file
+        :param options: Default diagram options, keyed by option name
+        :param diagram_suffix: Output format of any diagram not named in the manifest
+        :return: A job for each entry
+        """
+        try:
+            with open(manifest, 'rb') as f:
+                if manifest.suffix == '.toml':
+                    entries = tomllib.load(f).get('diagram', [])
+                else:
+                    entries = (yaml.safe_load(f) or {}).get('diagrams', [])
+        except (OSError, tomllib.TOMLDecodeError, yaml.YAMLError) as e:
+            _logger.error(f"Cannot read batch manifest: {manifest} [{e}]")
+            raise BatchManifestError
+
+        base = manifest.parent
+        jobs = []
+        for n, entry in enumerate(entries, start=1):
+            try:
+                model = base / entry['model']
+                layout = base / entry['layout']
+            except (KeyError, TypeError):
+                _logger.error(f"Diagram {n} in batch manifest: {manifest} needs both a model and a layout")
+                raise BatchManifestError
+            unknown = set(entry) - {'model', 'layout', 'diagram'} - set(option_names)
+            if unknown:
+                _logger.error(f"Diagram {n} in batch manifest: {manifest} has unknown settings {sorted(unknown)}")
+                raise BatchManifestError
+            diagram = base / (entry.get('diagram') or model.with_suffix(diagram_suffix).name)
+            job_options = {o: bool(entry.get(o, options[o])) for o in option_names}
+            jobs.append(BatchJob(model=model, layout=layout, diagram=diagram, options=job_options))
+        if not jobs:
+            _logger.error(f"No diagrams listed in batch manifest: {manifest}")
+            raise BatchManifestError
+        return jobs
+
+    @staticmethod
+    def render_job(job: BatchJob):
+        """
+        Renders a single diagram, the Flatland database must already be populated
+
+        :param job: The diagram to render
+        """
+        options = job.options
+        if job.model.suffix == '.xcm':
+            diagram = XumlClassDiagram(
+                xuml_model_path=job.model,
+                flatland_layout_path=job.layout,
+                diagram_file_path=job.diagram,
+                show_grid=options['show_grid'],
+                nodes_only=options['nodes_only'],
+                no_color=options['no_color'],
+                show_rulers=options['show_rulers'],
+                show_ref_types=options['show_ref_types'],
+                no_parse_cache=options['no_parse_cache']
+            )
+        elif job.model.suffix == '.xsm':
+            diagram = XumlStateMachineDiagram(
+                xuml_model_path=job.model,
+                flatland_layout_path=job.layout,
+                diagram_file_path=job.diagram,
+                show_grid=options['show_grid'],
+                nodes_only=options['nodes_only'],
+                show_rulers=options['show_rulers'],
+                no_color=options['no_color'],
+                no_parse_cache=options['no_parse_cache']
+            )
+        else:
+            raise BatchManifestError(f"Unrecognized model file type: {job.model}")
+        diagram.build()
+        diagram.render()
+
+    @staticmethod
+    def run_job(job: BatchJob) -> JobResult:
+        """
+        Renders a single diagram, capturing any failure instead of letting it end the batch
+
+        :param job: The diagram to render
+        :return: How long it took and the reason it failed, if it did
+        """
+        _logger.info(f"Batch rendering: {job.model} with {job.layout} to {job.diagram}")
+        start = time.perf_counter()
+        error = None
+        try:
+            job.diagram.parent.mkdir(parents=True, exist_ok=True)
+            with Instrumentation.span("diagram", str(job.diagram)):
+                Batch.render_job(job)
+        except SystemExit as e:
+            # The diagram builders exit after logging any error in the model or layout
+            error = ' '.join(e.code.split()) if isinstance(e.code, str) else "exited, see log for details"
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            _logger.exception(f"Batch diagram failed: {job.diagram}")
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        return JobResult(job=job, seconds=time.perf_counter() - start, error=error)
+
+    @staticmethod
+    def run_worker_job(job: BatchJob) -> JobResult:
+        """
+        Renders a single diagram in a worker process, returning the stage timings recorded there
+        since the last one
+        """
+        result = Batch.run_job(job)
+        return result._replace(spans=tuple(Instrumentation.drain())) if Instrumentation.enabled else result
+
+    def worker_result(self, job: BatchJob, future: Future) -> JobResult:
+        """
+        Waits for a diagram rendered by a worker process, capturing the failure of the process itself
+
+        :param job: The diagram
+        :param future: Its result to come from the worker
+        :return: How long it took and the reason it failed, if it did
+        """
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A crash in Tcl or cairo or the process being killed takes down the whole pool
+            self.logger.error(f"Batch worker process died before finishing: {job.diagram}")
+            return JobResult(job=job, seconds=0.0, error="worker process died before finishing the diagram")
+        except Exception as e:
+            # Such as a job or result that could not be passed between processes
+            self.logger.error(f"Batch worker failed: {job.diagram} [{e}]")
+            return JobResult(job=job, seconds=0.0, error=f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+
+    def run(self, workers: int = 1) -> list[JobResult]:
+        """
+        Renders each diagram in the batch, keeping the parsed style configuration between them
+
+        With more than one worker, the diagrams are shared out among that many processes. Each one
+        loads its own copy of the Flatland database, from the saved snapshot if there is one, so
+        the parent should create the database first to be sure there is.
+
+        :param workers: Number of processes rendering diagrams, 0 for one per cpu
+        :return: A result for each diagram, in batch order
+        """
+        workers = min(workers or os.cpu_count() or 1, len(self.Jobs))
+        start = time.perf_counter()
+        if workers > 1:
+            self.logger.info(f"Batch rendering {len(self.Jobs)} diagrams on {workers} processes")
+            # Spawn rather than fork, a copy of the parent's Tcl interpreter must never be used
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=init_worker,
+                                     initargs=(Instrumentation.enabled, TextMetrics.persist,
+                                               SVGStream.enabled, OutputFormats.formats,
+                                               ConfigLoader.persist)) as executor:
+                futures = [executor.submit(Batch.run_worker_job, job) for job in self.Jobs]
+                self.Results = [self.worker_result(job, f) for job, f in zip(self.Jobs, futures)]
+            for r in self.Results:
+                Instrumentation.extend(list(r.spans))
+        else:
+            ConfigLoader.activate()
+            self.Results = [self.run_job(job) for job in self.Jobs]
+        self.Elapsed = time.perf_counter() - start
+        return self.Results
+
+    def report(self, out=sys.stdout):
+        """
+        Prints each diagram's time and status followed by a summary line
+
+        :param out: Where the report goes
+        """
+        for r in self.Results:
+            status = 'ok' if r.error is None else f"FAILED ({r.error})"
+            print(f"{r.seconds:8.3f}s  {r.job.diagram}  {status}", file=out)
+        failed = sum(1 for r in self.Results if r.error is not None)
+        total = sum(r.seconds for r in self.Results)
+        print(f"{len(self.Results) - failed} rendered, {failed} failed in {self.Elapsed:.3f}s"
+              f" ({total:.3f}s of diagram time)", file=out)
+
+    @property
+    def failed(self) -> bool:
+        return any(r.error is not None for r in self.Results)
@@ -6,10 +6,11 @@ from collections import namedtuple
 from typing import NamedTuple
 
 # Model Integration
-from mi_config.config import Config
+from mi_config.config import user_config_home
 
 # Flatland
 from flatland.names import app
+from flatland.configuration.config_loader import ConfigLoader
 
 ConfigItem = namedtuple('ConfigItem', 'name collector')
 
@@ -41,11 +42,31 @@ class ConfigDB:
         ConfigItem(name="name_placement", collector=None),
     ]
 
+    @classmethod
+    def config_files(cls) -> list[Path]:
+        """
+        Returns the path of each yaml file that will be loaded, in config item order
+
+        The user's copy takes precedence. If there isn't one yet, the system file is what
+        will end up being copied in and loaded, so we return that instead.
+        """
+        files = []
+        for item in cls.config_items:
+            fname = f"{item.name}.yaml"
+            user_file = user_config_home / app / fname
+            files.append(user_file if user_file.exists() else cls.config_path / fname)
+        return files
+
     @classmethod
     def __init__(cls):
         """
         Load all config items in corresponding yaml files into item_data dictionary
+
+        Each file is loaded from the user's config directory, where any that is missing is first copied
+        in from the system files, just as a Config would load it
         """
+        user_config_dir = user_config_home / app
         for item in cls.config_items:
-            c = Config(app_name=app, lib_config_dir=cls.config_path, fspec={item.name:item.collector})
-            cls.item_data[item.name] = c.loaded_data[item.name]
+            cls.item_data[item.name] = ConfigLoader.load_config(
+                file_path=user_config_dir / f"{item.name}.yaml", nt_type=item.collector,
+                lib_config_dir=cls.config_path)
@@ -0,0 +1,176 @@
+""" config_loader.py - Parse each yaml configuration file once and remember it between runs """
+
+# System
+import sys
+import shutil
+import pickle
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, TextIO
+
+# Model Integration
+import yaml
+from mi_config.config import Config
+
+# Flatland
+from flatland.names import cache_dir, write_atomic
+from flatland.instrumentation import Instrumentation
+
+_logger = logging.getLogger(__name__)
+
+# The C parser if PyYAML was built with libyaml, same results much faster
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class FileLoad(NamedTuple):
+    """ How one configuration file was loaded """
+    path: Path
+    source: str  # 'parsed' or 'cached' if it was parsed before, in this run or an earlier one
+    seconds: float
+
+
+class ConfigLoader:
+    """
+    Flatland's own configuration and the tabletsvg style configuration read by every new Tablet are all
+    yaml files, and parsing them in pure Python takes longer than drawing a typical diagram. They are
+    parsed here, with the C parser where there is one, and each file's parsed data is remembered by the
+    file's modification time and size, so a file is parsed again only once it has changed.
+
+    The parsed data can also be saved so that the next run starts with it. Every caller is handed its own
+    copy, unpickled from what was remembered, so that nothing one diagram does to it leaks into the next.
+
+    While instrumentation is enabled, the time taken to load each file is kept so that it can be reported.
+    """
+    # Bump this whenever the saved form changes
+    format_version = 1
+
+    persist = True  # Load data saved by earlier runs and save any new data
+    cache_file = cache_dir / "config.pickle"
+
+    parsed = {}  # File path: ((modification time ns, size), pickled data)
+    loads = []  # FileLoad of each file loaded while instrumented
+    lock = threading.Lock()
+    loaded = False  # True once any saved data has been loaded
+    unsaved = 0  # Files parsed since the last save
+
+    @classmethod
+    def load_file(cls, path: Path):
+        """
+        Returns the data in a yaml file
+
+        :param path: Yaml file
+        :return: A private copy of the parsed data
+        :raises FileNotFoundError: If there is no such file
+        """
+        start = time.perf_counter()
+        with Instrumentation.span("config file", path.name):
+            stat = path.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            key = str(path)
+            with cls.lock:
+                if cls.persist and not cls.loaded:
+                    cls.load()
+                remembered = cls.parsed.get(key)
+            if remembered and remembered[0] == stamp:
+                data = pickle.loads(remembered[1])
+                source = 'cached'
+            else:
+                with open(path, 'r') as f:
+                    data = yaml.load(f, Loader=YamlLoader)
+                with cls.lock:
+                    cls.parsed[key] = (stamp, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+                    cls.unsaved += 1
+                source = 'parsed'
+        if Instrumentation.enabled:
+            with cls.lock:
+                cls.loads.append(FileLoad(path=path, source=source, seconds=time.perf_counter() - start))
+        return data
+
+    @classmethod
+    def load_config(cls, file_path: Path, nt_type: Optional[type], lib_config_dir: Path):
+        """
+        Loads a configuration file just as Config._load_yaml_to_namedtuple does
+
+        :param file_path: The file in the user's configuration directory
+        :param nt_type: Named tuple type of each item in the file, if any
+        :param lib_config_dir: Where the app keeps the original of each user file
+        :return: The file's data with each item loaded into the named tuple, if any
+        """
+        try:
+            raw_data = cls.load_file(file_path)
+        except FileNotFoundError:
+            # No user file, copy it in from the app's library and try again
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(lib_config_dir / file_path.name, file_path.parent)
+            raw_data = cls.load_file(file_path)
+        if not isinstance(raw_data, dict) or not nt_type:
+            return raw_data
+        return {k: nt_type(**v) for k, v in raw_data.items()}
+
+    @classmethod
+    def activate(cls):
+        """
+        Has every Config, such as those created by each new Tablet, load its files through this loader
+
+        This replaces mi_config's Config._load_yaml_to_namedtuple for the rest of the process, and is the
+        only place flatland changes how another package works. Activating it again changes nothing, so
+        each entry point (the command line, a batch, a batch worker, the watcher and the server) activates it.
+        """
+        Config._load_yaml_to_namedtuple = lambda config, file_path, nt_type: cls.load_config(
+            file_path=file_path, nt_type=nt_type, lib_config_dir=config.lib_config_dir)
+
+    @classmethod
+    def load(cls):
+        """
+        Adds the data saved by earlier runs
+        """
+        cls.loaded = True
+        try:
+            with open(cls.cache_file, 'rb') as f:
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            _logger.warning(f"Ignoring unreadable configuration cache: {cls.cache_file} [{e}]")
+            return
+        if not isinstance(saved, dict) or saved.get('format') != cls.format_version:
+            _logger.info("Saved configuration is in an older format, parsing again")
+            return
+        for key, remembered in saved['files'].items():
+            cls.parsed.setdefault(key, remembered)
+        _logger.info(f"{len(saved['files'])} parsed configuration files loaded from: {cls.cache_file}")
+
+    @classmethod
+    def save(cls):
+        """
+        Saves the parsed data for later runs if any file has been parsed since it was last saved
+        """
+        with cls.lock:
+            if not cls.persist or not cls.unsaved:
+                return
+            files = dict(cls.parsed)
+            cls.unsaved = 0
+        try:
+            data = pickle.dumps({'format': cls.format_version, 'files': files}, protocol=pickle.HIGHEST_PROTOCOL)
+            write_atomic(cls.cache_file, data)
+        except OSError as e:
+            # Not fatal, the files will just be parsed again next time
+            _logger.warning(f"Could not save configuration cache: {cls.cache_file} [{e}]")
+            return
+        _logger.info(f"{len(files)} parsed configuration files saved: {cls.cache_file}")
+
+    @classmethod
+    def report(cls, out: TextIO = sys.stdout):
+        """
+        Prints the time taken to load each file, and where its data came from, in load order
+        """
+        if not cls.loads:
+            return
+        width = max(len(l.path.name) for l in cls.loads + [FileLoad(Path('Config file'), '', 0)])
+        print(f"{'Config file':<{width}} {'Source':>8} {'ms':>8}", file=out)
+        for l in cls.loads:
+            print(f"{l.path.name:<{width}} {l.source:>8} {l.seconds * 1000:>8.2f}", file=out)
+        total = sum(l.seconds for l in cls.loads)
+        print(f"{'Total':<{width}} {'':>8} {total * 1000:>8.2f}", file=out)
@@ -3,11 +3,8 @@
 # System
 from typing import TYPE_CHECKING, Optional
 
-# Model Integration
-from pyral.relation import Relation
-
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.connector_subsystem.stem import Stem
 from flatland.datatypes.connection_types import NodeFace, AnchorPosition, StemName
 from flatland.datatypes.geometry_types import Position
@@ -61,32 +58,11 @@ class AnchoredStem(Stem):
         :param anchor_position:  Relative user specified distance on face relative to center position
         :return:  x, y canvas coordinate of the anchor position
         """
-        # Return either an x or y value where the root end is placed
-        if face == NodeFace.LEFT or face == NodeFace.RIGHT:
-            face_extent = node.Size.height
-        else:
-            face_extent = node.Size.width
-
         if not cls.default_stem_positions:
-            R = f"Name:<standard>"
-            result = Relation.restrict(db=app, relation='Connector_Layout_Specification', restriction=R)
-            cls.default_stem_positions = int(result.body[0]['Default_stem_positions'])
-
-        edge_offset = step_edge_distance(num_of_steps=cls.default_stem_positions, extent=face_extent, step=anchor_position)
-
-        if face == NodeFace.LEFT:
-            x = node.Canvas_position.x
-            y = node.Canvas_position.y + edge_offset
-        elif face == NodeFace.RIGHT:
-            x = node.Canvas_position.x + node.Size.width
-            y = node.Canvas_position.y + edge_offset
-        elif face == NodeFace.TOP:
-            y = node.Canvas_position.y + node.Size.height
-            x = node.Canvas_position.x + edge_offset
-        else:
-            assert (face == NodeFace.BOTTOM)
-            y = node.Canvas_position.y
-            x = node.Canvas_position.x + edge_offset
+            clayout_spec = RelvarCache.lookup('Connector_Layout_Specification', Name='standard')
+            cls.default_stem_positions = clayout_spec.Default_stem_positions
 
-        return Position(x, y)
+        edge_offset = step_edge_distance(num_of_steps=cls.default_stem_positions, extent=node.Face_extent(face),
+                                         step=anchor_position)
+        return node.Face_point(face=face, offset=edge_offset)
 
@@ -4,18 +4,17 @@ bending_binary_connector.py
 
 # System
 import logging
-from typing import List, TYPE_CHECKING, Optional
+from typing import List, TYPE_CHECKING, Optional, Tuple
 
 if TYPE_CHECKING:
     from flatland.node_subsystem.diagram import Diagram
 
 # Model Integration
-from pyral.relation import Relation
 from tabletsvg.graphics.polygon_se import PolygonSE
 from tabletsvg.graphics.text_element import TextElement
 
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import (UnsupportedConnectorType, InvalidBendNumber, NoFloatInStraightConnector,
                                  UnsupportedStemType)
 from flatland.connector_subsystem.binary_connector import BinaryConnector
@@ -51,9 +50,7 @@ class BendingBinaryConnector(BinaryConnector):
         self.logger = logging.getLogger(__name__)
         # Verify that the specified connector type name corresponds to a supported connector type
         # found in our database
-        R = f"Name:<{ctype_name}>, Diagram_type:<{diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Connector_Type', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Connector_Type', Name=ctype_name, Diagram_type=diagram.Diagram_type):
             self.logger.exception(f"Unsupported connector type: {ctype_name}"
                                   f" for diagram type: {diagram.Diagram_type}")
             raise UnsupportedConnectorType(connector_type_name=ctype_name, diagram_type_name=diagram.Diagram_type)
@@ -91,15 +88,11 @@ class BendingBinaryConnector(BinaryConnector):
             name=anchored_stem_p.stem_name,
         )
         self.Corners = self.compute_corners()
-
         self.Ternary_stem = None
+        self.index_segments()
+
         if ternary_stem:
-            # Find all line segments in the bending connector parallel to the ternary node face
-            # Where the ternary stem is attached
-            points = [self.T_stem.Vine_end] + self.Corners + [self.P_stem.Vine_end]
-            segs = set(zip(points, points[1:]))
-            horizontal_segs = {s for s in segs if s[0].y == s[1].y}
-            parallel_segs = horizontal_segs if ternary_stem.face in HorizontalFace else segs - horizontal_segs
+            # The ternary stem attaches to whichever of our segments it meets first
             self.Ternary_stem = TernaryStem(
                 connector=self,
                 stem_position=ternary_stem.stem_position,
@@ -107,10 +100,33 @@ class BendingBinaryConnector(BinaryConnector):
                 node=ternary_stem.node,
                 face=ternary_stem.face,
                 anchor_position=ternary_stem.anchor if ternary_stem.anchor is not None else 0,
-                name=ternary_stem.stem_name,
-                parallel_segs=parallel_segs
+                name=ternary_stem.stem_name
             )
 
+    @staticmethod
+    def path_lanes(t_face: NodeFace, paths: List[New_Path]) -> List[Tuple[int, Orientation]]:
+        """
+        Each row or column that the paths of a bending connector run along
+
+        The first path runs parallel to the T stem's node face and each subsequent path turns a corner.
+
+        :param t_face: Node face of the T stem
+        :param paths: Paths of the connector
+        :return: The lane number and orientation of each path
+        """
+        lanes = []
+        to_horizontal_path = t_face in HorizontalFace
+        for p in paths:
+            lanes.append((p.lane, Orientation.Horizontal if to_horizontal_path else Orientation.Vertical))
+            to_horizontal_path = not to_horizontal_path
+        return lanes
+
+    def index_segments(self):
+        self.Diagram.Grid.Segments.add_path([self.T_stem.Root_end] + self.Corners + [self.P_stem.Root_end],
+                                            owner=self)
+        if self.Ternary_stem:
+            self.Ternary_stem.index_segment()
+
     def compute_corners(self) -> List[Position]:
         if not self.Paths:  # Only one corner
             return [self.node_to_node()]
@@ -119,6 +135,7 @@ class BendingBinaryConnector(BinaryConnector):
             to_horizontal_path = self.T_stem.Node_face in HorizontalFace
             first_path = True
             for p in self.Paths:
+                # Each lane is normally added when the grid is solved, before any connector is laid out
                 if to_horizontal_path:  # Row
                     self.Diagram.Grid.add_lane(lane=p.lane, orientation=Orientation.Horizontal)
                     previous_x = self.T_stem.Vine_end.x if first_path else corners[-1].x
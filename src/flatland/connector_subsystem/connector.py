@@ -9,12 +9,11 @@ if TYPE_CHECKING:
     from flatland.node_subsystem.diagram import Diagram
 
 # Model Integration
-from tabletsvg.graphics.text_element import TextElement
 from tabletsvg.graphics.diagnostic_marker import DiagnosticMarker
-from pyral.relation import Relation
 
 # Flatland
-from flatland.names import app
+from flatland.text.text_metrics import TextMetrics
+from flatland.database.relvar_cache import RelvarCache
 from flatland.text.text_block import TextBlock
 from flatland.exceptions import InvalidNameSide, FlatlandDBException
 from flatland.datatypes.connection_types import ConnectorName, BufferDistance
@@ -59,7 +58,7 @@ class Connector:
             self.Name = ConnectorName(side=self.Name.side, bend=self.Name.bend, notch=self.Name.notch,
                                       text=name_block.text, wrap=self.Name.wrap)
             # Get size of bounding box
-            self.Name_size = TextElement.text_block_size(
+            self.Name_size = TextMetrics.text_block_size(
                 presentation=self.Diagram.Layer.Presentation, asset=self.Connector_type_name, text_block=self.Name.text
             )
 
@@ -76,10 +75,9 @@ class Connector:
         :return: Position of name bounding box lower left corner
         """
         # Get the Name Placement Specification
-        R = (f"Name:<{self.Connector_type_name}>, Diagram_type:<{self.Diagram.Diagram_type}>, "
-             f"Notation:<{self.Diagram.Notation}>")
-        result = Relation.restrict(db=app, relation='Name_Placement_Specification', restriction=R)
-        if not result.body:
+        np_spec = RelvarCache.lookup('Name_Placement_Specification', Name=self.Connector_type_name,
+                                     Diagram_type=self.Diagram.Diagram_type, Notation=self.Diagram.Notation)
+        if not np_spec:
             # Not nececessarily an error since many Connector Types do not specify any name
             # While a class diagram association might have a name like 'R35',
             # a state 'transition' simply has a Stem Position name
@@ -89,18 +87,15 @@ class Connector:
                                   f"Notation: {self.Diagram.Notation}")
             return None
 
-        np_spec = result.body[0]
-        axis_buffer = BufferDistance(h=int(np_spec['Horizontal_axis_buffer']),
-                                     v=int(np_spec['Horizontal_axis_buffer']))
+        axis_buffer = BufferDistance(h=np_spec.Horizontal_axis_buffer,
+                                     v=np_spec.Horizontal_axis_buffer)
         # Get the Connector Layout Specification
-        R = f"Name:<standard>"
-        result = Relation.restrict(db=app, relation='Connector_Layout_Specification', restriction=R)
-        if not result.body:
+        clayout_spec = RelvarCache.lookup('Connector_Layout_Specification', Name='standard')
+        if not clayout_spec:
             self.logger.exception("Connector Layout Specification not found")
             raise FlatlandDBException
 
-        clayout_spec = result.body[0]
-        default_cname_positions = int(clayout_spec['Default_cname_positions'])
+        default_cname_positions = clayout_spec.Default_cname_positions
         if point_t.y == point_p.y:
             # Bend is horizontal
             bend_extent = abs(point_t.x-point_p.x)
@@ -124,6 +119,14 @@ class Connector:
             name_x = point_t.x + axis_buffer.h * self.Name.side - width_offset
         return Position(name_x, name_y)
 
+    def index_segments(self):
+        """
+        Adds the horizontal and vertical segments of my lines to the Grid's segment index
+
+        Nothing is indexed unless overridden, the branches of a tree connector, for example, aren't yet
+        """
+        pass
+
     def render(self):
         pass  # overriden
 
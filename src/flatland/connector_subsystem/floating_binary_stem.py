@@ -10,7 +10,7 @@ if TYPE_CHECKING:
 
 # Flatland
 from flatland.connector_subsystem.stem import Stem
-from flatland.datatypes.connection_types import NodeFace, StemName
+from flatland.datatypes.connection_types import NodeFace, HorizontalFace, StemName
 from flatland.datatypes.geometry_types import Position
 
 
@@ -43,16 +43,12 @@ class FloatingBinaryStem(Stem):
         # Initially set the Floating Stem root end to match the Projecting Stem root end
         x, y = projecting_stem.Root_end
 
-        # left and right faces are vertical, so they determine the x coordinate
-        if face == NodeFace.LEFT:
-            x = node.Canvas_position.x
-        elif face == NodeFace.RIGHT:
-            x = node.Canvas_position.x + node.Size.width
         # top and bottom faces are horizontal, so they determine the y coordinate
-        elif face == NodeFace.TOP:
-            y = node.Canvas_position.y + node.Size.height
-        elif face == NodeFace.BOTTOM:
-            y = node.Canvas_position.y
+        # left and right faces are vertical, so they determine the x coordinate
+        if face in HorizontalFace:
+            y = node.Face_position(face)
+        else:
+            x = node.Face_position(face)
 
         # Stem initialized with our computed root end
         root = Position(x, y)
@@ -18,13 +18,13 @@ from tabletsvg.graphics.symbol import Symbol
 from tabletsvg.geometry_types import HorizAlign # to avoid shadowing flatland HorizAlign enum
 from tabletsvg.graphics.diagnostic_marker import DiagnosticMarker
 from tabletsvg.graphics.text_element import TextBlockCorner
-from pyral.relation import Relation
 
 # Flatland
-from flatland.names import app
+from flatland.text.text_metrics import TextMetrics
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import InvalidNameSide, FlatlandDBException
 from flatland.datatypes.geometry_types import Position
-from flatland.datatypes.connection_types import NodeFace, StemName, StemAngle, OppositeFace
+from flatland.datatypes.connection_types import NodeFace, StemName, StemAngle, StemDirection, OppositeFace
 
 
 class Stem:
@@ -72,7 +72,7 @@ class Stem:
             layer = self.Connector.Diagram.Layer
             # Get size of name bounding box
             asset = f"{self.Stem_position} name"
-            self.Name_size = TextElement.text_block_size(presentation=layer.Presentation, asset=asset,
+            self.Name_size = TextMetrics.text_block_size(presentation=layer.Presentation, asset=asset,
                                                          text_block=self.Name.text.text)
 
         # There are at most two rendered symbols (one on each end) of a Stem and usually none or one
@@ -80,25 +80,31 @@ class Stem:
         self.Vine_rendered_symbol = None
 
         # Some stem subclasses will compute their vine end, but for a fixed geometry, we can do it right here
-        R = f"Name:<{self.Stem_position}>, Diagram_type:<{self.Connector.Diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Stem_Position', restriction=R)
-        self.Stem_position_stretch = result.body[0]['Stretch']
-        self.Stem_position_minimum_length = int(result.body[0]['Minimum_length'])
+        stem_position_i = RelvarCache.lookup('Stem_Position', Name=self.Stem_position,
+                                             Diagram_type=self.Connector.Diagram.Diagram_type)
+        self.Stem_position_stretch = stem_position_i.Stretch
+        self.Stem_position_minimum_length = stem_position_i.Minimum_length
 
         if self.Stem_position_stretch in {'fixed', 'free'}:
             # For a fixed geometry, the Vine end is a fixed distance from the Root End
             stem_len = self.Stem_position_minimum_length
             # Compute the coordinates based on the stem direction using the rooted node face
-            x, y = self.Root_end
-            if face == NodeFace.RIGHT:
-                x = x + stem_len
-            elif face == NodeFace.LEFT:
-                x = x - stem_len
-            elif face == NodeFace.TOP:
-                y = y + stem_len
-            elif face == NodeFace.BOTTOM:
-                y = y - stem_len
-            self.Vine_end = Position(x, y)
+            self.Vine_end = Stem.extend(point=self.Root_end, face=face, length=stem_len)
+
+    @staticmethod
+    def extend(point: Position, face: NodeFace, length: float) -> Position:
+        """
+        Moves a point the way a stem leaves a node face
+
+        :param point: Point to move
+        :param face: Node face the stem is attached to
+        :param length: Distance to move
+        :return: Moved point
+        """
+        axis, direction = StemDirection[face]
+        coordinates = list(point)
+        coordinates[axis] += direction * length
+        return Position(*coordinates)
 
     def render_name(self):
         """
@@ -109,21 +115,20 @@ class Stem:
             return
 
         # Get the Name Placement Specification
-        R = (f"Name:<{self.Stem_position}>, Diagram_type:<{self.Connector.Diagram.Diagram_type}>, "
-             f"Notation:<{self.Connector.Diagram.Notation}>")
-        result = Relation.restrict(db=app, relation='Name_Placement_Specification', restriction=R)
-        if not result.body:
+        name_spec = RelvarCache.lookup('Name_Placement_Specification', Name=self.Stem_position,
+                                       Diagram_type=self.Connector.Diagram.Diagram_type,
+                                       Notation=self.Connector.Diagram.Notation)
+        if not name_spec:
             self.logger.exception(f"No Name Placement Specification for stem: {self.Stem_position},"
                                   f"Diagram type: {self.Connector.Diagram.Diagram_type},"
                                   f"Notation: {self.Connector.Diagram.Notation}")
             raise FlatlandDBException
-        name_spec = result.body[0]
 
         # Determine the Canvas position of the stem name and any specified label
         if self.Vine_end.y == self.Root_end.y:
             # Horizontal stem
-            horizontal_face_buffer = int(name_spec['Horizontal_face_buffer'])
-            vertical_axis_buffer = int(name_spec['Vertical_axis_buffer'])
+            horizontal_face_buffer = name_spec.Horizontal_face_buffer
+            vertical_axis_buffer = name_spec.Vertical_axis_buffer
             name_y = self.Root_end.y + self.Name.side * vertical_axis_buffer
             if self.Node_face == NodeFace.LEFT:
                 name_corner = TextBlockCorner.LR if self.Name.side == 1 else TextBlockCorner.UR
@@ -135,8 +140,8 @@ class Stem:
                 alignment = HorizAlign.LEFT
         else:
             # Vertical stem
-            vertical_face_buffer = int(name_spec['Vertical_face_buffer'])
-            horizontal_axis_buffer = int(name_spec['Horizontal_axis_buffer'])
+            vertical_face_buffer = name_spec.Vertical_face_buffer
+            horizontal_axis_buffer = name_spec.Horizontal_axis_buffer
             name_x = self.Root_end.x + self.Name.side * horizontal_axis_buffer
             if self.Name.side == 1:  # Text is to the right of vertical stem, so left align it
                 alignment = HorizAlign.LEFT
@@ -158,31 +163,28 @@ class Stem:
         Render a pre-defined label if one is specified for this Stem Position by the Diagram Notation
         """
         # Is there a Label Placement Specication for this Stem Position and Diagram Notation?
-        R = (f"Stem_position:<{self.Stem_position}>, Diagram_type:<{self.Connector.Diagram.Diagram_type}>, "
-             f"Notation:<{self.Connector.Diagram.Notation}>")
-        result = Relation.restrict(db=app, relation='Label_Placement', restriction=R)
-        if not result.body:
+        lp_spec = RelvarCache.lookup('Label_Placement', Stem_position=self.Stem_position,
+                                     Diagram_type=self.Connector.Diagram.Diagram_type,
+                                     Notation=self.Connector.Diagram.Notation)
+        if not lp_spec:
             # No Label is defined for this Diagram Notation
             return
 
-        # We have a Label Placement Specification
-        lp_spec = result.body[0]
-
         # Position of the label is relative to the root or the vine end
-        orientation = result.body[0]['Orientation']
+        orientation = lp_spec.Orientation
         location = self.Root_end if orientation != 'vine' else self.Vine_end
         # To avoid overlapping text, the label is rendered on the side of the Stem opposite the stem name
         # So if the name is something like 'is queued for takeoff on', and it appears above the Stem,
         # a label like '0..1' should be rendered underneath the Stem
         # We do this by flipping the polarity of the side from 1 to -1 or vice versa
         # And if there is no user specified name, we can just use the default side defined by the Diagram Notation
-        label_side = self.Name.side * -1 if self.Name else int(lp_spec['Default_stem_side'])
+        label_side = self.Name.side * -1 if self.Name else int(lp_spec.Default_stem_side)
         alignment = HorizAlign.LEFT  # Default alignment
 
         # Determine the Canvas position of the stem name and any specified label
-        stem_end_offset = int(lp_spec['Stem_end_offset'])
-        horizontal_stem_offset = int(lp_spec['Horizontal_stem_offset'])
-        vertical_stem_offset = int(lp_spec['Vertical_stem_offset'])
+        stem_end_offset = lp_spec.Stem_end_offset
+        horizontal_stem_offset = lp_spec.Horizontal_stem_offset
+        vertical_stem_offset = lp_spec.Vertical_stem_offset
         if self.Vine_end.y == self.Root_end.y:
             # Horizontal stem
             label_y = location.y + label_side * vertical_stem_offset
@@ -235,10 +237,10 @@ class Stem:
         symbol_name = f"{self.Connector.Diagram.Notation} {self.Connector.Diagram.Diagram_type}"
 
         # Lookup icon placement for Symbol
-        R = (f"Stem_position:<{self.Stem_position}>, Diagram_type:<{self.Connector.Diagram.Diagram_type}>, "
-             f"Notation:<{self.Connector.Diagram.Notation}>")
-        result = Relation.restrict(db=app, relation='Icon_Placement', restriction=R)
-        if not result.body:
+        icon_placement = RelvarCache.lookup('Icon_Placement', Stem_position=self.Stem_position,
+                                            Diagram_type=self.Connector.Diagram.Diagram_type,
+                                            Notation=self.Connector.Diagram.Notation)
+        if not icon_placement:
             # No icon specified for this stem position and notation on this diagram type
             # Not necessarily an error since a Stem Position like 'from state' has no notation at all
             # With xUML notation, a 'class-face' Stem Position has no Icon Placement,
@@ -249,7 +251,7 @@ class Stem:
                              f"Diagram type: {self.Connector.Diagram.Diagram_type},"
                              f"Notation: {self.Connector.Diagram.Notation}")
             return
-        orientation = result.body[0]['Orientation']
+        orientation = icon_placement.Orientation
         location = self.Root_end if orientation != 'vine' else self.Vine_end
         if self.Stem_position_stretch == 'hanging':
             # This is a vine end symbol, so it is being placed opposite the Stem's root node face
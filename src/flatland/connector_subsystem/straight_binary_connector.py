@@ -10,12 +10,11 @@ if TYPE_CHECKING:
     from flatland.node_subsystem.diagram import Diagram
 
 # Model Integration
-from pyral.relation import Relation
 from tabletsvg.graphics.line_segment import LineSegment
 from tabletsvg.graphics.text_element import TextElement
 
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import (UnsupportedConnectorType, MultipleFloatsInSameStraightConnector,
                                  NoFloatInStraightConnector, UnsupportedStemType)
 from flatland.connector_subsystem.binary_connector import BinaryConnector
@@ -67,9 +66,7 @@ class StraightBinaryConnector(BinaryConnector):
         self.logger = logging.getLogger(__name__)
         # Verify that the specified connector type name corresponds to a supported connector type
         # found in our database
-        R = f"Name:<{ctype_name}>, Diagram_type:<{diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Connector_Type', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Connector_Type', Name=ctype_name, Diagram_type=diagram.Diagram_type):
             self.logger.exception(f"Unsupported connector type: {ctype_name}"
                                   f" for diagram type: {diagram.Diagram_type}")
             raise UnsupportedConnectorType(connector_type_name=ctype_name, diagram_type_name=diagram.Diagram_type)
@@ -90,22 +87,19 @@ class StraightBinaryConnector(BinaryConnector):
         # Validate the user requested Stem Positions
         # These should be correct unless there is an issue with the model parser, but
         # we'll validate them nonetheless
-        R = f"Name:<{projecting_stem.stem_position}>, Diagram_type:<{self.Diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Stem_Position', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Stem_Position', Name=projecting_stem.stem_position,
+                                  Diagram_type=self.Diagram.Diagram_type):
             self.logger.exception(f"Undefined stem position: [{projecting_stem.stem_position}]"
                                   f"for diagram type: [{self.Diagram.Diagram_type}]")
             raise UnsupportedStemType
-        R = f"Name:<{floating_stem.stem_position}>, Diagram_type:<{self.Diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Stem_Position', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Stem_Position', Name=floating_stem.stem_position,
+                                  Diagram_type=self.Diagram.Diagram_type):
             self.logger.exception(f"Undefined stem position: [{projecting_stem.stem_position}]"
                                   f"for diagram type: [{self.Diagram.Diagram_type}]")
             raise UnsupportedStemType
         if tertiary_stem:
-            R = f"Name:<{tertiary_stem.stem_position}>, Diagram_type:<{self.Diagram.Diagram_type}>"
-            result = Relation.restrict(db=app, relation='Stem_Position', restriction=R)
-            if not result.body:
+            if not RelvarCache.lookup('Stem_Position', Name=tertiary_stem.stem_position,
+                                      Diagram_type=self.Diagram.Diagram_type):
                 self.logger.exception(f"Undefined stem position: [{projecting_stem.stem_position}]"
                                       f"for diagram type: [{self.Diagram.Diagram_type}]")
                 raise UnsupportedStemType
@@ -129,9 +123,10 @@ class StraightBinaryConnector(BinaryConnector):
             projecting_stem=self.Projecting_stem,
             name=floating_stem.stem_name
         )
+        self.Tertiary_stem = None
+        self.index_segments()
         # If one was specified, create the Tertiary Stem whose vine end will terminate on the Connector line segment
         # between the two opposing Stems
-        self.Tertiary_stem = None
         if tertiary_stem:
             anchor = tertiary_stem.anchor if tertiary_stem.anchor is not None else 0
             self.Tertiary_stem = TernaryStem(
@@ -141,10 +136,15 @@ class StraightBinaryConnector(BinaryConnector):
                 node=tertiary_stem.node,
                 face=tertiary_stem.face,
                 anchor_position=anchor,
-                name=tertiary_stem.stem_name,
-                parallel_segs={(self.Projecting_stem.Vine_end, self.Floating_stem.Vine_end)}
+                name=tertiary_stem.stem_name
             )
 
+    def index_segments(self):
+        self.Diagram.Grid.Segments.add(from_here=self.Projecting_stem.Root_end, to_there=self.Floating_stem.Root_end,
+                                       owner=self)
+        if self.Tertiary_stem:
+            self.Tertiary_stem.index_segment()
+
     def compute_axis(self) -> int:
         """
         Determines the x or y axis of the straight connector line where the Tertiary Stem attaches.
@@ -4,7 +4,7 @@ ternary_stem.py
 # System
 import logging
 import sys
-from typing import TYPE_CHECKING, Set, Optional
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from flatland.node_subsystem.node import Node
@@ -15,9 +15,8 @@ from tabletsvg.graphics.line_segment import LineSegment
 
 # Flatland
 from flatland.connector_subsystem.anchored_stem import AnchoredStem
-from flatland.datatypes.connection_types import HorizontalFace, NodeFace, AnchorPosition, StemName
+from flatland.datatypes.connection_types import HorizontalFace, NodeFace, AnchorPosition, StemName, Orientation
 from flatland.datatypes.geometry_types import Position
-from flatland.geometry_domain.linear_geometry import nearest_parallel_segment
 
 
 class TernaryStem(AnchoredStem):
@@ -27,8 +26,7 @@ class TernaryStem(AnchoredStem):
     """
 
     def __init__(self, connector: 'BinaryConnector', stem_position: str, semantic: str,
-                 node: 'Node', face: NodeFace, anchor_position: AnchorPosition, parallel_segs: Set[tuple],
-                 name: Optional[StemName] = None):
+                 node: 'Node', face: NodeFace, anchor_position: AnchorPosition, name: Optional[StemName] = None):
         """
         Constructor
 
@@ -38,7 +36,6 @@ class TernaryStem(AnchoredStem):
         :param node: Is rooted on this Node
         :param face: Is rooted from this Node face
         :param anchor_position: Position of the Root as specified by the user
-        :param parallel_segs: All binary connector line segments parallel to the rooted Node face
         :param name: Optional name to be drawn next to stem vine end
         """
         self.logger = logging.getLogger(__name__)
@@ -50,16 +47,26 @@ class TernaryStem(AnchoredStem):
         self.Vine_start = None
 
         # Compute the vine end so that it touches the closest Binary Connector bend line segment
-        # away from the root node face
+        # parallel to and away from the root node face
         asc = True if face in {NodeFace.TOP, NodeFace.RIGHT} else False
-        try:
-            axis = nearest_parallel_segment(psegs=parallel_segs, point=self.Root_end, ascending=asc)
-        except ValueError:
-            cname = 'Unnamed' if not self.Connector else self.Connector.Name.text
+        orientation = Orientation.Horizontal if face in HorizontalFace else Orientation.Vertical
+        segments = self.Connector.Diagram.Grid.Segments
+        axis = segments.nearest_parallel(point=self.Root_end, orientation=orientation, ascending=asc,
+                                         owner=self.Connector)
+        if axis is None:
+            cname = 'Unnamed' if not self.Connector.Name else self.Connector.Name.text
             self.logger.error(f"Ternary stem does not intersect binary connector [{cname}]")
             sys.exit(1)
 
         self.Vine_end = Position(self.Root_end.x, axis) if face in HorizontalFace else Position(axis, self.Root_end.y)
+        self.index_segment()
+
+    def index_segment(self):
+        """
+        Adds my line to the Grid's segment index as part of my Connector
+        """
+        self.Connector.Diagram.Grid.Segments.add(from_here=self.Root_end, to_there=self.Vine_end,
+                                                 owner=self.Connector)
 
     def render(self):
         """
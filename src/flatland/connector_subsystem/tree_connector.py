@@ -8,11 +8,11 @@ from typing import Set, Optional
 
 # Model Integration
 from tabletsvg.graphics.text_element import TextElement
-from pyral.relation import Relation
 from tabletsvg.graphics.diagnostic_marker import DiagnosticMarker
 
 # Flatland
-from flatland.names import app
+from flatland.text.text_metrics import TextMetrics
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import UnsupportedConnectorType, FlatlandDBException
 from flatland.datatypes.connection_types import ConnectorName
 from flatland.connector_subsystem.connector import Connector
@@ -64,9 +64,7 @@ class TreeConnector(Connector):
         """
         # Verify that the specified connector type name corresponds to a supported connector type
         # found in our database
-        R = f"Name:<{ctype_name}>, Diagram_type:<{diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Connector_Type', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Connector_Type', Name=ctype_name, Diagram_type=diagram.Diagram_type):
             self.logger.exception(f"Unsupported connector type: {ctype_name}"
                                   f" for diagram type: {diagram.Diagram_type}")
             raise UnsupportedConnectorType(connector_type_name=ctype_name, diagram_type_name=diagram.Diagram_type)
@@ -189,22 +187,20 @@ class TreeConnector(Connector):
         layer = self.Diagram.Layer
         asset = self.Connector_type_name
         # asset = f"{self.Connector_type_name} name"
-        namebox = TextElement.text_block_size(presentation=layer.Presentation, asset=asset, text_block=self.Name.text)
+        namebox = TextMetrics.text_block_size(presentation=layer.Presentation, asset=asset, text_block=self.Name.text)
         tbranch = self.Branches[0]  # The first branch is always the one met by the trunk stem
         # Get the Name Placement Specification
-        R = (f"Name:<{self.Connector_type_name}>, Diagram_type:<{self.Diagram.Diagram_type}>, "
-             f"Notation:<{self.Diagram.Notation}>")
-        result = Relation.restrict(db=app, relation='Name_Placement_Specification', restriction=R)
-        if not result.body:
+        np_spec = RelvarCache.lookup('Name_Placement_Specification', Name=self.Connector_type_name,
+                                     Diagram_type=self.Diagram.Diagram_type, Notation=self.Diagram.Notation)
+        if not np_spec:
             self.logger.exception(f"No Name Placement Specification for stem: {self.Stem_position},"
                                   f"Diagram type: {self.Diagram.Diagram_type},"
                                   f"Notation: {self.Diagram.Notation}")
             raise FlatlandDBException
-        np_spec = result.body[0]
-        axis_buffer = BufferDistance(h=int(np_spec['Horizontal_axis_buffer']),
-                                     v=int(np_spec['Horizontal_axis_buffer']))
-        face_buffer = BufferDistance(h=int(np_spec['Horizontal_face_buffer']),
-                                     v=int(np_spec['Vertical_face_buffer']))
+        axis_buffer = BufferDistance(h=np_spec.Horizontal_axis_buffer,
+                                     v=np_spec.Horizontal_axis_buffer)
+        face_buffer = BufferDistance(h=np_spec.Horizontal_face_buffer,
+                                     v=np_spec.Vertical_face_buffer)
         name_x = None
         name_y = None
         if self.Trunk_stem.Node_face in HorizontalFace:
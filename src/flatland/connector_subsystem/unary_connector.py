@@ -9,12 +9,11 @@ if TYPE_CHECKING:
     from flatland.node_subsystem.diagram import Diagram
 
 # Model Integration
-from pyral.relation import Relation
 from tabletsvg.graphics.line_segment import LineSegment
 from tabletsvg.graphics.text_element import TextElement
 
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import UnsupportedConnectorType
 from flatland.datatypes.command_interface import New_Stem
 from flatland.connector_subsystem.anchored_stem import AnchoredStem
@@ -39,9 +38,7 @@ class UnaryConnector(Connector):
         self.logger.info("Creating unary connector")
         # Verify that the specified connector type name corresponds to a supported connector type
         # found in our database
-        R = f"Name:<{ctype_name}>, Diagram_type:<{diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Connector_Type', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Connector_Type', Name=ctype_name, Diagram_type=diagram.Diagram_type):
             self.logger.exception(f"Unsupported connector type: {ctype_name}"
                                   f" for diagram type: {diagram.Diagram_type}")
             raise UnsupportedConnectorType(connector_type_name=ctype_name, diagram_type_name=diagram.Diagram_type)
@@ -60,6 +57,11 @@ class UnaryConnector(Connector):
             anchor_position=anchor,
             name=stem.stem_name
         )
+        self.index_segments()
+
+    def index_segments(self):
+        self.Diagram.Grid.Segments.add(from_here=self.Unary_stem.Root_end, to_there=self.Unary_stem.Vine_end,
+                                       owner=self)
 
     def render(self):
         """
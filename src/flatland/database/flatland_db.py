@@ -1,6 +1,7 @@
 """ flatland_db.py - Create and initialize the flatland database """
 
 # System
+import logging
 from collections import namedtuple
 
 # Model Integration
@@ -9,8 +10,12 @@ from pyral.relvar import Relvar
 
 # Flatland
 from flatland.names import app
+from flatland.instrumentation import Instrumentation
 from flatland.configuration.configDB import ConfigDB
 from flatland.database.relvars import FlatlandSchema, SimpleAssoc, AssocRel, GenRel
+from flatland.database.snapshot import DBSnapshot
+from flatland.database.relvar_cache import RelvarCache
+from flatland.database.population import Population
 from flatland.database.pop_sheet_subsys import SheetSubsysDB
 from flatland.database.pop_node_subsys import NodeSubsysDB
 from flatland.database.pop_layout_spec import LayoutSpecDB
@@ -19,6 +24,8 @@ from flatland.database.pop_connector_subsys import ConnectorSubsysDB
 Header = namedtuple('Header', ['attrs', 'ids'])
 SheetInstance = namedtuple('SheetInstance', 'standard height width size_group')
 
+_logger = logging.getLogger(__name__)
+
 class FlatlandDB:
     """
     This class manages initialization and population of the Flatland database.
@@ -66,37 +73,60 @@ class FlatlandDB:
         cls.rel_names = Database.constraint_names(db=app)
 
     @classmethod
-    def create_db(cls, rebuild: bool = True, debug = False):
+    def create_db(cls, rebuild: bool = False, debug = False):
         """
          1. Initialize a PyRAL session.
-         2. Load the Flatland Schema based on the class models defined in the project wiki (with model diagrams
+         2. Load the populated database from a snapshot if one matches the current schema and configuration.
+         Otherwise:
+         3. Load the Flatland Schema based on the class models defined in the project wiki (with model diagrams
             in the documentation folder of this repository).
-         3. Populate each modeled subsystem using any yaml files in the users configuration path.
+         4. Populate each modeled subsystem using any yaml files in the users configuration path.
+         5. Save a snapshot so that the next run can skip steps 3 and 4.
+
+        :param rebuild: Build the database from scratch even if a matching snapshot exists
+        :param debug: Print out the populated database
         """
         cls.debug = debug
 
         # Create a new PyRAL session
-        cls.db = Database.open_session(name='flatland')
-
-        # There should be no reason to create a new database unless the user has updated any of their configuration
-        # files. So, in the future, there will be an option to just load an existing populated database and move on.
-
-        # But during early development we'll just start with a fresh database build each time.
-
-        # Load the database schema
-        cls.load_schema()
-
-        # Process all config files
-        ConfigDB()
-
-        # Populate each subsystem
-        SheetSubsysDB.populate()
-        NodeSubsysDB.populate()
-        LayoutSpecDB.populate()
-        ConnectorSubsysDB.populate()
+        cls.db = Database.open_session(name=app)
+
+        # There is no reason to build a new database unless the user has updated any of their configuration
+        # files or the schema has changed, and either of those yields a new snapshot key
+        snapshot_key = DBSnapshot.key()
+        with Instrumentation.span("snapshot load"):
+            loaded = not rebuild and DBSnapshot.load(key=snapshot_key)
+        if loaded:
+            cls.relvar_names = Database.names(db=app)
+            cls.rel_names = Database.constraint_names(db=app)
+        else:
+            _logger.info("Building the flatland database")
+
+            # Load the database schema
+            with Instrumentation.span("schema load"):
+                cls.load_schema()
+
+            # Process all config files
+            with Instrumentation.span("config load"):
+                ConfigDB()
+
+            # Populate each subsystem, all in one transaction with the constraints checked at the end
+            with Instrumentation.span("database populate"):
+                population = Population()
+                SheetSubsysDB.populate(population)
+                NodeSubsysDB.populate(population)
+                LayoutSpecDB.populate(population)
+                ConnectorSubsysDB.populate(population)
+                population.insert()
+
+            with Instrumentation.span("snapshot save"):
+                DBSnapshot.save(key=snapshot_key)
+
+        # Layout and rendering read the populated database through this cache
+        with Instrumentation.span("relvar cache"):
+            RelvarCache.load()
 
         # Print out a depiction of the populated database as a set of filled out tables
         # organized alphabetically by relvar name
         if cls.debug:
             Relvar.printall('flatland')
-
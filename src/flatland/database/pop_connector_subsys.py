@@ -3,13 +3,9 @@
 # System
 import logging
 
-# Model Integration
-from pyral.relvar import Relvar
-from pyral.transaction import Transaction
-
 # Flatland
-from flatland.names import app
 from flatland.configuration.configDB import ConfigDB
+from flatland.database.population import Population
 from flatland.database.instances.connector_subsystem import *
 
 _logger = logging.getLogger(__name__)
@@ -19,24 +15,21 @@ class ConnectorSubsysDB:
     """
     Load all Connector Subsystem yaml data into the database
     """
-    stem_semantic_instances = []
-
 
     @classmethod
-    def populate(cls):
+    def populate(cls, population: Population):
         """
-        Populate the connector subsystem by breaking it down into multiple focused database transactions
-        (so if something goes wrong, the scope of the affected transaction is as tight as possible)
+        Add all Connector Subsystem instances to the population
+
+        :param population: Gathers the instances to insert
         """
-        # Order of these function invocations is important since each successive call populates
-        # references to data populated in the previous call.
-        cls.pop_clayout_spec()
-        cls.pop_stem_position()
-        cls.pop_stem_notation()
-        cls.pop_name_placement_spec()
+        cls.pop_clayout_spec(population)
+        cls.pop_stem_position(population)
+        cls.pop_stem_notation(population)
+        cls.pop_name_placement_spec(population)
 
     @classmethod
-    def pop_name_placement_spec(cls):
+    def pop_name_placement_spec(cls, population: Population):
         """
         Populate name placement specs for Connector Types and Stem Types that support naming
         """
@@ -71,10 +64,10 @@ class ConnectorSubsysDB:
             if dtype_data.get('stem positions'):
                 make_np_inst(valdict=dtype_data['stem positions'])
 
-        Relvar.insert(db=app, relvar='Name_Placement_Specification', tuples=np_spec_instances)
+        population.add('Name_Placement_Specification', np_spec_instances)
 
     @classmethod
-    def pop_clayout_spec(cls):
+    def pop_clayout_spec(cls, population: Population):
         """
         Populate the single instance Connector Layout Specification class
         """
@@ -91,31 +84,23 @@ class ConnectorSubsysDB:
             Default_new_path_row_height=stand_layout['default new path row height'],
             Default_new_path_col_width=stand_layout['default new path col width'],
         )
-        # No transaction required, just insert it
-        Relvar.insert(db=app, relvar='Connector_Layout_Specification', tuples=[spec_instance])
+        population.add('Connector_Layout_Specification', [spec_instance])
 
     @classmethod
-    def pop_stem_position(cls):
+    def pop_stem_position(cls, population: Population):
         """
         Here we populate the Connector Type, Name Placement Specification, Stem Position, Stem Semantic,
-        Stem Notation, Semantic Expression, Icon Placement, and Label Placement classes. We need to do these
-        all in one transaction to manage all the unconditional constraints.
+        Stem Notation, Semantic Expression, Icon Placement, and Label Placement classes.
         """
         # Grab the connector_type.yaml input
         ctype_data = ConfigDB.item_data['connector_type']
 
         # Diagram Types
         for dtype_name, dtype_data in ctype_data.items():
-            # Create a list of Stem Semantic instance tuples for this Diagram Type
-            dtype_stem_semantic_instances = [
+            # Stem Semantics for this Diagram Type
+            population.add('Stem_Semantic', [
                 StemSemanticInstance(Name=name, Diagram_type=dtype_name) for name in dtype_data['stem semantics']
-            ]
-            # Add it to the complete list of Stem Semantic Instances
-            cls.stem_semantic_instances.extend(dtype_stem_semantic_instances)
-
-            # We'll populate each Diagram Type's data in its own transaction and name it accordingly
-            tr_name = f"{dtype_name.replace(" ", "_")}_diagram_ctypes"
-            Transaction.open(db=app, name=tr_name)
+            ])
 
             # Empty lists to gather instance tuples for this Diagram Type
             la_name_instances = []  # Line adjacent name instances
@@ -148,19 +133,13 @@ class ConnectorSubsysDB:
 
             # All Connector Types have been processed for this Diagram Type
 
-            # Insert all Stem Positions for this Diagram Type
-            Relvar.insert(db=app, relvar='Stem_Position', tuples=stem_position_instances, tr=tr_name)
-
-            # Insert all Connector Types for this Diagram Type
-            Relvar.insert(db=app, relvar='Connector_Type', tuples=ctype_instances, tr=tr_name)
-
-            # Insert all Line Adjacent Name superclass instances
-            Relvar.insert(db=app, relvar='Line_Adjacent_Name', tuples=la_name_instances, tr=tr_name)
-
-            Transaction.execute(db=app, name=tr_name)
+            # All Stem Positions, Connector Types and Line Adjacent Name superclass instances for this Diagram Type
+            population.add('Stem_Position', stem_position_instances)
+            population.add('Connector_Type', ctype_instances)
+            population.add('Line_Adjacent_Name', la_name_instances)
 
     @classmethod
-    def pop_stem_notation(cls):
+    def pop_stem_notation(cls, population: Population):
         """
         Here we populate the Stem Notation and Label Placement Specification classes
         """
@@ -172,10 +151,6 @@ class ConnectorSubsysDB:
         label_placement_instances = []
         semantic_expression_instances = []
 
-        # We'll populate all the Notation in one transaction
-        tr_name = "notation"
-        Transaction.open(db=app, name=tr_name)
-
         # Notation
         for notation, notation_data in notations.items():
             # Diagram Type
@@ -221,14 +196,10 @@ class ConnectorSubsysDB:
                             )
                         )
 
-        # No transaction required, but the order of populate is important
         _logger.info("Populating stem notation classes")
         _logger.info("Semantic Expression")
         _logger.info(semantic_expression_instances)
-        Relvar.insert(db=app, relvar='Semantic_Expression', tuples=semantic_expression_instances, tr=tr_name)
-
-        Relvar.insert(db=app, relvar='Stem_Semantic', tuples=cls.stem_semantic_instances, tr=tr_name)
-        Relvar.insert(db=app, relvar='Stem_Notation', tuples=stem_notation_instances, tr=tr_name)
-        Relvar.insert(db=app, relvar='Icon_Placement', tuples=icon_placement_instances, tr=tr_name)
-        Relvar.insert(db=app, relvar='Label_Placement', tuples=label_placement_instances, tr=tr_name)
-        Transaction.execute(db=app, name=tr_name)
+        population.add('Semantic_Expression', semantic_expression_instances)
+        population.add('Stem_Notation', stem_notation_instances)
+        population.add('Icon_Placement', icon_placement_instances)
+        population.add('Label_Placement', label_placement_instances)
@@ -1,13 +1,8 @@
 """ pop_layout_spec.py - Populate the layout specification"""
 
-# Model Integration
-from pyral.relvar import Relvar
-from pyral.relation import Relation
-from pyral.transaction import Transaction
-
 # Flatland
-from flatland.names import app
 from flatland.configuration.configDB import ConfigDB
+from flatland.database.population import Population
 from flatland.database.instances.node_subsystem import LayoutSpecificationInstance
 
 class LayoutSpecDB:
@@ -16,9 +11,11 @@ class LayoutSpecDB:
     """
 
     @classmethod
-    def populate(cls):
+    def populate(cls, population: Population):
         """
         Populate the Layout Specification
+
+        :param population: Gathers the instances to insert
         """
         # Get the relevant configuration data
         layout_data = ConfigDB.item_data['layout_specification']
@@ -34,4 +31,4 @@ class LayoutSpecDB:
             Default_cell_alignment_v=stand_layout['default cell alignment'][ 'vertical'],
             Default_cell_alignment_h=stand_layout['default cell alignment'][ 'horizontal']
         )
-        Relvar.insert(db=app, relvar='Layout_Specification', tuples=[spec_instance])
+        population.add('Layout_Specification', [spec_instance])
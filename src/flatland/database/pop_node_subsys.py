@@ -1,12 +1,8 @@
 """ pop_node_subsys.py - Populate the node subsystem classes """
 
-# Model Integration
-from pyral.relvar import Relvar
-from pyral.transaction import Transaction
-
 # Flatland
-from flatland.names import app
 from flatland.configuration.configDB import ConfigDB
+from flatland.database.population import Population
 from flatland.database.instances.node_subsystem import *
 
 
@@ -16,51 +12,39 @@ class NodeSubsysDB:
     """
 
     @classmethod
-    def populate(cls):
+    def populate(cls, population: Population):
         """
-        Populate the sheet subsystem by breaking it down into multiple focused database transactions
-        (so if something goes wrong, the scope of the affected transaction is as tight as possible)
+        Add all Node Subsystem instances to the population
+
+        :param population: Gathers the instances to insert
         """
-        # Order of these function invocations is important since each successive call populates
-        # references to data populated in the previous call.
-        cls.pop_notation()
-        cls.pop_diagram_type()
+        cls.pop_notation(population)
+        cls.pop_diagram_type(population)
 
     @classmethod
-    def pop_diagram_type(cls):
+    def pop_diagram_type(cls, population: Population):
         """
-
+        Populate each Diagram Type along with its Notations, Node Types and Compartment Types
         """
         diagram_type_data = ConfigDB.item_data['diagram_type']
 
         for dt_name, v in diagram_type_data.items():
-
-            # Open a transaction for the current Diagram Type
-            tr_name = f"dtype_{dt_name}"
-            Transaction.open(db=app, name=tr_name)
-            first_node_type = True
-
             # Diagram Type
-            Relvar.insert(db=app, relvar='Diagram_Type', tuples=[
+            population.add('Diagram_Type', [
                 DiagramTypeInstance(Name=dt_name, Abbreviation=v['abbreviation'], About=v['about'].rstrip())
-            ], tr=tr_name)
+            ])
             # Diagram Notation / R32
-            dnote_tuples = [DiagramNotationInstance(Diagram_type=dt_name, Notation=n) for n in v['notations']]
-            Relvar.insert(db=app, relvar='Diagram_Notation', tuples=dnote_tuples, tr=tr_name)
+            population.add('Diagram_Notation',
+                           [DiagramNotationInstance(Diagram_type=dt_name, Notation=n) for n in v['notations']])
 
             # Node Types
             for ntype, v in v['node types'].items():
-                ntype_tuples = []
-                if not first_node_type:
-                    tr_name = f"ntype_{ntype}"
-                    Transaction.open(db=app, name=tr_name)
-                ntype_tuples.append(NodeTypeInstance(Name=ntype, About=v['about'].rstrip(),
-                                                     Default_size_h=v['default size']['height'],
-                                                     Default_size_w=v['default size']['width'],
-                                                     Max_size_h=v['max size']['height'],
-                                                     Max_size_w=v['max size']['width'],
-                                                     Diagram_type=dt_name))
-                Relvar.insert(db=app, relvar='Node_Type', tuples=ntype_tuples, tr=tr_name)
+                population.add('Node_Type', [NodeTypeInstance(Name=ntype, About=v['about'].rstrip(),
+                                                              Default_size_h=v['default size']['height'],
+                                                              Default_size_w=v['default size']['width'],
+                                                              Max_size_h=v['max size']['height'],
+                                                              Max_size_w=v['max size']['width'],
+                                                              Diagram_type=dt_name)])
                 ctype_tuples = []
                 for k, v in v['compartment types'].items():
                     ctype_tuples.append(
@@ -75,15 +59,12 @@ class NodeSubsysDB:
                                                 Node_type=ntype, Diagram_type=dt_name
                                                 )
                     )
-                Relvar.insert(db=app, relvar='Compartment_Type', tuples=ctype_tuples, tr=tr_name)
-                Transaction.execute(db=app, name=tr_name)
-                first_node_type = False
-            pass
+                population.add('Compartment_Type', ctype_tuples)
 
     @classmethod
-    def pop_notation(cls):
+    def pop_notation(cls, population: Population):
         """
-
+        Populate each Notation
         """
         notation_data = ConfigDB.item_data['notation']
 
@@ -91,5 +72,4 @@ class NodeSubsysDB:
             NotationInstance(Name=k, About=v['about'].rstrip(), Why_use_it=v['why use it'])
             for k, v in notation_data.items()
         ]
-        Relvar.insert(db=app, relvar='Notation', tuples=notation_instances)
-        pass
+        population.add('Notation', notation_instances)
@@ -0,0 +1,56 @@
+""" population.py - Gather every instance of the Flatland database and insert them all at once """
+
+# System
+import logging
+from typing import NamedTuple
+
+# Model Integration
+from pyral.relvar import Relvar
+from pyral.transaction import Transaction
+
+# Flatland
+from flatland.names import app
+
+_logger = logging.getLogger(__name__)
+
+
+class Population:
+    """
+    Each subsystem builds the instance tuples of its relvars from the configuration data and adds them here
+    rather than inserting them as it goes. All of the tuples of a relvar are then inserted with a single
+    command, and every relvar in a single transaction, so the database checks its constraints just once,
+    when the whole population is in.
+
+    Since nothing is in the database until then, no subsystem looks anything up in it while populating.
+    Anything one part of the population needs from another is looked up in the configuration data instead.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+
+        - Instances -- Instance tuples of each relvar in the order added
+        """
+        self.Instances = {}
+
+    def add(self, relvar: str, tuples: list[NamedTuple]):
+        """
+        Adds instances of a relvar
+
+        :param relvar: Relvar name
+        :param tuples: Instance tuples
+        """
+        self.Instances.setdefault(relvar, []).extend(tuples)
+
+    def insert(self, tr_name: str = "populate"):
+        """
+        Inserts every instance added in one transaction
+
+        :param tr_name: Name of the transaction
+        """
+        Transaction.open(db=app, name=tr_name)
+        for relvar, tuples in self.Instances.items():
+            Relvar.insert(db=app, relvar=relvar, tuples=tuples, tr=tr_name)
+        Transaction.execute(db=app, name=tr_name)
+        _logger.info(f"Populated {sum(len(t) for t in self.Instances.values())} instances"
+                     f" of {len(self.Instances)} relvars")
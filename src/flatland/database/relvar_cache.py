@@ -0,0 +1,176 @@
+""" relvar_cache.py - Read only, in memory copy of the populated Flatland database """
+
+# System
+import logging
+import threading
+from typing import NamedTuple, Optional
+
+# Model Integration
+from pyral.relation import Relation
+
+# Flatland
+from flatland.names import app
+from flatland.exceptions import FlatlandDBException
+from flatland.database.relvars import FlatlandSchema
+from flatland.database.instances.node_subsystem import *
+from flatland.database.instances.sheet_subsystem import *
+from flatland.database.instances.connector_subsystem import *
+
+_logger = logging.getLogger(__name__)
+
+# Each relvar is loaded into the named tuple defined for its instances
+instance_type = {
+    # Connector subsystem
+    'Connector_Layout_Specification': ConnectorLayoutSpecificationInstance,
+    'Connector_Type': ConnectorTypeInstance,
+    'Icon_Placement': IconPlacementInstance,
+    'Label_Placement': LabelPlacementInstance,
+    'Line_Adjacent_Name': LineAdjacentNameInstance,
+    'Name_Placement_Specification': NamePlacementSpecInstance,
+    'Semantic_Expression': SemanticExpressionInstance,
+    'Stem_Notation': StemNotationInstance,
+    'Stem_Semantic': StemSemanticInstance,
+    'Stem_Position': StemPositionInstance,
+    # Node subsystem
+    'Compartment_Type': CompartmentTypeInstance,
+    'Diagram_Notation': DiagramNotationInstance,
+    'Diagram_Type': DiagramTypeInstance,
+    'Layout_Specification': LayoutSpecificationInstance,
+    'Node_Type': NodeTypeInstance,
+    'Notation': NotationInstance,
+    # Sheet subsystem
+    'Box': BoxInstance,
+    'Box_Placement': BoxPlacementInstance,
+    'Compartment_Box': BoxInstance,
+    'Data_Box': DataBoxInstance,
+    'Divider': DividerInstance,
+    'Envelope_Box': BoxInstance,
+    'Fitted_Frame': FittedFrameInstance,
+    'Frame': FrameInstance,
+    'Framed_Title_Block': FramedTitleBlockInstance,
+    'Free_Field': FreeFieldInstance,
+    'Metadata_Item': MetadataItemInstance,
+    'Partitioned_Box': BoxInstance,
+    'Region': RegionInstance,
+    'Scaled_Title_Block': ScaledTitleBlockInstance,
+    'Section_Box': BoxInstance,
+    'Sheet': SheetInstance,
+    'Sheet_Size_Group': SheetSizeGroupInstance,
+    'Title_Block_Field': TitleBlockFieldInstance,
+    'Title_Block_Pattern': TitleBlockPatternInstance,
+    'Title_Block_Placement': TitleBlockPlacementInstance,
+}
+
+
+def _to_bool(value: str) -> bool:
+    return value.lower() in ('true', '1', 'yes')
+
+
+# TclRAL hands us every value as a string, so we convert according to the instance type annotations
+converters = {int: int, float: float, bool: _to_bool, str: str}
+
+
+class RelvarCache:
+    """
+    Once populated, the Flatland database never changes. But the layout and rendering code needs to look
+    things up in it over and over again, for each node, stem, rut and so on. Each of those lookups would
+    otherwise be a string built restriction evaluated by the Tcl interpreter with the result parsed back out
+    of a string.
+
+    So, right after the database is created, we read each relvar exactly once into a list of typed instance
+    tuples and index them by the relvar's primary identifier. Any other combination of attributes that we
+    select on gets its own index, built the first time it is needed.
+
+    The instances are never changed after loading. The only thing written afterward is a newly built index,
+    and that is built under a lock, so the cache can be read from any thread, as the render server does.
+    """
+    instances = {}  # Relvar name: list of instance tuples
+    indexes = {}  # (Relvar name, sorted attribute names): {attribute values: list of matching instances}
+    index_lock = threading.Lock()  # Held while building an index
+    generation = 0  # Incremented on each load so that anything derived from the cache knows when it is stale
+
+    @classmethod
+    def load(cls):
+        """
+        Read every relvar from the populated Flatland database
+        """
+        cls.instances = {}
+        cls.indexes = {}
+        cls.generation += 1
+        for subsys_relvars in FlatlandSchema.relvars.values():
+            for relvar_name, header in subsys_relvars.items():
+                itype = instance_type[relvar_name]
+                fconverters = {f: converters[t] for f, t in itype.__annotations__.items()}
+                result = Relation.restrict(db=app, relation=relvar_name)
+                cls.instances[relvar_name] = [
+                    itype(**{a: fconverters[a](v) for a, v in t.items()}) for t in result.body
+                ]
+                # Index up front on the primary identifier, which is always the first one defined
+                cls._index(relvar_name, tuple(sorted(header.ids[1])))
+        _logger.info(f"Cached {len(cls.instances)} relvars")
+
+    @classmethod
+    def _index(cls, relvar: str, attrs: tuple[str, ...]) -> dict[tuple, list[NamedTuple]]:
+        """
+        Returns the index of a relvar's instances on the supplied attributes, building it if necessary
+
+        :param relvar: Name of the relvar
+        :param attrs: Attribute names in sorted order
+        :return: Dictionary of attribute value tuples to matching instance lists
+        """
+        index = cls.indexes.get((relvar, attrs))
+        if index is not None:
+            return index
+        with cls.index_lock:
+            # Another thread may have built it while we waited
+            index = cls.indexes.get((relvar, attrs))
+            if index is not None:
+                return index
+            try:
+                instances = cls.instances[relvar]
+            except KeyError:
+                _logger.error(f"Relvar [{relvar}] not cached, has the Flatland database been created?")
+                raise FlatlandDBException
+            index = {}
+            for i in instances:
+                index.setdefault(tuple(getattr(i, a) for a in attrs), []).append(i)
+            # Stored only once complete, so no reader ever sees it half built
+            cls.indexes[relvar, attrs] = index
+        return index
+
+    @classmethod
+    def select(cls, relvar: str, **values) -> list[NamedTuple]:
+        """
+        Returns each instance with the supplied attribute values, equivalent to a restriction on those
+        values, but without a trip through the Tcl interpreter.
+
+        For example: RelvarCache.select('Compartment_Type', Node_type='class', Diagram_type='class')
+
+        :param relvar: Name of the relvar
+        :param values: Attribute name and value pairs to match
+        :return: Matching instances, possibly none
+        """
+        attrs = tuple(sorted(values))
+        return cls._index(relvar, attrs).get(tuple(values[a] for a in attrs), [])
+
+    @classmethod
+    def lookup(cls, relvar: str, **values) -> Optional[NamedTuple]:
+        """
+        Returns the one instance matching the supplied attribute values, typically a full identifier value
+
+        :param relvar: Name of the relvar
+        :param values: Attribute name and value pairs to match
+        :return: The matching instance or None if there isn't one
+        """
+        found = cls.select(relvar, **values)
+        return found[0] if found else None
+
+    @classmethod
+    def all(cls, relvar: str) -> list[NamedTuple]:
+        """
+        Returns all instances of a relvar
+
+        :param relvar: Name of the relvar
+        :return: Every instance in the relvar
+        """
+        return cls.instances[relvar]
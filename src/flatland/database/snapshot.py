@@ -0,0 +1,120 @@
+""" snapshot.py - Save and restore a fully populated Flatland database """
+
+# System
+import logging
+import re
+import hashlib
+from pathlib import Path
+from tkinter import TclError
+
+# Model Integration
+from pyral.database import Database
+
+# Flatland
+from flatland import version
+from flatland.names import app, cache_dir, write_atomic
+from flatland.configuration.configDB import ConfigDB
+from flatland.database.relvars import FlatlandSchema
+
+_logger = logging.getLogger(__name__)
+
+
+def tcl_word(path: Path) -> str:
+    """
+    Returns a file path escaped so that Tcl reads it as a single word
+
+    PyRAL drops the file name straight into a Tcl command, so a space in the cache directory would
+    otherwise split the name in two
+    """
+    return re.sub(r'([\\\s"{}\[\]$;])', r'\\\1', str(path))
+
+
+class DBSnapshot:
+    """
+    A serialized copy of the populated Flatland database
+
+    Building the database means creating every relvar and constraint, reading all of the
+    configuration yaml files and then populating each subsystem. None of that changes from
+    one run to the next unless the user edits a configuration file or a new version of
+    Flatland changes the schema. So we serialize the populated database once and, on later
+    runs, load it back in a single TclRAL operation.
+
+    Each snapshot is stored under a key computed from the snapshot format, the Flatland
+    version, the schema definition and the content of each configuration file. If any of
+    these change we get a new key, so a stale snapshot is never loaded.
+    """
+    # Bump this whenever population logic changes in a way that the schema and config content won't reveal
+    format_version = 1
+
+    snapshot_dir = cache_dir / "db"
+
+    @classmethod
+    def key(cls) -> str:
+        """
+        Computes the key that identifies a snapshot matching the current schema and configuration
+
+        Returns:
+            A hex digest string
+        """
+        h = hashlib.sha256()
+        h.update(f"{cls.format_version}:{version}".encode())
+        h.update(repr(FlatlandSchema.relvars).encode())
+        h.update(repr(FlatlandSchema.rels).encode())
+        for config_file in ConfigDB.config_files():
+            h.update(config_file.name.encode())
+            h.update(config_file.read_bytes())
+        return h.hexdigest()
+
+    @classmethod
+    def path(cls, key: str) -> Path:
+        """
+        Returns the snapshot file path for the supplied key
+        """
+        return cls.snapshot_dir / f"{app}_{key[:16]}.ral"
+
+    @classmethod
+    def load(cls, key: str) -> bool:
+        """
+        Loads the snapshot matching the key into the open Flatland session, if there is one
+
+        Args:
+            key: Snapshot key computed for the current schema and configuration
+
+        Returns:
+            True if the database was loaded, False if it must be built from scratch
+        """
+        snapshot_file = cls.path(key)
+        if not snapshot_file.exists():
+            _logger.info(f"No database snapshot at: {snapshot_file}")
+            return False
+        try:
+            Database.load(db=app, fname=tcl_word(snapshot_file))
+        except TclError as e:
+            # Probably written by some other version of TclRAL or truncated, either way we rebuild it
+            _logger.warning(f"Ignoring unreadable database snapshot: {snapshot_file} [{e}]")
+            # Whatever was partially loaded must not leak into the rebuild, so start over with a fresh session
+            Database.close_session(name=app)
+            Database.open_session(name=app)
+            return False
+        _logger.info(f"Database loaded from snapshot: {snapshot_file}")
+        return True
+
+    @classmethod
+    def save(cls, key: str):
+        """
+        Saves the populated Flatland database under the supplied key and removes any stale snapshots
+
+        Args:
+            key: Snapshot key computed for the current schema and configuration
+        """
+        snapshot_file = cls.path(key)
+        try:
+            write_atomic(snapshot_file, lambda partial_file: Database.save(db=app, fname=tcl_word(partial_file)))
+            for stale_file in cls.snapshot_dir.glob(f"{app}_*.ral"):
+                if stale_file != snapshot_file:
+                    stale_file.unlink(missing_ok=True)
+        except (OSError, TclError) as e:
+            # Not fatal, we'll just have to build the database again next time
+            _logger.warning(f"Could not save database snapshot: {snapshot_file} [{e}]")
+            return
+        _logger.info(f"Database snapshot saved: {snapshot_file}")
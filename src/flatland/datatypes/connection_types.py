@@ -102,6 +102,14 @@ OppositeFace = {
     NodeFace.RIGHT: NodeFace.LEFT
 }
 
+# A stem leaves its node face along x (0) or y (1), ascending (1) or descending (-1)
+StemDirection = {
+    NodeFace.TOP: (1, 1),
+    NodeFace.BOTTOM: (1, -1),
+    NodeFace.RIGHT: (0, 1),
+    NodeFace.LEFT: (0, -1)
+}
+
 StemAngle = {
     NodeFace.TOP: 0,
     NodeFace.BOTTOM: 180,
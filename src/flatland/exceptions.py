@@ -30,6 +30,12 @@ class FlatlandDrawException(FlatlandException):
 class FlatlandUserInputException(FlatlandException):
     pass
 
+class BatchManifestError(FlatlandUserInputException):
+    pass
+
+class RenderRequestError(FlatlandUserInputException):
+    pass
+
 class TabletBoundsExceeded(FlatlandDrawException):
     pass
 
@@ -152,6 +158,15 @@ class LayoutGrammarFileOpen(FlatlandIOException):
     def __str__(self):
         return f'{pre}Parser cannot open this layout grammar file: "{self.path}"{post}'
 
+class OutputConverterUnavailable(FlatlandIOException):
+    def __init__(self, output_format, reason):
+        self.output_format = output_format
+        self.reason = reason
+
+    def __str__(self):
+        return (f'{pre}Cannot write {self.output_format} output without cairosvg and the cairo library it uses:'
+                f' {self.reason}{post}')
+
 class LayoutFileEmpty(FlatlandIOException):
     def __init__(self, path):
         self.path = path
@@ -0,0 +1,96 @@
+"""
+boundaries.py
+
+The ascending boundaries of the rows or columns of a Grid
+
+"""
+# System
+from typing import Iterable, Iterator, Union, List
+
+# Model Integration
+import numpy as np
+
+
+class Boundaries:
+    """
+    A Grid starts with a single boundary and then grows a row or column at a time, and each time a node
+    doesn't fit in its cell, every boundary above or right of that cell moves out. Kept as a Python list,
+    each move rebuilt the whole list, once for each row or column a node spans.
+
+    Here the boundaries are kept in a float64 array with room to grow, so that adding a lane appends in
+    place and moving the boundaries beyond a lane is one vectorized addition to a slice of the array, done
+    in place. Each boundary receives the same additions in the same order as it did in the list, and a
+    float64 addition gives the same value as a Python float addition, so nodes and connectors land on
+    exactly the same coordinates.
+
+    A boundary that has only ever had whole numbers of points added to it was a Python int in the list and
+    is drawn without a decimal, so alongside each position we keep whether it is still whole and hand it
+    out as an int if so.
+
+    Boundaries otherwise behave as the ascending list of positions they replace, boundary 0 being the origin
+    edge of the first lane and boundary n the far edge of lane n. A lane is numbered from 1, like a Grid
+    row or column, so lane n lies between boundaries n-1 and n.
+    """
+    initial_capacity = 64
+
+    def __init__(self, boundaries: Iterable[float] = (0,)):
+        """
+        Constructor
+
+        :param boundaries: Ascending positions, the first one being the origin
+        """
+        positions = list(boundaries)
+        assert positions, "A grid always has an origin boundary"
+        capacity = max(self.initial_capacity, 2 * len(positions))
+        self._positions = np.zeros(capacity)
+        self._whole = np.zeros(capacity, dtype=bool)  # Only whole numbers have been added to the boundary
+        self._count = 0
+        for p in positions:
+            self.append(p)
+
+    def add(self, extent: float):
+        """Adds a lane of the given extent beyond the last boundary"""
+        self.append(self[-1] + extent)
+
+    def append(self, boundary: float):
+        """Adds a lane ending at the given boundary"""
+        if self._count == len(self._positions):
+            self._positions = np.concatenate((self._positions, np.zeros(len(self._positions))))
+            self._whole = np.concatenate((self._whole, np.zeros(len(self._whole), dtype=bool)))
+        self._positions[self._count] = boundary
+        self._whole[self._count] = isinstance(boundary, int)
+        self._count += 1
+
+    def expand(self, start_boundary: int, expansion: float):
+        """
+        Pushes out every boundary from start_boundary onward by expansion, widening lane start_boundary
+
+        :param start_boundary: Number of the first boundary to move, 1 or more
+        :param expansion: Distance to move each boundary
+        """
+        assert 0 < start_boundary < self._count, "Boundary out of range"
+        self._positions[start_boundary:self._count] += expansion
+        if not isinstance(expansion, int):
+            self._whole[start_boundary:self._count] = False
+
+    def _value(self, index: int) -> float:
+        position = self._positions[index].item()
+        return int(position) if self._whole[index] else position
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[float, List[float]]:
+        if isinstance(index, slice):
+            return [self._value(i) for i in range(self._count)[index]]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Boundary index out of range")
+        return self._value(index)
+
+    def __iter__(self) -> Iterator[float]:
+        return (self._value(i) for i in range(self._count))
+
+    def __repr__(self):
+        return repr(list(self))
@@ -6,12 +6,6 @@ This makes it possible to apply the same type of logic to horizontal and vertica
 the need to differentiate between the two.
 
 """
-# System
-from typing import Set
-
-# Flatland
-from flatland.datatypes.geometry_types import Position
-
 scale = 2  # For float rounding errors (change to 3 or 4 if errors are visible on drawings)
 
 # Tolerance, in points, for treating a parallel segment as overlapping a point along the extent axis.
@@ -20,44 +14,6 @@ scale = 2  # For float rounding errors (change to 3 or 4 if errors are visible o
 # rather than fail. A few points is visually negligible and absorbs this drift.
 extent_overlap_tolerance = 3
 
-def nearest_parallel_segment(psegs: Set[tuple], point: Position, ascending: bool) -> float:
-    """
-    Given a set of parallel segments a point and a +/- direction, find the segment that yields the
-    shortest perpendicular segment in the indicated direction to the point. If the parallel segments
-    are vertical, each will share the same x value, y otherwise. This shared value represents the segment
-    axis. Distance from the axis to the point is relative to the corresponding coordinate. Thus the
-    distance from the point's x coordinate is measured relative to each segment x if the segments are vertical.
-    
-    :param psegs: Set of parallel segments
-    :param point: Find perpendicular segment to this point
-    :param ascending: If true, each parallel segment axis is higher than the point x or y coordinate
-    :return: x if vertical segs or or y if horizontal of closest intersecting parallel segment
-    """
-    s = list(psegs)[0]  # Select arbitary segment so we can determine axis orientation (they must all be the same)
-    vertical_axis = (s[0].x == s[1].x)  # If two x's in a segment are the same, it's a vertical segmenet
-    # Establish the axis and extend coordinates based on orientation
-    # 0 and 1 are indices that match the x and y components of the Position tuple that defines each point
-    axis_coord, extent_coord = (0,1) if vertical_axis else (1,0)  # So basically, swap 'x' and 'y' based on orientation
-    if ascending:
-        # Facing segs are those less than the point's axis coordinate (to the left or below the point)
-        fsegs = [s for s in psegs if s[0][axis_coord] > point[axis_coord]]
-    else:
-        # Facing segs are greater (above or the right)  Remember we assume Cartesian coordinates throughout
-        fsegs = [s for s in psegs if s[0][axis_coord] < point[axis_coord]]
-    isegs = []  # Those segments that overlap the point along the axis (so that a normal segment will intersect)
-    for s in fsegs:
-        a, b = sorted([s[0][extent_coord], s[1][extent_coord]])  # Order all segment extents along axis low to high
-        # Allow a small tolerance so sub-point drift in node positions still counts as an overlap
-        if a - extent_overlap_tolerance <= point[extent_coord] <= b + extent_overlap_tolerance:
-            isegs.append(s)  # It's possible to intersect the point from this segment
-    if ascending:  # Now select the closest axis value to the point
-        axis_value = min({s[0][axis_coord] for s in isegs})
-    else:
-       axis_value = max({s[0][axis_coord] for s in isegs})
-    return axis_value
-
-
-
 def step_edge_distance(num_of_steps: int, extent: float, step: int):
     """
     You have a line segment with a given extent (length). In distance coordinates such as points, 0 is at the
@@ -130,17 +86,3 @@ def align_on_axis(axis_alignment: int, boundaries, from_grid_unit, to_grid_unit,
     else:
         return from_padding + boundaries[from_grid_unit -1]
 
-
-if __name__ == "__main__":
-    segs = {
-        (Position(1,0), Position(1,15)),
-        (Position(5, 15), Position(5, 25)),
-        (Position(10, 7), Position(10, 25)),
-        (Position(12, 2), Position(12, 11)),
-        (Position(13, 20), Position(13, 29)),
-        (Position(20, 7), Position(20, 17)),
-        (Position(25, 20), Position(25, 32)),
-        (Position(30, 7), Position(30, 27)),
-    }
-    v = nearest_parallel_segment(psegs=segs, point=Position(15,17), ascending=False)
-    print(v)
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+segment_index.py
+
+The horizontal and vertical line segments drawn for the connectors of a Grid, indexed by position
+
+"""
+# System
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Optional, List, Tuple, Iterable, Any
+
+# Flatland
+from flatland.datatypes.geometry_types import Position
+from flatland.datatypes.connection_types import Orientation
+from flatland.geometry_domain.linear_geometry import extent_overlap_tolerance
+
+
+class IndexedSegment(NamedTuple):
+    axis: float  # The y shared by both ends of a horizontal segment or the x of a vertical segment
+    low: float  # Lower end along the segment, its leftmost x or lowest y
+    high: float  # Upper end along the segment
+    owner: Any  # Whatever drew the segment, a Connector, for example
+
+    def covers(self, extent: float, tolerance: float = 0) -> bool:
+        """True if the segment overlaps the given position along its length"""
+        return self.low - tolerance <= extent <= self.high + tolerance
+
+
+class AxisOrder:
+    """
+    Segments of one orientation in axis order and, among those sharing an axis, in the order they were added
+
+    Segments are appended as they are added and sorted only when next asked for, so adding a segment takes
+    constant time. Connector paths are mostly added in axis order already, which Python's sort handles in
+    little more than a pass over the list.
+    """
+
+    def __init__(self):
+        self.Segments = []
+        self.Axes = []  # Axis value of each segment, kept alongside for bisection
+        self.Ordered = True
+
+    def add(self, segment: IndexedSegment):
+        if self.Axes and segment.axis < self.Axes[-1]:
+            self.Ordered = False
+        self.Segments.append(segment)
+        self.Axes.append(segment.axis)
+
+    def ordered(self) -> Tuple[List[float], List[IndexedSegment]]:
+        """
+        Returns the axis values and the segments in axis order
+        """
+        if not self.Ordered:
+            self.Segments.sort(key=lambda s: s.axis)  # Stable, so segments sharing an axis stay in add order
+            self.Axes = [s.axis for s in self.Segments]
+            self.Ordered = True
+        return self.Axes, self.Segments
+
+    def __len__(self) -> int:
+        return len(self.Segments)
+
+
+class SegmentIndex:
+    """
+    Every horizontal and every vertical connector segment is kept in axis order, once among all segments
+    and again among those of its owner, so that any segment near a given point is found by bisection rather
+    than by checking every segment drawn. That serves the three questions a diagram asks of its connectors:
+    which segment of its own connector does a stem meet first heading away from its node face, which
+    segments does a line cross, and which segments share a line and overlap.
+
+    Adding a segment takes constant time and each list is sorted when it is next queried. A query then
+    bisects to the segments on or beyond its axis value and scans from there, so it takes O(log n) plus
+    the segments passed over: for nearest_parallel those of the owner that lie beyond the point without
+    covering it, for crossings those within the line's extent along the other axis.
+
+    Anything that is neither horizontal nor vertical is not indexed, and neither are the branches of
+    tree connectors, so crossings and overlaps don't yet see every line drawn.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+
+        - Segments -- Horizontal and vertical segments, each in axis order
+        - Owned -- Horizontal and vertical segments of each owner, each in axis order, by owner id
+        """
+        self.Segments = {Orientation.Horizontal: AxisOrder(), Orientation.Vertical: AxisOrder()}
+        self.Owned = {}
+
+    @staticmethod
+    def measure(from_here: Position, to_there: Position) -> Optional[tuple]:
+        """
+        Orientation, axis value and extent of a segment
+
+        :return: Orientation, axis, low and high ends, None if the segment is neither horizontal nor vertical
+        """
+        if from_here.y == to_there.y:
+            return Orientation.Horizontal, from_here.y, *sorted((from_here.x, to_there.x))
+        if from_here.x == to_there.x:
+            return Orientation.Vertical, from_here.x, *sorted((from_here.y, to_there.y))
+        return None
+
+    def add(self, from_here: Position, to_there: Position, owner: Any = None):
+        """
+        Adds a segment
+
+        :param from_here: One end
+        :param to_there: Other end
+        :param owner: Whatever drew the segment
+        """
+        measured = self.measure(from_here, to_there)
+        if not measured:
+            return
+        orientation, axis_value, low, high = measured
+        segment = IndexedSegment(axis=axis_value, low=low, high=high, owner=owner)
+        self.Segments[orientation].add(segment)
+        owned = self.Owned.get(id(owner))
+        if owned is None:
+            owned = self.Owned[id(owner)] = {Orientation.Horizontal: AxisOrder(), Orientation.Vertical: AxisOrder()}
+        owned[orientation].add(segment)
+
+    def add_path(self, points: Iterable[Position], owner: Any = None):
+        """
+        Adds each segment of a path
+
+        :param points: Ends of each segment in path order
+        :param owner: Whatever drew the path
+        """
+        points = list(points)
+        for from_here, to_there in zip(points, points[1:]):
+            self.add(from_here=from_here, to_there=to_there, owner=owner)
+
+    def nearest_parallel(self, point: Position, orientation: Orientation, ascending: bool, owner: Any = None,
+                         tolerance: float = extent_overlap_tolerance) -> Optional[float]:
+        """
+        Finds the closest parallel segment that a perpendicular line from the point meets heading up or right
+        (ascending) or down or left
+
+        A segment counts if the point lies along its extent, give or take the tolerance, so that sub point
+        drift in node positions still lets a stem meet the segment it was laid out to meet.
+
+        :param point: Line starts here
+        :param orientation: Of the segments to look for
+        :param ascending: Look above or to the right of the point rather than below or left
+        :param owner: Only consider the segments of this owner, if any
+        :param tolerance: Extra extent allowed at either end of each segment
+        :return: The axis value (y if horizontal, x if vertical) of the closest segment, None if none is met
+        """
+        axis_value, extent = (point.y, point.x) if orientation == Orientation.Horizontal else (point.x, point.y)
+        if owner is None:
+            axes, segments = self.Segments[orientation].ordered()
+        elif id(owner) in self.Owned:
+            axes, segments = self.Owned[id(owner)][orientation].ordered()
+        else:
+            return None
+        if ascending:
+            candidates = range(bisect_right(axes, axis_value), len(segments))
+        else:
+            candidates = range(bisect_left(axes, axis_value) - 1, -1, -1)
+        for i in candidates:
+            s = segments[i]
+            if s.covers(extent, tolerance):
+                return s.axis
+        return None
+
+    def crossings(self, from_here: Position, to_there: Position) -> List[IndexedSegment]:
+        """
+        Finds the perpendicular segments that a horizontal or vertical segment touches or crosses
+
+        :param from_here: One end
+        :param to_there: Other end
+        :return: Each perpendicular segment met, in axis order
+        """
+        measured = self.measure(from_here, to_there)
+        if not measured:
+            return []
+        orientation, axis_value, low, high = measured
+        crossing = Orientation.Vertical if orientation == Orientation.Horizontal else Orientation.Horizontal
+        axes, segments = self.Segments[crossing].ordered()
+        return [s for s in segments[bisect_left(axes, low):bisect_right(axes, high)] if s.covers(axis_value)]
+
+    def overlaps(self, from_here: Position, to_there: Position) -> List[IndexedSegment]:
+        """
+        Finds the segments lying along the same line as a horizontal or vertical segment that share more
+        than an end point with it
+
+        :param from_here: One end
+        :param to_there: Other end
+        :return: Each overlapping segment in the order added
+        """
+        measured = self.measure(from_here, to_there)
+        if not measured:
+            return []
+        orientation, axis_value, low, high = measured
+        axes, segments = self.Segments[orientation].ordered()
+        return [s for s in segments[bisect_left(axes, axis_value):bisect_right(axes, axis_value)]
+                if s.low < high and low < s.high]
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self.Segments.values())
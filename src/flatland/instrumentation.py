@@ -0,0 +1,181 @@
+""" instrumentation.py - Time each stage of drawing a diagram """
+
+# System
+import os
+import sys
+import json
+import time
+import cProfile
+import logging
+import threading
+import contextlib
+from pathlib import Path
+from typing import NamedTuple, Optional, TextIO
+
+_logger = logging.getLogger(__name__)
+
+
+class Span(NamedTuple):
+    """ The time spent in one stage """
+    stage: str
+    detail: Optional[str]  # Which item the stage worked on, such as a connector name
+    start: float  # Performance counter seconds
+    seconds: float
+    depth: int  # Number of enclosing spans on the same thread
+    pid: int
+    thread: int
+
+
+class SpanTimer:
+    """ Records a Span for the code it encloses """
+    __slots__ = ('stage', 'detail', 'start', 'depth')
+
+    def __init__(self, stage: str, detail: Optional[str]):
+        self.stage = stage
+        self.detail = detail
+
+    def __enter__(self):
+        local = Instrumentation.local
+        self.depth = getattr(local, 'depth', 0)
+        local.depth = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        Instrumentation.local.depth = self.depth
+        Instrumentation.record(Span(stage=self.stage, detail=self.detail, start=self.start, seconds=seconds,
+                                    depth=self.depth, pid=os.getpid(), thread=threading.get_ident()))
+        return False
+
+
+class Instrumentation:
+    """
+    Collects the time spent in each stage of a run: database setup, parsing, canvas creation, node and
+    connector layout and rendering. The stages are marked in the code with span() and cost nothing
+    beyond a flag check unless instrumentation has been enabled.
+
+    Once the run is over the spans can be summarized as a table of stages or saved in the Chrome trace
+    event format to be viewed on a timeline in chrome://tracing or https://ui.perfetto.dev
+    """
+    enabled = False
+    spans = []
+    started = None  # Performance counter seconds when enabled
+    local = threading.local()  # Span depth of each thread
+    lock = threading.Lock()
+    no_span = contextlib.nullcontext()
+
+    @classmethod
+    def enable(cls):
+        cls.enabled = True
+        cls.started = time.perf_counter()
+
+    @classmethod
+    def span(cls, stage: str, detail: Optional[str] = None):
+        """
+        Returns a context manager timing the enclosed code as a stage of the run
+
+        :param stage: Stage name, the same for each repetition of the stage
+        :param detail: The item being worked on in this repetition, if any
+        """
+        return SpanTimer(stage, detail) if cls.enabled else cls.no_span
+
+    @classmethod
+    def record(cls, span: Span):
+        with cls.lock:
+            cls.spans.append(span)
+
+    @classmethod
+    def drain(cls) -> list[Span]:
+        """
+        Removes and returns every span recorded so far, so another process can add them to its own
+        """
+        with cls.lock:
+            spans, cls.spans = cls.spans, []
+        return spans
+
+    @classmethod
+    def extend(cls, spans: list[Span]):
+        with cls.lock:
+            cls.spans.extend(spans)
+
+    @classmethod
+    def report(cls, out: TextIO = sys.stdout):
+        """
+        Prints the time spent in each stage in the order the stages were first entered. Stages within
+        other stages are indented beneath them.
+        """
+        wall = time.perf_counter() - cls.started if cls.started is not None else 0
+        stages = {}
+        for s in sorted(cls.spans, key=lambda s: s.start):
+            entry = stages.setdefault(s.stage, {'count': 0, 'total': 0.0, 'max': 0.0, 'depth': s.depth})
+            entry['count'] += 1
+            entry['total'] += s.seconds
+            entry['max'] = max(entry['max'], s.seconds)
+            entry['depth'] = min(entry['depth'], s.depth)
+        width = max([len(stage) + 2 * e['depth'] for stage, e in stages.items()] + [len('Stage')])
+        print(f"{'Stage':<{width}} {'Count':>6} {'Total ms':>10} {'Mean ms':>9} {'Max ms':>9} {'% of run':>9}",
+              file=out)
+        for stage, e in stages.items():
+            name = '  ' * e['depth'] + stage
+            share = f"{100 * e['total'] / wall:8.1f}%" if wall else ''
+            print(f"{name:<{width}} {e['count']:>6} {e['total'] * 1000:>10.1f} {e['total'] * 1000 / e['count']:>9.2f}"
+                  f" {e['max'] * 1000:>9.2f} {share:>9}", file=out)
+        print(f"{'Run':<{width}} {'':>6} {wall * 1000:>10.1f}", file=out)
+
+    @classmethod
+    def save_trace(cls, trace_file: Path):
+        """
+        Saves the spans as Chrome trace events
+        """
+        origin = min([s.start for s in cls.spans] + ([cls.started] if cls.started is not None else []), default=0)
+        events = []
+        for s in cls.spans:
+            event = {'name': s.stage, 'cat': 'flatland', 'ph': 'X', 'ts': round((s.start - origin) * 1e6, 1),
+                     'dur': round(s.seconds * 1e6, 1), 'pid': s.pid, 'tid': s.thread}
+            if s.detail:
+                event['args'] = {'detail': s.detail}
+            events.append(event)
+        try:
+            trace_file.write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}))
+        except OSError as e:
+            _logger.error(f"Could not save trace: {trace_file} [{e}]")
+            return
+        print(f"Trace saved: {trace_file}")
+
+
+class RunProfile:
+    """
+    Instruments a whole run as requested on the command line, reporting when the process exits
+    """
+
+    def __init__(self, table: bool, trace_file: Optional[Path], cprofile_file: Optional[Path]):
+        """
+        :param table: Print the time spent in each stage
+        :param trace_file: Save Chrome trace events here
+        :param cprofile_file: Profile every function call with cProfile and save the stats here
+        """
+        self.Table = table
+        self.Trace_file = trace_file
+        self.Cprofile_file = cprofile_file
+        self.Profiler = None
+
+    def start(self):
+        if self.Table or self.Trace_file:
+            Instrumentation.enable()
+        if self.Cprofile_file:
+            self.Profiler = cProfile.Profile()
+            self.Profiler.enable()
+
+    def finish(self):
+        if self.Profiler:
+            self.Profiler.disable()
+            try:
+                self.Profiler.dump_stats(self.Cprofile_file)
+                print(f"Profile saved: {self.Cprofile_file}, view it with: python -m pstats {self.Cprofile_file}")
+            except OSError as e:
+                _logger.error(f"Could not save profile: {self.Cprofile_file} [{e}]")
+        if self.Table:
+            Instrumentation.report()
+        if self.Trace_file:
+            Instrumentation.save_trace(self.Trace_file)
@@ -1,3 +1,35 @@
 """ names.py - Global names """
 
+# System
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Union
+
 app = 'flatland'  # Name of our application, used to specify client name to services
+
+# Derived data that we can always regenerate (database snapshots and such) goes here, never in the config dir
+cache_dir = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / app
+
+
+def write_atomic(path: Path, data: Union[bytes, Callable[[Path], None]]):
+    """
+    Writes a file so that no other thread or process ever sees it partly written
+
+    The data goes to a private file in the same directory first which then replaces the target in one step.
+    Creates the directory if need be.
+
+    :param path: The file to write
+    :param data: The file's contents, or a function that writes them to the path it is given
+    :raises OSError: If the file could not be written, in which case the target is left as it was
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial_file = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if callable(data):
+            data(partial_file)
+        else:
+            partial_file.write_bytes(data)
+        partial_file.replace(path)
+    finally:
+        partial_file.unlink(missing_ok=True)
@@ -9,15 +9,16 @@ from pathlib import Path
 # Model Integration
 from tabletsvg.tablet import Tablet, Rect_Size, Position
 from tabletsvg.graphics.line_segment import LineSegment
-from pyral.relation import Relation
 
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
+from flatland.instrumentation import Instrumentation
 from flatland.exceptions import InvalidOrientation, NonSystemInitialLayer
 # from flatland.diagram.diagram_layout_specification import DiagramLayoutSpecification
 # from flatland.connector_subsystem.connector_layout_specification import ConnectorLayoutSpecification
 from flatland.datatypes.geometry_types import Rect_Size, Padding
 from flatland.node_subsystem.diagram import Diagram
+from flatland.node_subsystem.output_formats import OutputFormats
 from flatland.sheet_subsystem.sheet import Sheet
 
 # from flatland.decoration_subsystem.symbol import Symbol
@@ -89,15 +90,13 @@ class Canvas:
             height=int(round(h * factor)),
             width=int(round(w * factor))
         )
-        R = f"Name:<{'standard'}>"
-        result = Relation.restrict(db=app, relation='Layout_Specification', restriction=R)
-        lspec = result.body[0]
+        lspec = RelvarCache.lookup('Layout_Specification', Name='standard')
 
         self.Margin = Padding(
-            top=int(lspec['Default_margin_top']),
-            bottom=int(lspec['Default_margin_bottom']),
-            left=int(lspec['Default_margin_left']),
-            right=int(lspec['Default_margin_right']),
+            top=lspec.Default_margin_top,
+            bottom=lspec.Default_margin_bottom,
+            left=lspec.Default_margin_left,
+            right=lspec.Default_margin_right,
         )
         self.Color = color
 
@@ -111,15 +110,16 @@ class Canvas:
                 notation[0].islower() and notation[1].isupper()) else notation
         dtype = f"{ntitle} {diagram_type} diagram"
         try:
-            self.Tablet = Tablet(
-                size=self.Size, output_file=drawoutput,
-                # Drawing types include notation such as 'xUML class diagram' since notation affects the choice
-                # of shape and text styles.  An xUML class diagram association class stem is dashed, for example.
-                drawing_type=dtype,
-                presentation=presentation,
-                layer='diagram',
-                background_color=background_color
-            )
+            with Instrumentation.span("tablet setup"):
+                self.Tablet = Tablet(
+                    size=self.Size, output_file=drawoutput,
+                    # Drawing types include notation such as 'xUML class diagram' since notation affects the choice
+                    # of shape and text styles.  An xUML class diagram association class stem is dashed, for example.
+                    drawing_type=dtype,
+                    presentation=presentation,
+                    layer='diagram',
+                    background_color=background_color
+                )
         except NonSystemInitialLayer:
             self.logger.exception("Initial layer [diagram] not found in Tablet layer order")
             sys.exit(1)
@@ -179,12 +179,14 @@ class Canvas:
         Draw all content of this Canvas onto the Tablet
         """
         # Now add all Diagram content to the Tablet
-        self.Diagram.render()
+        with Instrumentation.span("canvas render"):
+            self.Diagram.render()
+            if self.show_rulers:
+                self.draw_rulers()
 
         # Draw all added content and output a PDF using whatever graphics library is configured in the Tablet
-        if self.show_rulers:
-            self.draw_rulers()
-        self.Tablet.render()
+        with Instrumentation.span("tablet render"):
+            OutputFormats.render(self.Tablet)
 
     def __repr__(self):
         return f'Canvas(diagram_type={self.Diagram.Diagram_type}, layer={self.Diagram.Layer},' \
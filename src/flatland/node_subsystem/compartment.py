@@ -1,7 +1,8 @@
 """ compartment.py """
 
 # System
-from typing import TYPE_CHECKING, List, Dict, NamedTuple
+from functools import cached_property
+from typing import TYPE_CHECKING, List, NamedTuple
 
 if TYPE_CHECKING:
     from flatland.node_subsystem.node import Node
@@ -12,8 +13,10 @@ from tabletsvg.graphics.rectangle_se import RectangleSE
 from tabletsvg.geometry_types import HorizAlign, VertAlign
 
 # Flatland
+from flatland.text.text_metrics import TextMetrics
 from flatland.datatypes.geometry_types import Rect_Size, Position, Alignment, Padding
 from flatland.datatypes.command_interface import New_Compartment
+from flatland.database.instances.node_subsystem import CompartmentTypeInstance
 
 
 class CompartmentType(NamedTuple):
@@ -35,7 +38,7 @@ class Compartment:
         - Text style -- Font, size, etc of text
     """
 
-    def __init__(self, node: 'Node', ctype: Dict[str, str], spec: New_Compartment):
+    def __init__(self, node: 'Node', ctype: CompartmentTypeInstance, spec: New_Compartment):
         """
         Constructor
 
@@ -45,28 +48,28 @@ class Compartment:
         :param expansion: After fitting text, expand the height of this node by this factor
         """
         self.Type = CompartmentType(
-            name=ctype['Name'],
-            alignment=Alignment(vertical=VertAlign[ctype['Alignment_v'].upper()],
-                                horizontal=HorizAlign[ctype['Alignment_h'].upper()]),
+            name=ctype.Name,
+            alignment=Alignment(vertical=VertAlign[ctype.Alignment_v.upper()],
+                                horizontal=HorizAlign[ctype.Alignment_h.upper()]),
             padding=Padding(
-                top=int(ctype['Padding_top']),
-                bottom=int(ctype['Padding_bottom']),
-                left=int(ctype['Padding_left']),
-                right=int(ctype['Padding_right']),
+                top=ctype.Padding_top,
+                bottom=ctype.Padding_bottom,
+                left=ctype.Padding_left,
+                right=ctype.Padding_right,
             ),
-            stack_order=int(ctype['Stack_order'])
+            stack_order=ctype.Stack_order
         )
         self.Node = node
         self.Content = spec.content  # list of text lines
         self.Expansion = spec.expansion
 
-    @property
+    @cached_property
     def Text_block_size(self) -> Rect_Size:
         """Compute the size of the text block with required internal compartment padding"""
         dlayer = self.Node.Grid.Diagram.Layer
         asset = f"{self.Node.Node_type_name} {self.Type.name}"
         # asset = ' '.join([self.Node.Node_type_name, self.Type.name])
-        unpadded_text_size = TextElement.text_block_size(presentation=dlayer.Presentation, asset=asset,
+        unpadded_text_size = TextMetrics.text_block_size(presentation=dlayer.Presentation, asset=asset,
                                                          text_block=self.Content)
 
         # Now add the padding specified for this compartment type
@@ -74,7 +77,7 @@ class Compartment:
         padded_text_height = unpadded_text_size.height + self.Type.padding.top + self.Type.padding.bottom
         return Rect_Size(width=padded_text_width, height=padded_text_height)
 
-    @property
+    @cached_property
     def Size(self) -> Rect_Size:
         """Compute the size of the visible border"""
         # Width matches the node width and the height is the full text block size
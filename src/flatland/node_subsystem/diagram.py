@@ -4,11 +4,8 @@ diagram.py
 # System
 import logging
 
-# Model Integration
-from pyral.relation import Relation
-
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import NotationUnsupportedForDiagramType
 from flatland.datatypes.geometry_types import Position, Rect_Size
 from flatland.node_subsystem.grid import Grid
@@ -50,9 +47,7 @@ class Diagram:
         self.Layer = self.Canvas.Tablet.layers['diagram']
 
         # Validate notation for this diagram type
-        R = f"Diagram_type:<{diagram_type_name}>, Notation:<{notation_name}>"
-        result = Relation.restrict(db=app, relation='Diagram_Notation', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Diagram_Notation', Diagram_type=diagram_type_name, Notation=notation_name):
             self.logger.exception(f"Notation {notation_name} not defined for Diagram Type {diagram_type_name}")
             raise NotationUnsupportedForDiagramType
         self.Notation = notation_name
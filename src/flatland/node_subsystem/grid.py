@@ -5,22 +5,23 @@ grid.py
 import sys
 import logging
 from itertools import product
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Tuple
 
 if TYPE_CHECKING:
     from flatland.node_subsystem.diagram import Diagram
 
 # Model Integration
-from pyral.relation import Relation
 from tabletsvg.graphics.line_segment import LineSegment
 from tabletsvg.graphics.text_element import TextElement
 from tabletsvg.graphics.rectangle_se import RectangleSE
 from tabletsvg.exceptions import TabletBoundsExceeded
 
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import FlatlandDBException, CellOccupiedFE
-from flatland.geometry_domain.linear_geometry import expand_boundaries, span, step_edge_distance
+from flatland.geometry_domain.linear_geometry import span, step_edge_distance
+from flatland.geometry_domain.boundaries import Boundaries
+from flatland.geometry_domain.segment_index import SegmentIndex
 from flatland.datatypes.geometry_types import Padding, Alignment, VertAlign, HorizAlign, Position
 from flatland.node_subsystem.spanning_node import SpanningNode
 from flatland.node_subsystem.single_cell_node import SingleCellNode
@@ -66,6 +67,11 @@ class Grid:
     cplace coordinate. The Grid then extends by the necessary (if any) Rows and Columns to create a place
     to position the Node.
 
+    Layout proceeds in two phases. Nodes are first added to the Grid without being placed. Once every Node
+    has been added, the Grid is solved: each Node is placed, sizing the Rows and Columns, and any Rows and
+    Columns that connectors will run along are added. Only then are connectors laid out, so the Grid
+    doesn't change under them and every Node position they attach to is final.
+
         Attributes
 
         - Cell_padding -- Distances from cell to drawn node boundaries
@@ -76,35 +82,46 @@ class Grid:
         """
         Constructor
 
-        - Cells -- 2D array of Nodes, initially empty
+        - Cells -- Node occupying each cell by (row, column), empty cells are left out
         - Nodes -- All the nodes on the grid in cplace order
+        - Unplaced -- Nodes added to the grid and not yet placed, in cplace order
         - Row_boundaries -- Floor y of each row ascending upward
         - Col_boundaries -- Left side x of each column, ascending rightward
+        - Segments -- Horizontal and vertical line segments laid out for the connectors
+        - Boundary_version -- Incremented whenever any row or column boundary moves so that Nodes know
+          when their cached Canvas positions are stale
 
         :param diagram:  Reference to the Diagram
         """
         self.logger = logging.getLogger(__name__)
-        self.Cells = []  # No rows or columns in grid yet
+        self.Cells = {}  # No nodes in grid yet
         self.Nodes = []  # No nodes in the grid yet
+        self.Unplaced = []
         self.Connectors = []
-        self.Row_boundaries = [0]
-        self.Col_boundaries = [0]
+        self.Segments = SegmentIndex()
+        self.Boundary_version = 0
+        self._row_boundaries = Boundaries()
+        self._col_boundaries = Boundaries()
 
-        R = f"Name:<{'standard'}>"
-        result = Relation.restrict(db=app, relation='Layout_Specification', restriction=R)
-        if not result.body:
+        layout_spec = RelvarCache.lookup('Layout_Specification', Name='standard')
+        if not layout_spec:
             self.logger.error(f"No Layout Specification in Flatland DB.")
             raise FlatlandDBException()
-        layout_spec = result.body[0]
+
+        # Connector layout specification values used to compute ruts and add lanes
+        self.Connector_layout = RelvarCache.lookup('Connector_Layout_Specification', Name='standard')
+        if not self.Connector_layout:
+            self.logger.error("Cannot load Connector Layout Specification from Flatland DB")
+            raise FlatlandDBException
 
         self.Cell_padding = Padding(
-            top=int(layout_spec['Default_margin_top']),
-            bottom=int(layout_spec['Default_margin_bottom']),
-            left=int(layout_spec['Default_margin_left']),
-            right=int(layout_spec['Default_margin_right']),
+            top=layout_spec.Default_margin_top,
+            bottom=layout_spec.Default_margin_bottom,
+            left=layout_spec.Default_margin_left,
+            right=layout_spec.Default_margin_right,
         )
-        v_align = VertAlign[layout_spec['Default_cell_alignment_v'].upper()]
-        h_align = HorizAlign[layout_spec['Default_cell_alignment_h'].upper()]
+        v_align = VertAlign[layout_spec.Default_cell_alignment_v.upper()]
+        h_align = HorizAlign[layout_spec.Default_cell_alignment_h.upper()]
         self.Cell_alignment = Alignment(
             vertical=v_align,
             horizontal=h_align
@@ -112,6 +129,34 @@ class Grid:
         self.Diagram = diagram
         self.Show = show
 
+    @property
+    def Row_boundaries(self) -> Boundaries:
+        return self._row_boundaries
+
+    @Row_boundaries.setter
+    def Row_boundaries(self, boundaries: list[float]):
+        self._row_boundaries = Boundaries(boundaries)
+        self.Boundary_version += 1
+
+    @property
+    def Col_boundaries(self) -> Boundaries:
+        return self._col_boundaries
+
+    @Col_boundaries.setter
+    def Col_boundaries(self, boundaries: list[float]):
+        self._col_boundaries = Boundaries(boundaries)
+        self.Boundary_version += 1
+
+    def expand_row(self, row: int, expansion: float):
+        """Raises the ceiling of a row by expansion, along with every row above it"""
+        self.Row_boundaries.expand(start_boundary=row, expansion=expansion)
+        self.Boundary_version += 1
+
+    def expand_column(self, column: int, expansion: float):
+        """Moves the right side of a column out by expansion, along with every column right of it"""
+        self.Col_boundaries.expand(start_boundary=column, expansion=expansion)
+        self.Boundary_version += 1
+
     def __repr__(self):
         return f'Cells: {self.Cells}, Row boundaries: {self.Row_boundaries}, Col boundaries: {self.Col_boundaries}' \
                f'Cell padding: {self.Cell_padding}, Cell alignment: {self.Cell_alignment}'
@@ -134,14 +179,8 @@ class Grid:
             low_boundary = self.Col_boundaries[lane - 1]
             lane_width = self.Col_boundaries[lane] - low_boundary
 
-        R = f"Name:<standard>"
-        result = Relation.restrict(db=app, relation='Connector_Layout_Specification', restriction=R)
-        if not result:
-            self.logger.exception("Cannot load Connector Layout Specification from Flatland DB")
-            raise FlatlandDBException
-        default_rut_positions=int(result.body[0]['Default_rut_positions'])
         return origin_offset + low_boundary + step_edge_distance(
-            num_of_steps=default_rut_positions, extent=lane_width, step=rut)
+            num_of_steps=self.Connector_layout.Default_rut_positions, extent=lane_width, step=rut)
 
     def render(self):
         """
@@ -196,6 +235,27 @@ class Grid:
         # Draw connectors
         [c.render() for c in self.Connectors]
     #
+    def add_node(self, node):
+        """Adds a node to be placed when the grid is solved"""
+        self.Unplaced.append(node)
+
+    def solve(self, lanes: Iterable[Tuple[int, Orientation]] = ()):
+        """
+        Places each node added since the grid was last solved, sizing the rows and columns to fit them,
+        and then adds any rows or columns beyond them that connectors will run along
+
+        :param lanes: Each row or column number along with its orientation that some connector runs along
+        """
+        unplaced, self.Unplaced = self.Unplaced, []
+        for node in unplaced:
+            node.place()
+        # Lanes beyond the outermost node are all added at their default size, so only the outermost counts
+        outermost_lanes = {}
+        for lane, orientation in lanes:
+            outermost_lanes[orientation] = max(lane, outermost_lanes.get(orientation, 0))
+        for orientation, lane in outermost_lanes.items():
+            self.add_lane(lane=lane, orientation=orientation)
+
     def add_row(self, cell_height):
         """Adds an empty row upward with the given height"""
         # Compute the new y position relative to the Diagram y origin
@@ -205,12 +265,9 @@ class Grid:
             excess = round(new_row_height - self.Diagram.Size.height)
             self.logger.exception(f"Max diagram height exceeded by {excess}pt at row {len(self.Row_boundaries)}")
             # sys.exit(1)
-        # Add it to the list of row boundaries
-        self.Row_boundaries.append(new_row_height)
-        # Create new empty row with an empty node for each column boundary after the leftmost edge (0)
-        empty_row = [None for _ in self.Col_boundaries[1:]]
-        # Add it to our list of rows
-        self.Cells.append(empty_row)
+        # Add it to the row boundaries, its cells are empty until a node is placed in them
+        self.Row_boundaries.add(cell_height)
+        self.Boundary_version += 1
 
     def add_column(self, cell_width):
         """Adds an empty column rightward with the given width"""
@@ -221,22 +278,21 @@ class Grid:
             excess = round(new_col_width - self.Diagram.Size.width)
             self.logger.error(f"Max diagram width exceeded by {excess}pt at col {len(self.Col_boundaries)}")
             sys.exit(1)
-        # Add it to the list of column boundaries
-        self.Col_boundaries.append(new_col_width)
-        # For each row, add a rightmost empty node space
-        [row.append(None) for row in self.Cells]
+        # Add it to the column boundaries, its cells are empty until a node is placed in them
+        self.Col_boundaries.add(cell_width)
+        self.Boundary_version += 1
 
     @property
     def outermost_row(self) -> int:
         """My current outermost row"""
         # An empty grid has one row boundary at the zero diagram x position which we disregard
-        return len(self.Row_boundaries[1:])
+        return len(self.Row_boundaries) - 1
 
     @property
     def outermost_column(self) -> int:
         """My current outermost column"""
         # An empty grid has one column boundary at the zero diagram y position which we disregard
-        return len(self.Col_boundaries[1:])
+        return len(self.Col_boundaries) - 1
 
     def place_spanning_node(self, node: SpanningNode):
         """Places a spanning node adding any required rows or columns"""
@@ -250,8 +306,7 @@ class Grid:
 
         # Now take all existing cells in the occupied area and ensure that each is empty
         if spanned_existing_rows and spanned_existing_cols:
-            # We subtract 1 to get from canvas row col coordinates to grid cell indices
-            occupied_cells = [self.Cells[r - 1][c - 1] for r, c in
+            occupied_cells = [self.Cells.get((r, c)) for r, c in
                               product(spanned_existing_rows, spanned_existing_cols)]
             if any(occupied_cells):
                 self.logger.error(f'Spanning node overlap in: {occupied_cells}')
@@ -283,11 +338,9 @@ class Grid:
 
         # Add any required spacer rows and columns first, setting them to the default
         # node height and width
-        R = f"Name:<{node.Node_type_name}>, Diagram_type:<{self.Diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Node_Type', restriction=R)
-        node_type = result.body[0]
-        default_cell_height = int(node_type['Default_size_h']) + self.Cell_padding.top + self.Cell_padding.bottom
-        default_cell_width = int(node_type['Default_size_w']) + self.Cell_padding.left + self.Cell_padding.right
+        node_type = RelvarCache.lookup('Node_Type', Name=node.Node_type_name, Diagram_type=self.Diagram.Diagram_type)
+        default_cell_height = node_type.Default_size_h + self.Cell_padding.top + self.Cell_padding.bottom
+        default_cell_width = node_type.Default_size_w + self.Cell_padding.left + self.Cell_padding.right
         [self.add_row(default_cell_height) for _ in range(spacer_rows_to_add)]
         [self.add_column(default_cell_width) for _ in range(spacer_cols_to_add)]
 
@@ -301,7 +354,7 @@ class Grid:
         spanned_rows = list(range(node.Low_row, node.High_row + 1))
         spanned_cols = list(range(node.Left_column, node.Right_column + 1))
         for r, c in product(spanned_rows, spanned_cols):
-            self.Cells[r - 1][c - 1] = node
+            self.Cells[r, c] = node
         self.Nodes.append(node)
         # ---
 
@@ -332,18 +385,14 @@ class Grid:
             extra_height_per_row = extra_height_required / row_span
             for b in range(node.Low_row, node.High_row+1):
                 # Move this row boundary up by required distance and then offset all those above it
-                self.Row_boundaries = expand_boundaries(
-                    boundaries=self.Row_boundaries, start_boundary=b, expansion=extra_height_per_row
-                )
+                self.expand_row(row=b, expansion=extra_height_per_row)
 
         if extra_width_required:
             # Expand each spanned column enough to accommodate the extra width required
             extra_width_per_col = extra_width_required / col_span
             for b in range(node.Left_column, node.Right_column+1):
                 # Move this column boundary out by required distance and then offset all those to the right
-                self.Col_boundaries = expand_boundaries(
-                    boundaries=self.Col_boundaries, start_boundary=b, expansion=extra_width_per_col
-                )
+                self.expand_column(column=b, expansion=extra_width_per_col)
         # ---
 
     def add_lane(self, lane, orientation: Orientation):
@@ -356,21 +405,15 @@ class Grid:
         # Add enough columns or rows for the desired Lane
         # TODO: Refactor grid to at least include addrows addcols methods
 
-        R = f"Name:<standard>"
-        result = Relation.restrict(db=app, relation='Connector_Layout_Specification', restriction=R)
-        if not result:
-            self.logger.exception("Cannot load Connector Layout Specification from Flatland DB")
-            raise FlatlandDBException
-
-        default_new_path_col_width = int(result.body[0]['Default_new_path_col_width'])
-        default_new_path_row_height = int(result.body[0]['Default_new_path_row_height'])
+        default_new_path_col_width = self.Connector_layout.Default_new_path_col_width
+        default_new_path_row_height = self.Connector_layout.Default_new_path_row_height
 
         if orientation == Orientation.Horizontal:
-            rows_to_add = max(0, lane - len(self.Row_boundaries[1:]))
+            rows_to_add = max(0, lane - self.outermost_row)
             for r in range(rows_to_add):
                 self.add_row(default_new_path_row_height)
         else:
-            columns_to_add = max(0, lane - len(self.Col_boundaries[1:]))
+            columns_to_add = max(0, lane - self.outermost_column)
             for c in range(columns_to_add):
                 self.add_column(default_new_path_col_width)
 
@@ -383,7 +426,7 @@ class Grid:
         columns_to_add = max(0, node.Column - self.outermost_column)
 
         # If there is already a node at that location, raise an exception
-        if not rows_to_add and not columns_to_add and self.Cells[node.Row - 1][node.Column - 1]:
+        if not rows_to_add and not columns_to_add and (node.Row, node.Column) in self.Cells:
             self.logger.error(f'Single cell node overlap at [{node.Row}, {node.Column}]')
             raise CellOccupiedFE
 
@@ -392,19 +435,16 @@ class Grid:
         vertical_padding = self.Cell_padding.top + self.Cell_padding.bottom
         new_cell_height = node.Size.height + vertical_padding
         new_cell_width = node.Size.width + horizontal_padding
-        R = f"Name:<{node.Node_type_name}>, Diagram_type:<{self.Diagram.Diagram_type}>"
-        result = Relation.restrict(db=app, relation='Node_Type', restriction=R)
-        node_type = result.body[0]
-        default_cell_height = int(node_type['Default_size_h'])
-        default_cell_width = int(node_type['Default_size_w'])
+        node_type = RelvarCache.lookup('Node_Type', Name=node.Node_type_name, Diagram_type=self.Diagram.Diagram_type)
+        default_cell_height = node_type.Default_size_h
+        default_cell_width = node_type.Default_size_w
 
         # Check for horizontal overlap
         if not columns_to_add:
             overlap = max(0, node.Size.width + horizontal_padding - span(self.Col_boundaries, node.Column, node.Column))
             if overlap:
                 # add the overlap to each col width from the right boundary rightward
-                self.Col_boundaries = expand_boundaries(
-                    boundaries=self.Col_boundaries, start_boundary=node.Column, expansion=overlap)
+                self.expand_column(column=node.Column, expansion=overlap)
                 # Check to see if the rightmost column position is now outside the diagram area
                 if self.Col_boundaries[-1] > self.Diagram.Size.width:
                     excess = round(self.Col_boundaries[-1] - self.Diagram.Size.width)
@@ -416,8 +456,7 @@ class Grid:
             overlap = max(0, node.Size.height + vertical_padding - span(self.Row_boundaries, node.Row, node.Row))
             if overlap:
                 # add the overlap to each row ceiling from the top of this cell upward
-                self.Row_boundaries = expand_boundaries(
-                    boundaries=self.Row_boundaries, start_boundary=node.Row, expansion=overlap)
+                self.expand_row(row=node.Row, expansion=overlap)
                 # Check to see if the rightmost column position is now outside the diagram area
                 if self.Row_boundaries[-1] > self.Diagram.Size.height:
                     excess = round(self.Row_boundaries[-1] - self.Diagram.Size.height)
@@ -434,5 +473,5 @@ class Grid:
             self.add_column(add_width)
 
         # Place the node in the new location
-        self.Cells[node.Row - 1][node.Column - 1] = node
+        self.Cells[node.Row, node.Column] = node
         self.Nodes.append(node)
@@ -3,20 +3,18 @@ node.py
 """
 # System
 import logging
+from functools import cached_property
 from typing import TYPE_CHECKING, List, Optional
 
 if TYPE_CHECKING:
     from flatland.node_subsystem.grid import Grid
 
-# Model Integration
-from pyral.relation import Relation
-
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import UnsupportedNodeType
 from flatland.datatypes.geometry_types import Rect_Size, Position, Alignment
 from flatland.node_subsystem.compartment import Compartment
-from flatland.datatypes.connection_types import NodeFace
+from flatland.datatypes.connection_types import NodeFace, HorizontalFace
 from flatland.datatypes.command_interface import New_Compartment
 
 
@@ -32,6 +30,10 @@ class Node:
         - Grid -- The Node is positioned into this Grid
         - Compartments -- Each compartment to be filled in
         - Local_alignment -- Position of the node in the spanned area, vertical and horizontal
+
+    Node geometry is queried over and over again while connectors are built, so we cache it.
+    Size depends only on the text content, so it is computed once. The Canvas position is
+    recomputed only when the Grid reports that its boundaries have moved.
     """
 
     def __init__(self, node_type_name: str, content: List[New_Compartment], grid: 'Grid',
@@ -53,21 +55,16 @@ class Node:
 
         dtype = self.Grid.Diagram.Diagram_type
         # Validate the Node Type for this Diagram Type
-        R = f"Name:<{node_type_name}>, Diagram_type:<{dtype}>"
-        result = Relation.restrict(db=app, relation='Node_Type', restriction=R)
-        if not result.body:
+        if not RelvarCache.lookup('Node_Type', Name=node_type_name, Diagram_type=dtype):
             self.logger.exception(f"Node type: {node_type_name} not supported on a {dtype}")
             raise UnsupportedNodeType(node_type_name=node_type_name,
                                       diagram_type_name=dtype)
 
         # Create list of required compartments in stack order, top downward
-        R = f"Node_type:<{node_type_name}>, Diagram_type:<{dtype}>"
-        result = Relation.restrict(db=app, relation='Compartment_Type', restriction=R)
-        if not result.body:
-            pass
+        ctypes = RelvarCache.select('Compartment_Type', Node_type=node_type_name, Diagram_type=dtype)
 
         # Sort the compartment types by stack order, ascending
-        self.Compartment_types = sorted(result.body, key=lambda x: x['Stack_order'])
+        self.Compartment_types = sorted(ctypes, key=lambda x: x.Stack_order)
 
         # Create a list of compartments ordered top to bottom based on Node Type's Compartment Types
         z = zip(self.Compartment_types, content)
@@ -91,15 +88,34 @@ class Node:
         # the default cell alignment that we got from the Diagram Layout Specification
         self.Local_alignment = local_alignment if local_alignment else self.Grid.Cell_alignment
 
+        # Canvas position cache, tagged with the Grid boundary version it was computed against
+        self._canvas_position = None
+        self._canvas_position_version = None
+
     @property
-    def Canvas_position(self):
+    def Canvas_position(self) -> Position:
+        """Position of lower left corner on the Canvas, recomputed only if the Grid boundaries have moved"""
+        # No position is final until the Grid has placed every node
+        assert not self.Grid.Unplaced, "Node position requested before the Grid was solved"
+        if self._canvas_position_version != self.Grid.Boundary_version:
+            self._canvas_position = self.compute_canvas_position()
+            self._canvas_position_version = self.Grid.Boundary_version
+        return self._canvas_position
+
+    def place(self):
+        """
+        Places the node on the Grid, must be overidden by each subclass.
+        """
+        pass
+
+    def compute_canvas_position(self) -> Position:
         """
         Must be overidden by each subclass.
         :return: None, None
         """
         return Position(x=None, y=None)
 
-    @property
+    @cached_property
     def Size(self):
         """Adjust node size to accommodate text content in each compartment"""
         # For all compartments in this node, get the max height and width
@@ -135,6 +151,25 @@ class Node:
         else:
             return self.Canvas_position.x
 
+    def Face_extent(self, face: NodeFace):
+        """
+        Returns the length of the specified face
+        :param face : A node face
+        :return: width of a top or bottom face, height of a left or right face
+        """
+        return self.Size.width if face in HorizontalFace else self.Size.height
+
+    def Face_point(self, face: NodeFace, offset: float) -> Position:
+        """
+        Returns the point on the specified face at some distance from its lower or left end
+        :param face : A node face
+        :param offset : Distance along the face
+        :return: Canvas position of the point
+        """
+        if face in HorizontalFace:
+            return Position(self.Canvas_position.x + offset, self.Face_position(face))
+        return Position(self.Face_position(face), self.Canvas_position.y + offset)
+
     def render(self):
         """Calculate final position on the Canvas and register my rectangle in the Tablet"""
 
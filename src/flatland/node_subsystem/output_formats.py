@@ -0,0 +1,89 @@
+""" output_formats.py - Write a diagram in several file formats from a single rendering """
+
+# System
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Model Integration
+from tabletsvg.tablet import Tablet
+
+# Flatland
+from flatland.exceptions import OutputConverterUnavailable
+from flatland.node_subsystem.svg_stream import SVGStream
+
+_logger = logging.getLogger(__name__)
+
+# Each format a diagram can be written in, and the cairosvg function converting svg to it (None for svg itself)
+converters = {'svg': None, 'pdf': 'svg2pdf', 'png': 'svg2png'}
+
+
+class OutputFormats:
+    """
+    A diagram is written in the format selected by the suffix of its file name. To publish it in other
+    formats too, the formats are listed here and the diagram is then laid out and rendered just once.
+
+    The Tablet is rendered to SVG text and every other format is converted from that same text by cairosvg,
+    each conversion running in its own thread. Each file takes the name of the diagram file with the
+    suffix of its format.
+    """
+    formats = ()  # Formats written in addition to the one selected by the diagram file name
+
+    @classmethod
+    def outputs(cls, diagram_file: Path) -> dict[str, Path]:
+        """
+        Lists the file to write for each format
+
+        :param diagram_file: File named for the diagram
+        :return: Output file of each format, the diagram file's format first
+        """
+        formats = [diagram_file.suffix.lower().removeprefix('.'), *cls.formats]
+        return {f: diagram_file if f == formats[0] else diagram_file.with_suffix(f'.{f}') for f in formats}
+
+    @classmethod
+    def render(cls, tablet: Tablet):
+        """
+        Writes the Tablet's output file along with a file in each additional format
+
+        :param tablet: Tablet with every layer drawn
+        """
+        outputs = cls.outputs(tablet.Output_file)
+        if len(outputs) == 1 and 'png' not in outputs:
+            # Just the one format the Tablet writes on its own
+            SVGStream.render(tablet)
+            return
+        unknown = [f for f in outputs if f not in converters]
+        if unknown:
+            raise ValueError(f"Unsupported output format '{unknown[0]}'; use one of {', '.join(converters)}")
+
+        tablet.Output_file.parent.mkdir(parents=True, exist_ok=True)
+        svg = SVGStream.text(tablet)
+        if 'svg' in outputs:
+            # Written just as ElementTree writes a file for unicode output
+            outputs['svg'].write_text(svg, encoding='utf-8', errors='xmlcharrefreplace')
+            _logger.info(f"SVG written to {outputs['svg']}")
+        conversions = {f: p for f, p in outputs.items() if converters[f]}
+        if conversions:
+            svg_bytes = svg.encode('utf-8', errors='xmlcharrefreplace')
+            with ThreadPoolExecutor(max_workers=len(conversions), thread_name_prefix='flatland_convert') as executor:
+                done = [executor.submit(cls.convert, svg_bytes, f, p) for f, p in conversions.items()]
+                for d in done:
+                    d.result()  # Raise any conversion error
+
+    @staticmethod
+    def convert(svg: bytes, output_format: str, output_file: Path):
+        """
+        Converts SVG to another format
+
+        :param svg: Text of an SVG file
+        :param output_format: Format to convert to, any in converters other than svg
+        :param output_file: File to write
+        :raises OutputConverterUnavailable: If cairosvg or the cairo library can't be loaded
+        """
+        try:
+            # Imported only when needed, since loading the cairo library takes a while and it may be missing
+            import cairosvg
+        except (ImportError, OSError) as e:
+            raise OutputConverterUnavailable(output_format=output_format, reason=e) from e
+        getattr(cairosvg, converters[output_format])(bytestring=svg, write_to=str(output_file))
+        _logger.info(f"{output_format.upper()} written to {output_file}")
@@ -43,6 +43,10 @@ class SingleCellNode(Node):
             raise BadColNumber
         self.Row = row
         self.Column = column
+        self.Grid.add_node(node=self)
+
+    def place(self):
+        """Places the node on the Grid, adding any required rows or columns"""
         self.Grid.place_single_cell_node(node=self)
 
     def __repr__(self):
@@ -52,8 +56,7 @@ class SingleCellNode(Node):
         return f'Grid [{self.Row}, {self.Column}] @ ({round(self.Canvas_position.x, 2)}, ' \
                f'{round(self.Canvas_position.y, 2)}), W {round(self.Size.width, 2)} x H {round(self.Size.height, 2)}'
 
-    @property
-    def Canvas_position(self):
+    def compute_canvas_position(self) -> Position:
         """Position of lower left corner on the Canvas"""
         # Workout alignment within Cell
         lower_left_x = align_on_axis(
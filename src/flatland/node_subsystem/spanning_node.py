@@ -50,6 +50,10 @@ class SpanningNode(Node):
         self.Low_row = low_row
         self.Left_column = left_column
         self.Right_column = right_column
+        self.Grid.add_node(node=self)
+
+    def place(self):
+        """Places the node on the Grid, adding any required rows or columns"""
         self.Grid.place_spanning_node(node=self)
 
     def __repr__(self):
@@ -59,8 +63,7 @@ class SpanningNode(Node):
         return f'Grid [{self.Low_row}-{self.High_row}, {self.Left_column}-{self.Right_column}] @ ({round(self.Canvas_position.x, 2)}, ' \
                f'{round(self.Canvas_position.y, 2)}), W {round(self.Size.width, 2)} x H {round(self.Size.height, 2)}'
 
-    @property
-    def Canvas_position(self):
+    def compute_canvas_position(self) -> Position:
         """Position of lower left corner on the Canvas"""
         # Workout alignment within Cell
         lower_left_x = align_on_axis(
@@ -0,0 +1,182 @@
+""" svg_stream.py - Write a Tablet to an SVG file as its elements are rendered """
+
+# System
+import io
+import logging
+import xml.etree.ElementTree as ET
+from typing import TextIO
+
+# Model Integration
+from tabletsvg.tablet import Tablet
+from tabletsvg.layer import Layer
+from tabletsvg.graphics.circle_se import CircleSE
+from tabletsvg.graphics.line_segment import LineSegment
+from tabletsvg.graphics.polygon_se import PolygonSE
+from tabletsvg.graphics.diagnostic_marker import DiagnosticMarker
+from tabletsvg.graphics.text_element import TextElement
+from tabletsvg.graphics.symbol import Symbol
+from tabletsvg.graphics.rectangle_se import RectangleSE
+from tabletsvg.graphics.image import ImageDE
+
+_logger = logging.getLogger(__name__)
+
+# Everything a Layer renders, in the order Layer.render renders it, along with the layer list it is drawn from.
+# Each item in a list is rendered on its own, so a list can be rendered a slice at a time.
+layer_content = (
+    (LineSegment.render, 'Line_segments'),
+    (Symbol.render, 'Symbols'),
+    (CircleSE.render, 'Circles'),
+    (RectangleSE.render, 'Rectangles'),
+    (PolygonSE.render, 'Polygons'),
+    (TextElement.render_underlays, 'TextUnderlayRects'),
+    (TextElement.render, 'Text'),
+    (ImageDE.render, 'Images'),
+)
+# Layer lists that DiagnosticMarker.render draws, last and all at once
+diagnostic_content = ('RawLines', 'RawRectangles')
+
+
+class SVGStream:
+    """
+    The Tablet renders a drawing by building an SVG element for everything drawn on every layer, gathering
+    them all into a single element tree and only then writing the file. For a large diagram, that tree
+    is most of the memory a drawing takes.
+
+    When enabled, SVG output is instead written as it is rendered, layer by layer in z order. Within a
+    layer, whatever is drawn is rendered a slice of chunk_size items at a time, and each slice is written
+    and let go before the next is rendered. So however large the diagram, only a slice of SVG elements is
+    held at any time. That saves only the element tree, not the drawing itself: everything drawn stays on
+    the Tablet's layers until it is written. The file is the same, byte for byte, as the Tablet would write.
+    Since each layer is emptied as it is written, the Tablet can't be rendered again afterward.
+
+    The root element and layer order follow Tablet.render and the drawn lists follow Layer.render, neither
+    of which tabletsvg documents. If any layer holds a drawn list we don't know of, the Tablet renders the
+    file instead, and test_svg_stream fails if layer_content no longer matches Layer.render.
+
+    PDF output is still rendered by the Tablet since the PDF converter needs the whole drawing at once.
+    """
+    enabled = False  # Stream SVG output rather than have the Tablet render it
+    chunk_size = 256  # Drawn items rendered at a time
+    buffer_size = 1 << 16  # Bytes written to the file at a time
+
+    @classmethod
+    def render(cls, tablet: Tablet):
+        """
+        Writes the Tablet's output file, streaming it if it is an SVG file and streaming is enabled
+
+        :param tablet: Tablet with every layer drawn
+        """
+        if cls.enabled and tablet.Output_file.suffix.lower() == '.svg':
+            unknown = cls.unknown_content(tablet)
+            if not unknown:
+                cls.write(tablet)
+                return
+            _logger.warning(f"Not streaming SVG, tabletsvg draws unknown layer content: {sorted(unknown)}")
+        tablet.render()
+
+    @staticmethod
+    def unknown_content(tablet: Tablet) -> set[str]:
+        """
+        Names any list drawn on a layer of the Tablet that we don't know how to render
+
+        :param tablet: Tablet with every layer drawn
+        :return: Name of each such layer list, if any
+        """
+        known = {drawn_list for _, drawn_list in layer_content} | set(diagnostic_content)
+        return {name for layer in tablet.layers.values() for name, value in vars(layer).items()
+                if isinstance(value, list) and value and name not in known}
+
+    @classmethod
+    def write(cls, tablet: Tablet):
+        """
+        Writes the SVG file of a Tablet, emptying each layer as it goes
+
+        :param tablet: Tablet with every layer drawn
+        """
+        tablet.Output_file.parent.mkdir(parents=True, exist_ok=True)
+        # Opened just as ElementTree opens a file for unicode output
+        with open(tablet.Output_file, 'w', encoding='utf-8', errors='xmlcharrefreplace',
+                  buffering=cls.buffer_size) as f:
+            cls.write_svg(f, tablet)
+        _logger.info(f"SVG written to {tablet.Output_file}")
+
+    @classmethod
+    def text(cls, tablet: Tablet) -> str:
+        """
+        Renders a Tablet to SVG text, emptying each layer as it goes
+
+        :param tablet: Tablet with every layer drawn
+        :return: The text of the SVG file the Tablet would write
+        """
+        f = io.StringIO()
+        cls.write_svg(f, tablet)
+        return f.getvalue()
+
+    @classmethod
+    def write_svg(cls, f: TextIO, tablet: Tablet):
+        """
+        Writes the SVG document of a Tablet
+
+        :param f: Output text stream
+        :param tablet: Tablet with every layer drawn
+        """
+        # The same root and background as the Tablet creates
+        w, h = tablet.Size.width, tablet.Size.height
+        svg = ET.Element('svg', {
+            'xmlns': 'http://www.w3.org/2000/svg',
+            'width': str(w),
+            'height': str(h),
+            'viewBox': f'0 0 {w} {h}',
+        })
+        bg = tablet.background_color
+        background = ET.Element('rect', {
+            'width': str(w),
+            'height': str(h),
+            'fill': f'rgb({bg.r},{bg.g},{bg.b})',
+        })
+        # An empty root serializes as a self closing tag, which we reopen
+        f.write(ET.tostring(svg, encoding='unicode').removesuffix(' />') + '>')
+        cls.write_elements(f, [background])
+        for name in tablet.layer_order:
+            layer = tablet.layers.get(name)
+            if layer:
+                cls.write_layer(f, layer)
+        f.write('\n</svg>')
+
+    @classmethod
+    def write_layer(cls, f: TextIO, layer: Layer):
+        """
+        Renders and writes everything drawn on a layer, a slice at a time
+
+        :param f: Output file
+        :param layer: Layer to write
+        """
+        _logger.info(f'Streaming layer: {layer.Name}')
+        for render, drawn_list in layer_content:
+            drawn = getattr(layer, drawn_list)
+            for start in range(0, len(drawn), cls.chunk_size):
+                # Render just this slice by having the layer hold nothing else
+                setattr(layer, drawn_list, drawn[start:start + cls.chunk_size])
+                cls.write_elements(f, render(layer))
+            drawn.clear()
+            setattr(layer, drawn_list, drawn)
+        # Diagnostic markers are rare and drawn from two lists, so they are rendered all at once
+        cls.write_elements(f, DiagnosticMarker.render(layer))
+        for drawn_list in diagnostic_content:
+            getattr(layer, drawn_list).clear()
+
+    @staticmethod
+    def write_elements(f: TextIO, elements: list[ET.Element]):
+        """
+        Writes children of the root svg element indented as ElementTree.indent indents the whole tree
+
+        :param f: Output file
+        :param elements: Elements drawn on some layer
+        """
+        if not elements:
+            return
+        # Indented and serialized under a stand in root, whose own tags are then left out
+        root = ET.Element('svg')
+        root.extend(elements)
+        ET.indent(root, space='  ')
+        f.write(ET.tostring(root, encoding='unicode').removeprefix('<svg>').removesuffix('\n</svg>'))
@@ -0,0 +1,328 @@
+""" server.py - Long running diagram render service and its client """
+
+# System
+import sys
+import json
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from http import HTTPStatus
+from http.client import HTTPConnection, HTTPException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Optional
+
+# Flatland
+from flatland import version
+from flatland.batch import Batch, BatchJob, option_names, model_suffixes
+from flatland.configuration.config_loader import ConfigLoader
+from flatland.database.flatland_db import FlatlandDB
+from flatland.exceptions import RenderRequestError
+
+_logger = logging.getLogger(__name__)
+
+default_port = 8765
+content_types = {'svg': 'image/svg+xml', 'pdf': 'application/pdf', 'png': 'image/png'}
+
+# Longest request body we accept, model and layout text included
+max_request_size = 16 * 1024 * 1024
+
+
+def render_request(request: dict) -> tuple[bytes, float]:
+    """
+    Renders the diagram described by a request
+
+    A request supplies the model and layout either as text or as local file paths:
+
+        {"model": "<xcm text>", "model_type": "xcm", "layout_path": "/models/elevator.mls", "format": "svg"}
+
+    The model type, xcm or xsm, is needed only when the model is supplied as text. The format is svg unless
+    pdf or png is requested. Any of the diagram options (show_grid, show_rulers, nodes_only, no_color, show_ref_types,
+    no_parse_cache) may also be set, each defaults to false.
+
+    :param request: Decoded json request
+    :return: The diagram file content and the seconds it took to render
+    """
+    if not isinstance(request, dict):
+        raise RenderRequestError("Request must be a json object")
+    unknown = set(request) - {'model', 'model_path', 'model_type', 'layout', 'layout_path', 'format'} - set(
+        option_names)
+    if unknown:
+        raise RenderRequestError(f"Unknown request settings {sorted(unknown)}")
+    fmt = request.get('format', 'svg')
+    if fmt not in content_types:
+        raise RenderRequestError(f"Unsupported format [{fmt}], choose one of {sorted(content_types)}")
+    options = {o: bool(request.get(o, False)) for o in option_names}
+
+    with tempfile.TemporaryDirectory(prefix="flatland_") as work_dir:
+        work = Path(work_dir)
+
+        if 'model' in request:
+            model_type = request.get('model_type')
+            if f".{model_type}" not in model_suffixes:
+                raise RenderRequestError("A model_type of xcm or xsm is required with model text")
+            model = work / f"model.{model_type}"
+            model.write_text(request['model'])
+        elif 'model_path' in request:
+            model = Path(request['model_path'])
+            if model.suffix not in model_suffixes:
+                raise RenderRequestError(f"Unrecognized model file type: {model}")
+        else:
+            raise RenderRequestError("Request needs a model or a model_path")
+
+        if 'layout' in request:
+            layout = work / "layout.mls"
+            layout.write_text(request['layout'])
+        elif 'layout_path' in request:
+            layout = Path(request['layout_path'])
+        else:
+            raise RenderRequestError("Request needs a layout or a layout_path")
+
+        diagram = work / f"diagram.{fmt}"
+        result = Batch.run_job(BatchJob(model=model, layout=layout, diagram=diagram, options=options))
+        if result.error is not None:
+            raise RenderRequestError(result.error)
+        return diagram.read_bytes(), result.seconds
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /render with a json request to receive the diagram, GET /health to see if we are up
+    """
+    server_version = f"Flatland/{version}"
+    protocol_version = "HTTP/1.1"  # So that clients can keep their connection between requests
+
+    def send_body(self, status: HTTPStatus, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_failure(self, status: HTTPStatus, message: str):
+        self.send_body(status, json.dumps({'error': message}).encode(), 'application/json')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_body(HTTPStatus.OK, f"Flatland version: {version}\n".encode(), 'text/plain')
+        else:
+            self.send_failure(HTTPStatus.NOT_FOUND, f"No such resource: {self.path}")
+
+    def do_POST(self):
+        if self.path != '/render':
+            self.send_failure(HTTPStatus.NOT_FOUND, f"No such resource: {self.path}")
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if not 0 < length <= max_request_size:
+            self.close_connection = True
+            self.send_failure(HTTPStatus.BAD_REQUEST, "Request needs a json body of at most 16MB")
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self.send_failure(HTTPStatus.BAD_REQUEST, f"Request is not valid json: {e}")
+            return
+        try:
+            diagram, seconds = render_request(request)
+        except RenderRequestError as e:
+            self.send_failure(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+            return
+        self.send_body(HTTPStatus.OK, diagram, content_types[request.get('format', 'svg')],
+                       headers={'X-Render-Seconds': f"{seconds:.4f}"})
+
+    def log_message(self, format, *args):
+        _logger.info(f"{self.address_string()} {format % args}")
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """
+    Serves the same http requests on a unix domain socket
+    """
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # The request handler expects an internet (host, port) client address
+        return request, ('local', 0)
+
+
+class RenderServer:
+    """
+    Keeps the populated Flatland database, parsed styles and loaded fonts resident so that each diagram
+    costs only its own parse, layout and render time. Requests are served on loopback http, a unix domain
+    socket, or both, each on its own thread.
+    """
+
+    def __init__(self, port: Optional[int] = default_port, socket_path: Optional[Path] = None):
+        """
+        :param port: Loopback http port, 0 for any free port, None for no http
+        :param socket_path: Unix domain socket path, None for no socket
+        """
+        self.logger = logging.getLogger(__name__)
+        self.Port = port
+        self.Socket_path = socket_path
+        self.Servers = []
+        self.Threads = []
+
+    def start(self):
+        """
+        Binds each requested endpoint and starts serving. The Flatland database must already be populated.
+        """
+        if self.Port is None and self.Socket_path is None:
+            raise RenderRequestError("Nothing to serve, specify a port or a socket path")
+        ConfigLoader.activate()
+        if self.Port is not None:
+            # Loopback only, there is no authentication
+            server = ThreadingHTTPServer(('127.0.0.1', self.Port), RenderRequestHandler)
+            self.Port = server.server_address[1]
+            self.Servers.append(server)
+            self.logger.info(f"Serving on http://127.0.0.1:{self.Port}")
+        if self.Socket_path is not None:
+            self.Socket_path.unlink(missing_ok=True)
+            self.Servers.append(UnixHTTPServer(str(self.Socket_path), RenderRequestHandler))
+            self.logger.info(f"Serving on {self.Socket_path}")
+        for server in self.Servers:
+            t = threading.Thread(target=server.serve_forever, daemon=True)
+            t.start()
+            self.Threads.append(t)
+
+    def stop(self):
+        """
+        Stops serving and releases each endpoint
+        """
+        for server in self.Servers:
+            server.shutdown()
+            server.server_close()
+        for t in self.Threads:
+            t.join()
+        if self.Socket_path is not None:
+            self.Socket_path.unlink(missing_ok=True)
+        self.Servers = []
+        self.Threads = []
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """
+    An http connection over a unix domain socket
+    """
+
+    def __init__(self, socket_path: Path, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(str(self.socket_path))
+
+
+class RenderClient:
+    """
+    Requests diagrams from a running render server, keeping the connection open between requests
+    """
+
+    def __init__(self, port: Optional[int] = default_port, socket_path: Optional[Path] = None,
+                 timeout: float = 120):
+        """
+        :param port: Loopback http port of the server, ignored if a socket path is given
+        :param socket_path: Unix domain socket path of the server
+        :param timeout: Seconds to wait for any one diagram
+        """
+        if socket_path is not None:
+            self.Connection = UnixHTTPConnection(socket_path=socket_path, timeout=timeout)
+        else:
+            self.Connection = HTTPConnection('127.0.0.1', port, timeout=timeout)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None) -> tuple[int, bytes]:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        # A kept connection may have been closed by the server since our last request, so try a fresh one once
+        for attempt in (1, 2):
+            try:
+                self.Connection.request(method, path, body=body, headers=headers)
+                response = self.Connection.getresponse()
+                return response.status, response.read()
+            except (ConnectionError, HTTPException):
+                self.Connection.close()
+                if attempt == 2:
+                    raise
+
+    def render(self, model: Optional[str] = None, layout: Optional[str] = None, model_type: Optional[str] = None,
+               model_path: Optional[Path] = None, layout_path: Optional[Path] = None, fmt: str = 'svg',
+               **options) -> bytes:
+        """
+        Renders a diagram from model and layout text or paths, see render_request for details
+
+        :return: The diagram file content
+        """
+        request = dict(options, format=fmt)
+        if model is not None:
+            request.update(model=model, model_type=model_type)
+        if model_path is not None:
+            request['model_path'] = str(Path(model_path).resolve())
+        if layout is not None:
+            request['layout'] = layout
+        if layout_path is not None:
+            request['layout_path'] = str(Path(layout_path).resolve())
+        status, body = self.request('POST', '/render', body=json.dumps(request).encode())
+        if status != HTTPStatus.OK:
+            try:
+                message = json.loads(body)['error']
+            except (ValueError, KeyError, TypeError):
+                message = body.decode(errors='replace')
+            raise RenderRequestError(message)
+        return body
+
+    def health(self) -> str:
+        status, body = self.request('GET', '/health')
+        return body.decode()
+
+    def close(self):
+        self.Connection.close()
+
+
+def parse(cl_input):
+    parser = argparse.ArgumentParser(prog='flatland serve', description='Flatland diagram render server')
+    parser.add_argument('-p', '--port', action='store', type=int, default=default_port,
+                        help=f'Loopback http port to serve on, default {default_port}')
+    parser.add_argument('-s', '--socket', action='store',
+                        help='Also serve on this unix domain socket path')
+    parser.add_argument('-NH', '--no_http', action='store_true',
+                        help='Serve only on the unix domain socket')
+    parser.add_argument('-R', '--rebuild', action='store_true',
+                        help='Rebuild the flatland database rather than loading the saved snapshot')
+    return parser.parse_args(cl_input)
+
+
+def serve(cl_input):
+    """
+    Runs the render server until interrupted
+    """
+    args = parse(cl_input)
+    if args.no_http and not args.socket:
+        _logger.error("A socket path is required if http is turned off.")
+        sys.exit(1)
+    FlatlandDB.create_db(rebuild=args.rebuild)
+    server = RenderServer(port=None if args.no_http else args.port,
+                          socket_path=Path(args.socket) if args.socket else None)
+    try:
+        server.start()
+    except OSError as e:
+        _logger.error(f"Cannot start render server [{e}]")
+        sys.exit(1)
+    endpoints = ([f"http://127.0.0.1:{server.Port}"] if server.Port is not None else []) + (
+        [str(server.Socket_path)] if server.Socket_path else [])
+    print(f"Flatland render server on {', '.join(endpoints)}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
@@ -3,31 +3,57 @@
 # System
 import logging
 from collections import namedtuple
-from typing import TYPE_CHECKING, Dict
-import math
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
 
 # Model Integration
-from pyral.relation import Relation
 from tabletsvg.graphics.text_element import TextElement
 from tabletsvg.graphics.image import ImageDE
 from tabletsvg.geometry_types import Position, Rect_Size, HorizAlign
-from pyral.rtypes import Attribute as pyral_Attribute
 
 # Flatland
+from flatland.text.text_metrics import TextMetrics
 from flatland.exceptions import FlatlandDBException
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.datatypes.geometry_types import HorizAlign
-from flatland.sheet_subsystem.titleblock_placement import draw_titleblock
-from flatland.text.text_block import TextBlock
+from flatland.sheet_subsystem.titleblock_placement import draw_titleblock, titleblock_borders, BoxPlacement
+from flatland.text.text_fit import TextFit
 
 if TYPE_CHECKING:
     from flatland.node_subsystem.canvas import Canvas
+    from flatland.sheet_subsystem.sheet import Sheet
+
+_logger = logging.getLogger(__name__)
 
 DataBox = namedtuple('_Databox', 'metadata content position size alignment style')
 FieldPlacement = namedtuple('_FieldPlacement', 'metadata position max_area')
+TitleBlockFieldPlacement = namedtuple('_TitleBlockFieldPlacement', 'field box_placement data_box')
 
 region_line_spacing = 6  # TODO: This should be specified somewhere
 
+# Data Box horizontal alignment, left unless specified otherwise
+box_alignment = {'RIGHT': HorizAlign.RIGHT, 'CENTER': HorizAlign.CENTER}
+
+
+class TitleBlockSlot(NamedTuple):
+    metadata: str  # Metadata Item displayed in the Data Box
+    asset: str  # Name of the Data Box, which styles its text
+    position: Position  # Lower left corner of the Data Box
+    size: Rect_Size  # Of the Data Box
+    stack_order: int  # Of this Metadata Item among those sharing the Data Box
+    regions: int  # Number of Metadata Items sharing the Data Box
+    align: HorizAlign
+
+
+class FrameTemplate(NamedTuple):
+    """Everything needed to draw a Frame on a Sheet except the metadata filled into it"""
+    title_block_pattern: Optional[str]
+    margin_h: float  # Padding on either side of each Data Box's text
+    margin_v: float  # Padding above and below each Data Box's text
+    slots: Tuple[TitleBlockSlot, ...]  # Each Metadata Item placed in the title block
+    borders: Tuple[BoxPlacement, ...]  # Each box drawn in the title block
+    free_fields: Tuple['FieldPlacement', ...]  # Metadata placed outside of the title block
+
+
 class Frame:
     """
     On any serious project it is not adequate to generate model diagrams absent any metadata such as
@@ -43,7 +69,12 @@ class Frame:
         - metadata (dict) -- <Metadata> : <Content>, such as 'Title' : 'Sheet Subsystem Class Diagram'
         - Open_fields (list) -- Open field metadata label and positional info loaded from flatland database
         - Databoxes (dict) -- All Databox data loaded from flatland database (See named tuple above)
+
+    Where each Data Box and Free Field lies, the title block borders and margins depend only on the Frame,
+    Sheet and orientation. So they are gathered from the flatland database into a Frame Template just once
+    and only the metadata is filled in for each diagram.
     """
+    templates = {}  # (frame, sheet, orientation): (relvar cache generation, FrameTemplate)
 
     def __init__(self, name: str, presentation: str, canvas: 'Canvas', metadata: Dict[str, str]):
         """
@@ -77,69 +108,25 @@ class Frame:
             name='frame', presentation=presentation, drawing_type=drawing_type_name
         )  # On this layer we'll draw metadata and title block borders. No diagram content!
 
-        # Check to see if there is a Title Block Pattern used in this Frame
-        R = f"Frame:<{self.Name}>"
-        result = Relation.restrict(db=app, relation='Framed_Title_Block', restriction=R)
-        if result.body:
-            # This Fitted Frame may or may not specify a Title Block Pattern
-            self.Title_block_pattern = result.body[0].get('Title_block_pattern')
-        else:
-            self.Title_block_pattern = None
-            self.logger.info(f"No title block defined for frame: self.Name")
-
-        # If a Title Block Pattern is specified, let's gather all the Data Box content from the flatland database
+        # Everything about the Frame other than the metadata filled into it is the same on every diagram
+        template = Frame.template(name=self.Name, sheet=self.Canvas.Sheet, orientation=self.Orientation)
+        self.Title_block_pattern = template.title_block_pattern
+        self.Title_block_borders = template.borders
+        self.Free_fields = list(template.free_fields)
+
+        # If a Title Block Pattern is specified, fill in each of its Data Boxes
         if self.Title_block_pattern:
             self.logger.info(f'Assembling title block pattern: {self.Title_block_pattern} on frame: {self.Name}')
-            # Assemble a text block for each Data Box containing the Metadata Text Content
-            # We'll register that text block with the Layer for rendering
-            # Image (Resource) content is not supported within a Title Block Pattern, so we assume only text content
-            # If any non-text Resources were mistakenly specified by the user, we will ignore them
-
-            # Join Title Block Field and Data Box classes to get the Data Box dimensions and position for each
-            # Metadata Item to be displayed in the title block
-            Relation.join(db=app, rname1='Title_Block_Field', rname2='Box_Placement',
-                          attrs={'Frame': 'Frame', 'Data_box': 'Box',
-                                 'Title_block_pattern': 'Title_block_pattern'}, svar_name='tbf_bp_join')
-            R = f"Sheet:<{self.Canvas.Sheet.Name}>, Orientation:<{self.Canvas.Orientation}>"
-            Relation.restrict(db=app, restriction=R, svar_name='tbf_pb_join')
-            result = Relation.join(db=app, rname2='Data_Box',
-                                   attrs={'Title_block_pattern': 'Pattern', 'Data_box': 'ID'},
-                                   svar_name='tbf_bp_join')
-            if not result.body:
-                self.logger.exception(f"No Box Placements in database for Title Block Pattern: {self.Title_block_pattern}")
-                raise FlatlandDBException
-
-            tb_field_placements = result.body # Each metadata item and its Data Box position and size
-
-            # Get the margins to pad the Data Box content
-            # The same margins are applied to each Data Box in the same Scaled Title Block
-            # So we are looking only for one pair of h,v margin values to use throughout
-            R = f"Title_block_pattern:<{self.Title_block_pattern}>, Sheet_size_group:<{self.Canvas.Sheet.Size_group}>"
-            result = Relation.restrict(db=app, relation='Scaled_Title_Block', restriction=R)
-            if not result.body:
-                self.logger.error(f"No Scaled Title Block in database for Title Block Pattern: {self.Title_block_pattern} and"
-                                  f"Sheet Size Group: {self.Canvas.Sheet.Size_group}")
-                raise FlatlandDBException
-            h_margin = int(result.body[0]['Margin_h'])
-            v_margin = int(result.body[0]['Margin_v'])
-
-            # Get number of Regions per Data Box
-            result = Relation.summarizeby(db=app, relation='Region', attrs=['Data_box', 'Title_block_pattern'],
-                                          sum_attr=pyral_Attribute(name='Qty', type='int'),
-                                          svar_name="Number_of_regions")
-            if not result.body:
-                self.logger.error(f"No Regions in database for Title Block Pattern: {self.Title_block_pattern}")
-                raise FlatlandDBException
-            num_regions = {int(r['Data_box']): int(r['Qty']) for r in result.body}
+            h_margin, v_margin = template.margin_h, template.margin_v
 
             # Add a text block to the canvas for each Metadata Item in the title block
-            for place in tb_field_placements:
-
-                box_position = Position(int(place['X']), int(place['Y']))
-                box_size = Rect_Size(height=float(place['Height']), width=float(place['Width']))
-                text = metadata[place['Metadata']][0]  # Metadata Item to display
+            for slot in template.slots:
+                asset = slot.asset
+                box_position = slot.position
+                box_size = slot.size
+                text = metadata[slot.metadata][0]  # Metadata Item to display
                 # Determine rectangular area required by the text
-                block_size = TextElement.text_block_size(presentation=self.Layer.Presentation, asset=place['Name'],
+                block_size = TextMetrics.text_block_size(presentation=self.Layer.Presentation, asset=asset,
                                                          text_block=[text])
 
                 # If the databox contains only one Metadata Item and its text is too wide to fit
@@ -149,73 +136,132 @@ class Frame:
                 # databox.
 
                 wrapped_text = [text]  # Default assumption is that the line will fit without wrapping
-                max_text_width = box_size.width - 2*h_margin  # Box width minus a horizontal margin on each side
                 adjusted_block_height = block_size.height  # Default assumption that we won't resize the block
-                if block_size.width > max_text_width:
-                    wrap = math.ceil(block_size.width / max_text_width)  # Round up to get number of lines to wrap
-                    wrapped_block = TextBlock(line=text, wrap=wrap)  # Wrapped text block
+                # Box size minus a margin on each side
+                max_text_size = Rect_Size(height=box_size.height - 2*v_margin, width=box_size.width - 2*h_margin)
+                if block_size.width > max_text_size.width:
                     # If multiple Metadata Items in the databox, just truncate by taking the first wrapped line only
-                    wrapped_text = [wrapped_block.text[0]] if num_regions[int(place['Data_box'])] > 1 else wrapped_block.text
-                    # Now see if we have enough vertical space
-                    max_text_height = box_size.height - 2*v_margin
-                    wrap_block_size = TextElement.text_block_size(presentation=self.Layer.Presentation,
-                                                                  asset=place['Name'], text_block=wrapped_text)
-                    # It may be the case that the text is split between words such that it is still wider than
-                    # the max_text_width. If so let's wrap an extra line and try again until we get a text block
-                    # that fits between the horizontal margins in the Data Box.
-                    while wrap_block_size.width > max_text_width and wrapped_block.spaces:
-                        # Note that we ensure that there is at least one space available for additional wrapping
-                        wrap = wrap + 1
-                        wrapped_block = TextBlock(line=text, wrap=wrap).text  # List of wrapped lines
-                        wrap_block_size = TextElement.text_block_size(
-                            presentation=self.Layer.Presentation,asset=place['Name'], text_block=wrapped_block)
-
-                    # Last check for fit before we give up and truncate
-                    if wrap_block_size.height > max_text_height or wrap_block_size.width > max_text_width:
+                    fitted = TextFit.fit(presentation=self.Layer.Presentation, asset=asset, text=text,
+                                         max_size=max_text_size, first_line_only=slot.regions > 1)
+                    if fitted:
+                        # Adjust the block height to account for our wrapped text
+                        wrapped_text = list(fitted.lines)
+                        adjusted_block_height = fitted.size.height
+                    else:
                         # The text can't be wrapped to fit so
                         # just print up to the first three characters and an ellipsis
-                        overflow_text = f"{wrapped_text[0][:3]}..."
-                        wrapped_text = [overflow_text]
-                    else:
-                        # Adjust the block height to account for our wrapped text
-                        adjusted_block_height = wrap_block_size.height
+                        wrapped_text = [f"{text[:3]}..."]
 
-                stack_order = int(place['Stack_order'])
-                stack_height = (stack_order - 1) * (region_line_spacing + block_size.height)
+                stack_height = (slot.stack_order - 1) * (region_line_spacing + block_size.height)
 
                 # compute lower left corner position
                 xpos = box_position.x + h_margin
-                if num_regions[int(place['Data_box'])] == 1:
+                if slot.regions == 1:
                     ypos = box_position.y + round((box_size.height - adjusted_block_height) / 2, 2)
                 else:
                     ypos = box_position.y + v_margin*2 + stack_height  # Not sure why v_margin is doubled, but it works
-                halign = HorizAlign.LEFT
-                if place['H_align'] == 'RIGHT':
-                    halign = HorizAlign.RIGHT
-                elif place['H_align'] == 'CENTER':
-                    halign = HorizAlign.CENTER
-                TextElement.add_block(layer=self.Layer, asset=place['Name'],
+                TextElement.add_block(layer=self.Layer, asset=asset,
                                       lower_left=Position(xpos, ypos), text=wrapped_text,
-                                      align=halign)
-
-        # Add a text block to the canvas for any Free Field outside of the title block
-        #
-        # Gather the Free Field content (other text and graphics scattered around the Frame)
-        self.logger.info('Assembling open fields on frame')
-        R = f"Frame:<{self.Name}>, Sheet:<{self.Canvas.Sheet.Name}>, Orientation:<{self.Orientation}>"
-        result = Relation.restrict(db=app, relation='Free_Field', restriction=R)
-        free_fields = result.body  # Might not be any and that's okay
-
-        for f in free_fields:
-            p = Position(int(f['X']), int(f['Y']))
-            ma = Rect_Size(int(f['Max_height']), int(f['Max_width']))
-            self.Free_fields.append(
-                FieldPlacement(metadata=f['Metadata'], position=p, max_area=ma)
-            )
+                                      align=slot.align)
 
         # Now let's render all text and graphics for everything in our Frame
         self.render()
 
+    @classmethod
+    def template(cls, name: str, sheet: 'Sheet', orientation: str) -> FrameTemplate:
+        """
+        Returns the template of a Frame fitted to a Sheet, compiling it the first time it is requested
+
+        :param name: Size independent name of the Frame
+        :param sheet: Frame is fitted to this Sheet
+        :param orientation: Orientation of the Sheet, 'portrait' or 'landscape'
+        :return: The Frame's template
+        """
+        key = (name, sheet.Name, orientation)
+        cached = cls.templates.get(key)
+        if cached and cached[0] == RelvarCache.generation:
+            return cached[1]
+        template = cls.compile_template(name=name, sheet=sheet, orientation=orientation)
+        cls.templates[key] = (RelvarCache.generation, template)
+        return template
+
+    @staticmethod
+    def compile_template(name: str, sheet: 'Sheet', orientation: str) -> FrameTemplate:
+        """
+        Gathers everything from the flatland database needed to draw a Frame on a Sheet
+
+        :param name: Size independent name of the Frame
+        :param sheet: Frame is fitted to this Sheet
+        :param orientation: Orientation of the Sheet, 'portrait' or 'landscape'
+        :return: The Frame's template
+        """
+        # Gather the Free Field content (other text and graphics scattered around the Frame)
+        free_fields = tuple(
+            FieldPlacement(metadata=f.Metadata, position=Position(f.X, f.Y), max_area=Rect_Size(f.Max_height, f.Max_width))
+            for f in RelvarCache.select('Free_Field', Frame=name, Sheet=sheet.Name, Orientation=orientation)
+        )  # Might not be any and that's okay
+
+        # Check to see if there is a Title Block Pattern used in this Frame
+        framed_title_block = RelvarCache.lookup('Framed_Title_Block', Frame=name)
+        if not framed_title_block:
+            _logger.info(f"No title block defined for frame: {name}")
+            return FrameTemplate(title_block_pattern=None, margin_h=0, margin_v=0, slots=(), borders=(),
+                                 free_fields=free_fields)
+        # This Fitted Frame may or may not specify a Title Block Pattern
+        title_block_pattern = framed_title_block.Title_block_pattern
+
+        # Assemble a Data Box slot for each Metadata Item
+        # Image (Resource) content is not supported within a Title Block Pattern, so we assume only text content
+        # If any non-text Resources were mistakenly specified by the user, we will ignore them
+
+        # Join each Title Block Field to its Box Placement on our Sheet and to its Data Box to get the
+        # Data Box dimensions and position for each Metadata Item to be displayed in the title block
+        tb_field_placements = []  # Each metadata item and its Data Box position and size
+        for tbf in RelvarCache.select('Title_Block_Field', Frame=name, Title_block_pattern=title_block_pattern):
+            box_placement = RelvarCache.lookup('Box_Placement', Frame=name, Sheet=sheet.Name,
+                                               Orientation=orientation,
+                                               Title_block_pattern=tbf.Title_block_pattern, Box=tbf.Data_box)
+            data_box = RelvarCache.lookup('Data_Box', ID=tbf.Data_box, Pattern=tbf.Title_block_pattern)
+            if box_placement and data_box:
+                tb_field_placements.append(
+                    TitleBlockFieldPlacement(field=tbf, box_placement=box_placement, data_box=data_box)
+                )
+        if not tb_field_placements:
+            _logger.exception(f"No Box Placements in database for Title Block Pattern: {title_block_pattern}")
+            raise FlatlandDBException
+
+        # Get the margins to pad the Data Box content
+        # The same margins are applied to each Data Box in the same Scaled Title Block
+        # So we are looking only for one pair of h,v margin values to use throughout
+        scaled_title_block = RelvarCache.lookup('Scaled_Title_Block', Title_block_pattern=title_block_pattern,
+                                                Sheet_size_group=sheet.Size_group)
+        if not scaled_title_block:
+            _logger.error(f"No Scaled Title Block in database for Title Block Pattern: {title_block_pattern} and"
+                          f"Sheet Size Group: {sheet.Size_group}")
+            raise FlatlandDBException
+
+        # Get number of Regions per Data Box
+        num_regions = {}
+        for r in RelvarCache.select('Region', Title_block_pattern=title_block_pattern):
+            num_regions[r.Data_box] = num_regions.get(r.Data_box, 0) + 1
+        if not num_regions:
+            _logger.error(f"No Regions in database for Title Block Pattern: {title_block_pattern}")
+            raise FlatlandDBException
+
+        slots = tuple(
+            TitleBlockSlot(
+                metadata=place.field.Metadata, asset=place.data_box.Name,
+                position=Position(place.box_placement.X, place.box_placement.Y),
+                size=Rect_Size(height=place.box_placement.Height, width=place.box_placement.Width),
+                stack_order=place.field.Stack_order, regions=num_regions[place.field.Data_box],
+                align=box_alignment.get(place.data_box.H_align, HorizAlign.LEFT)
+            ) for place in tb_field_placements
+        )
+        return FrameTemplate(title_block_pattern=title_block_pattern, margin_h=scaled_title_block.Margin_h,
+                             margin_v=scaled_title_block.Margin_v, slots=slots,
+                             borders=titleblock_borders(frame=name, sheet=sheet, orientation=orientation),
+                             free_fields=free_fields)
+
     def render(self):
         """Draw the Frame on its Layer"""
         self.logger.info('Rendering frame')
@@ -234,4 +280,4 @@ class Frame:
 
         if self.Title_block_pattern:
             # Draw the title block box borders
-            draw_titleblock(frame=self.Name, sheet=self.Canvas.Sheet, orientation=self.Orientation, layer=self.Layer)
\ No newline at end of file
+            draw_titleblock(borders=self.Title_block_borders, layer=self.Layer)
\ No newline at end of file
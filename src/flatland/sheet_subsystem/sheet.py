@@ -7,11 +7,8 @@ import sys
 import logging
 # from flatland.database.flatlanddb import FlatlandDB as fdb
 
-# Model Integration
-from pyral.relation import Relation
-
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.exceptions import UnknownSheetSize, UnknownSheetGroup
 from flatland.datatypes.geometry_types import Rect_Size
 
@@ -40,22 +37,20 @@ class Sheet:
         :param name:  A standard sheet name in our database such as letter, tabloid, A3, etc
         """
         self.logger = logging.getLogger(__name__)
-        R = f"Name:<{name}>"
-        result = Relation.restrict(app, relation='Sheet', restriction=R)
-        if not result.body:
+        i = RelvarCache.lookup('Sheet', Name=name)
+        if not i:
             self.logger.error(f"Unsupported sheet size [{name}]")
             sys.exit(1)
-        i = result.body[0]
         self.Name = name
-        self.Size_group = i['Size_group']
-        if i['Units'] == 'in':
-            self.Size = Rect_Size(height=float(i['Height']), width=float(i['Width']))
-        elif i['Units'] == 'cm':
-            self.Size = Rect_Size(height=int(i['Height']), width=int(i['Width']))
+        self.Size_group = i.Size_group
+        if i.Units == 'in':
+            self.Size = Rect_Size(height=i.Height, width=i.Width)
+        elif i.Units == 'cm':
+            self.Size = Rect_Size(height=int(i.Height), width=int(i.Width))
         else:
-            self.logger.error(f"Unsupported sheet units [{i['Units']}]")
+            self.logger.error(f"Unsupported sheet units [{i.Units}]")
             sys.exit(1)
-        self.Units = i['Units']
+        self.Units = i.Units
 
 
     def __repr__(self):
@@ -4,14 +4,13 @@ titleblock_placement.py -  Title Block Placement class modeled in the Sheet Subs
 
 # System
 from collections import namedtuple
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
 
 # Model Integration
-from pyral.relation import Relation
 from tabletsvg.graphics.rectangle_se import RectangleSE
 
 # Flatland
-from flatland.names import app
+from flatland.database.relvar_cache import RelvarCache
 from flatland.datatypes.geometry_types import Position, Rect_Size
 
 if TYPE_CHECKING:
@@ -22,24 +21,27 @@ CompartmentBox = namedtuple("_CompartmentBox", "distance upper_box lower_box")
 BoxPlacement = namedtuple("_BoxPlacement", "placement size")
 
 
-def draw_titleblock(frame: str, sheet: 'Sheet', orientation: str, layer: 'Layer'):
+def titleblock_borders(frame: str, sheet: 'Sheet', orientation: str) -> Tuple[BoxPlacement, ...]:
     """
-    Draw each box in the title block on the specified layer
+    Place each box in the title block fitted to a frame on a sheet
 
-    :param layer:  Layer to draw the box on
     :param frame:  Title block is fitted to this frame
     :param sheet:  Frame is drawn on this Sheet (sizing info)
     :param orientation:  Orientation of the frame: 'portrait' or 'landscape'
-    :return:
+    :return: Lower left corner and size of each box
+    """
+    box_placements = RelvarCache.select('Box_Placement', Frame=frame, Sheet=sheet.Name, Orientation=orientation)
+    return tuple(BoxPlacement(placement=Position(bp.X, bp.Y), size=Rect_Size(bp.Height, bp.Width))
+                 for bp in box_placements)
+
+
+def draw_titleblock(borders: Tuple[BoxPlacement, ...], layer: 'Layer'):
+    """
+    Draw each box in the title block on the specified layer
+
+    :param borders:  Placed title block boxes, see titleblock_borders
+    :param layer:  Layer to draw the box on
     """
-    R = f"Frame:<{frame}>, Sheet:<{sheet.Name}>, Orientation:<{orientation}>"
-    result = Relation.restrict(db=app, relation='Box_Placement', restriction=R)
-    if not result.body:
-        pass
-    box_placements = result.body
-
-    for bp in box_placements:
-        pos = Position(int(bp['X']), int(bp['Y']))
-        size = Rect_Size(float(bp['Height']), float(bp['Width']))
+    for b in borders:
         RectangleSE.add(layer=layer, asset='block border',
-                        lower_left=pos, size=size)
+                        lower_left=b.placement, size=b.size)
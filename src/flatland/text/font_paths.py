@@ -0,0 +1,71 @@
+""" font_paths.py - Find the font file tabletsvg draws each text style with """
+
+# System
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Model Integration
+import yaml
+from tabletsvg.tablet_config import TabletConfig
+from tabletsvg.configuration.styles import TextStyle
+
+
+class FontPaths:
+    """
+    tabletsvg measures text with the font file configured for each typeface in its font_paths.yaml, with any
+    typefaces in the user's own font_paths.yaml taking precedence. Flatland measures text ahead of tabletsvg
+    and needs to know which font files it will use, so the configuration is read here the same way.
+    """
+    paths = None  # Font file configuration by typeface alias, loaded on first use
+    lock = threading.Lock()
+
+    @classmethod
+    def config(cls) -> dict:
+        """
+        Returns the font file configuration, loading it the first time
+        """
+        with cls.lock:
+            if cls.paths is None:
+                paths = {}
+                for font_paths_file in (TabletConfig.config_path / 'font_paths.yaml',
+                                        Path.home() / '.config' / TabletConfig.app_name / 'font_paths.yaml'):
+                    try:
+                        with open(font_paths_file, 'r') as f:
+                            paths.update(yaml.safe_load(f) or {})
+                    except FileNotFoundError:
+                        continue
+                cls.paths = paths
+            return cls.paths
+
+    @classmethod
+    def font_file(cls, style: TextStyle) -> Optional[Tuple[str, int]]:
+        """
+        Finds the font file of a text style
+
+        :return: The font file path and its index within a font collection, or None if it isn't configured
+        """
+        if style.weight == 'bold' and style.slant == 'italic':
+            variant = 'bold_italic'
+        elif style.weight == 'bold':
+            variant = 'bold'
+        elif style.slant == 'italic':
+            variant = 'italic'
+        else:
+            variant = 'normal'
+        typeface_config = cls.config().get(style.typeface)
+        if not typeface_config:
+            return None
+        # Use the requested variant, falling back to normal if it isn't specified
+        variant_config = typeface_config.get(variant) or typeface_config.get('normal')
+        if not variant_config or not variant_config.get('path'):
+            return None
+        return variant_config['path'], variant_config.get('index', 0)
+
+    @classmethod
+    def all_font_files(cls) -> list:
+        """
+        Returns the path of every configured font file, in configuration order
+        """
+        return [variant['path'] for typeface in cls.config().values() for variant in (typeface or {}).values()
+                if isinstance(variant, dict) and variant.get('path')]
@@ -0,0 +1,175 @@
+""" glyph_advances.py - Measure text by adding up the advance width of each character """
+
+# System
+import io
+import os
+import logging
+import hashlib
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional, List
+
+# Model Integration
+import numpy as np
+import PIL
+from PIL import ImageFont
+from tabletsvg.geometry_types import Rect_Size
+from tabletsvg.configuration.styles import TextStyle
+
+# Flatland
+from flatland.names import cache_dir, write_atomic
+from flatland.text.font_paths import FontPaths
+
+_logger = logging.getLogger(__name__)
+
+# Characters covered by the tables, any other character is measured by Pillow along with the rest of its line
+first_char, last_char = 32, 126
+table_width = last_char + 1
+
+
+class GlyphTable(NamedTuple):
+    """ Metrics of one font at one size """
+    advances: np.ndarray  # Advance width of each character by code point
+    kerning: np.ndarray  # Width adjustment of each pair of characters by first code point * table_width + second
+
+
+class FontMetrics(NamedTuple):
+    font: ImageFont.FreeTypeFont
+    table: Optional[GlyphTable]  # None if the font's layout engine doesn't simply add up advances
+
+
+class GlyphAdvances:
+    """
+    Pillow measures a line of text by laying out each of its characters, which adds up to a good part of the
+    time it takes to lay out a diagram. With its basic layout engine, the width of a line is the sum of
+    the advance widths of its characters plus the kerning between each pair, so for each font and size we
+    get those widths from Pillow once and then add them up for every line in a text block at once.
+
+    Text is measured exactly as tabletsvg measures it: Pillow's width truncated to a whole point if the
+    typeface's font file is configured in font_paths.yaml and found, and 0.6 of the font size per character
+    if not.
+    """
+    # Bump this whenever the saved form changes
+    format_version = 1
+    tables_dir = cache_dir / "glyphs"
+
+    fonts = {}  # FontMetrics, or None if the font file isn't available, by (font file, index, size)
+    lock = threading.Lock()
+
+    @classmethod
+    def metrics(cls, style: TextStyle) -> Optional[FontMetrics]:
+        """
+        Returns the font and glyph table of a text style, building the table the first time the font is used
+
+        :return: None if the style's font file isn't available
+        """
+        font_file = FontPaths.font_file(style)
+        if not font_file:
+            return None
+        key = (*font_file, style.size)
+        with cls.lock:
+            if key not in cls.fonts:
+                cls.fonts[key] = cls.load_font(*key)
+            return cls.fonts[key]
+
+    @classmethod
+    def load_font(cls, font_path: str, index: int, size: int) -> Optional[FontMetrics]:
+        if not Path(font_path).exists():
+            _logger.warning(f"Font file not found: {font_path}")
+            return None
+        try:
+            font = ImageFont.truetype(font_path, size=size, index=index)
+        except Exception as e:
+            _logger.warning(f"Could not load font {font_path} index={index}: {e}")
+            return None
+        if font.layout_engine != ImageFont.Layout.BASIC:
+            # A text shaping engine may substitute ligatures, so widths don't simply add up
+            return FontMetrics(font=font, table=None)
+        return FontMetrics(font=font, table=cls.glyph_table(font, font_path, index, size))
+
+    @classmethod
+    def glyph_table(cls, font: ImageFont.FreeTypeFont, font_path: str, index: int, size: int) -> GlyphTable:
+        """
+        Loads the glyph table of a font saved by an earlier run, or measures and saves it
+        """
+        h = hashlib.sha256(f"{cls.format_version}:{PIL.__version__}:{font_path}:{index}:{size}:"
+                           f"{os.stat(font_path).st_mtime_ns}".encode())
+        table_file = cls.tables_dir / f"{Path(font_path).stem}_{h.hexdigest()[:32]}.npz"
+        try:
+            with np.load(table_file) as saved:
+                return GlyphTable(advances=saved['advances'], kerning=saved['kerning'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            _logger.warning(f"Ignoring unreadable glyph table: {table_file} [{e}]")
+
+        chars = [chr(c) for c in range(first_char, last_char + 1)]
+        advances = np.zeros(table_width)
+        for c in chars:
+            advances[ord(c)] = font.getlength(c)
+        kerning = np.zeros(table_width * table_width)
+        for a in chars:
+            for b in chars:
+                kerning[ord(a) * table_width + ord(b)] = font.getlength(a + b) - advances[ord(a)] - advances[ord(b)]
+        table = GlyphTable(advances=advances, kerning=kerning)
+
+        try:
+            buffer = io.BytesIO()
+            np.savez(buffer, advances=advances, kerning=kerning)
+            write_atomic(table_file, buffer.getvalue())
+        except OSError as e:
+            # Not fatal, we'll just have to measure the font again next time
+            _logger.warning(f"Could not save glyph table: {table_file} [{e}]")
+        return table
+
+    @classmethod
+    def line_widths(cls, metrics: FontMetrics, text_block: List[str]) -> List[int]:
+        """
+        Measures each line of a text block, adding up the widths of all the tabled lines at once
+        """
+        widths = [0] * len(text_block)
+        tabled = []  # Indices of the lines made only of characters in the table
+        for i, line in enumerate(text_block):
+            if not line:
+                continue
+            if metrics.table is not None and line.isascii() and all(first_char <= ord(c) <= last_char for c in line):
+                tabled.append(i)
+            else:
+                widths[i] = int(metrics.font.getlength(line))
+        if tabled:
+            lines = [text_block[i] for i in tabled]
+            codes = np.frombuffer("".join(lines).encode('ascii'), dtype=np.uint8).astype(np.intp)
+            starts = np.cumsum([0] + [len(line) for line in lines[:-1]])
+            # Each character's width is its advance plus its kerning with the next character on the same line
+            pair_kerning = np.append(metrics.table.kerning[codes[:-1] * table_width + codes[1:]], 0.0)
+            pair_kerning[starts[1:] - 1] = 0.0
+            sums = np.add.reduceat(metrics.table.advances[codes] + pair_kerning, starts)
+            for i, w in zip(tabled, sums):
+                widths[i] = int(w)
+        return widths
+
+    @classmethod
+    def text_block_size(cls, style: TextStyle, text_block: List[str]) -> Rect_Size:
+        """
+        Determines the approximate dimensions of a rectangle bounding a block of text
+
+        :param style: Text style the block is drawn in
+        :param text_block: Lines of text
+        :return: The same size TextElement.text_block_size would return
+        """
+        font_height = style.size
+        spacing = font_height * style.spacing
+        inter_line_spacing = spacing - font_height
+
+        num_lines = len(text_block)
+        assert num_lines > 0, "Text block size requested for empty text block"
+        metrics = cls.metrics(style)
+        if metrics is None:
+            # Fixed approximation of 0.6 of the font size per character
+            widths = [int(style.size * 0.6 * len(line)) for line in text_block]
+        else:
+            widths = cls.line_widths(metrics, text_block)
+        block_width = max(widths)
+        block_height = num_lines * spacing - inter_line_spacing
+
+        return Rect_Size(width=block_width, height=block_height)
@@ -0,0 +1,83 @@
+""" text_fit.py - Wrap a line of text to fit a box """
+
+# System
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple, List
+
+# Model Integration
+from tabletsvg.geometry_types import Rect_Size
+
+# Flatland
+from flatland.text.text_block import TextBlock
+from flatland.text.text_metrics import TextMetrics
+
+
+class FittedText(NamedTuple):
+    lines: Tuple[str, ...]
+    size: Rect_Size
+
+
+class TextFit:
+    """
+    Metadata too wide for its Data Box is wrapped onto as few lines as will fit the box's width. Filling
+    each line with as many words as fit before starting the next gives the fewest lines possible, measuring
+    each line once per word added, whereas trying one TextBlock line count after another measures a whole
+    wrapped block each time. Since a TextBlock's evenly balanced lines look better, they are used instead
+    whenever they fit in that same number of lines.
+
+    Every line is measured through TextMetrics, which remembers each size it measures. And since the same
+    title, author or copyright text is fitted to the same Data Box on diagram after diagram, each result is
+    remembered as well, the least recently used ones being forgotten beyond max_entries.
+    """
+    max_entries = 4096
+    fits = OrderedDict()  # (text style, text, max width, max height, first line only): FittedText or None
+    lock = threading.Lock()
+
+    @classmethod
+    def fit(cls, presentation, asset: str, text: str, max_size: Rect_Size,
+            first_line_only: bool = False) -> Optional[FittedText]:
+        """
+        Wraps a line of text onto the fewest lines that fit the width of a box
+
+        :param presentation: The Presentation of the layer where the text is drawn
+        :param asset: Name of the text asset that selects the text style
+        :param text: A line of text
+        :param max_size: Largest text block that fits the box
+        :param first_line_only: Only the first of the wrapped lines is drawn, the rest are left out
+        :return: The lines drawn and their size, None if the text can't be wrapped to fit
+        """
+        key = (TextMetrics.text_style(presentation=presentation, asset=asset), text, max_size.width,
+               max_size.height, first_line_only)
+        with cls.lock:
+            if key in cls.fits:
+                cls.fits.move_to_end(key)
+                return cls.fits[key]
+
+        def size(lines: List[str]) -> Rect_Size:
+            return TextMetrics.text_block_size(presentation=presentation, asset=asset, text_block=lines)
+
+        # Fill each line with as many words as fit
+        lines = []
+        for word in text.split(' '):
+            if lines and size([f"{lines[-1]} {word}"]).width <= max_size.width:
+                lines[-1] = f"{lines[-1]} {word}"
+            else:
+                lines.append(word)
+
+        fitted = None
+        if all(size([line]).width <= max_size.width for line in lines):
+            balanced = TextBlock(line=text, wrap=len(lines)).text
+            if len(balanced) == len(lines) and size(balanced).width <= max_size.width:
+                lines = balanced
+            if first_line_only:
+                lines = lines[:1]
+            fitted = FittedText(lines=tuple(lines), size=size(lines))
+            if fitted.size.height > max_size.height:
+                fitted = None
+
+        with cls.lock:
+            cls.fits[key] = fitted
+            if len(cls.fits) > cls.max_entries:
+                cls.fits.popitem(last=False)
+        return fitted
@@ -0,0 +1,169 @@
+""" text_metrics.py - Remember the size of each measured text block """
+
+# System
+import os
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, List
+
+# Model Integration
+from tabletsvg import version as tablet_version
+from tabletsvg.styledb import StyleDB
+from tabletsvg.configuration.styles import TextStyle
+from tabletsvg.geometry_types import Rect_Size
+
+# Flatland
+from flatland.names import cache_dir, write_atomic
+from flatland.text.font_paths import FontPaths
+from flatland.text.glyph_advances import GlyphAdvances
+
+_logger = logging.getLogger(__name__)
+
+
+class TextMetricsStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+
+
+class TextMetrics:
+    """
+    Measuring text means looking up the font metrics of every character, and the same class names, attribute
+    lists and relationship phrases are measured over and over, by each node, stem and connector name and
+    again by each diagram in a batch. So each text block size is remembered by the text style it is drawn in
+    and its lines of text, the least recently used sizes being forgotten beyond max_entries.
+
+    The sizes can also be saved so that the next run starts with them. They are saved along with the font
+    configuration they were measured with and ignored if it has since changed.
+    """
+    # Bump this whenever the saved form changes
+    format_version = 1
+
+    max_entries = 20000
+    persist = True  # Load sizes saved by earlier runs and save any new ones
+    metrics_file = cache_dir / "text_metrics.pickle"
+
+    sizes = OrderedDict()  # Text block size by (typeface, size, slant, weight, spacing, lines)
+    hits = 0
+    misses = 0
+    lock = threading.Lock()
+    loaded = False  # True once any saved sizes have been loaded
+    unsaved = 0  # Sizes measured since the last save
+
+    @classmethod
+    def text_block_size(cls, presentation, asset: str, text_block: List[str]) -> Rect_Size:
+        """
+        Returns the size of a block of text drawn with an asset, as TextElement.text_block_size does
+
+        Sizes not yet remembered are measured with glyph advance tables, see GlyphAdvances
+
+        :param presentation: The Presentation of the layer where the text is drawn
+        :param asset: Name of the text asset that selects the text style
+        :param text_block: Lines of text
+        :return: The approximate size of the text block
+        """
+        style = cls.text_style(presentation=presentation, asset=asset)
+        # Color doesn't change the size, so text in every color shares the same entry
+        key = (style.typeface, style.size, style.slant, style.weight, style.spacing, tuple(text_block))
+        with cls.lock:
+            if cls.persist and not cls.loaded:
+                cls.load()
+            size = cls.sizes.get(key)
+            if size is not None:
+                cls.sizes.move_to_end(key)
+                cls.hits += 1
+                return size
+            cls.misses += 1
+        size = GlyphAdvances.text_block_size(style=style, text_block=text_block)
+        with cls.lock:
+            cls.sizes[key] = size
+            cls.unsaved += 1
+            if len(cls.sizes) > cls.max_entries:
+                cls.sizes.popitem(last=False)
+        return size
+
+    @staticmethod
+    def text_style(presentation, asset: str) -> TextStyle:
+        """
+        Returns the style of text drawn with an asset
+
+        :param presentation: The Presentation of the layer where the text is drawn
+        :param asset: Name of the text asset that selects the text style
+        :return: The text style
+        """
+        return StyleDB.text_style[presentation.Text_presentation[asset]['text style']]
+
+    @classmethod
+    def stats(cls) -> TextMetricsStats:
+        return TextMetricsStats(hits=cls.hits, misses=cls.misses, entries=len(cls.sizes))
+
+    @classmethod
+    def clear(cls):
+        """
+        Forgets every size and resets the counters, without touching any saved sizes
+        """
+        with cls.lock:
+            cls.sizes.clear()
+            cls.hits = cls.misses = cls.unsaved = 0
+            cls.loaded = False
+
+    @classmethod
+    def font_fingerprint(cls) -> str:
+        """
+        Identifies the font configuration text is measured with
+
+        That is the tabletsvg version, its font path configuration, and the presence and modification
+        time of each font file it names, since text is measured differently once a missing font is installed.
+        """
+        h = hashlib.sha256(f"{cls.format_version}:{tablet_version}\n".encode())
+        h.update(repr(sorted(FontPaths.config().items())).encode())
+        for font_file in FontPaths.all_font_files():
+            try:
+                h.update(f"{font_file}:{os.stat(font_file).st_mtime_ns}\n".encode())
+            except OSError:
+                h.update(f"{font_file}:missing\n".encode())
+        return h.hexdigest()
+
+    @classmethod
+    def load(cls):
+        """
+        Adds the sizes saved by earlier runs, if they were measured with the current font configuration
+        """
+        cls.loaded = True
+        try:
+            with open(cls.metrics_file, 'rb') as f:
+                saved = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            _logger.warning(f"Ignoring unreadable text metrics: {cls.metrics_file} [{e}]")
+            return
+        if not isinstance(saved, dict) or saved.get('fingerprint') != cls.font_fingerprint():
+            _logger.info("Saved text metrics were measured with other fonts, measuring again")
+            return
+        for key, size in saved['sizes'].items():
+            cls.sizes.setdefault(key, Rect_Size(*size))
+        _logger.info(f"{len(saved['sizes'])} text sizes loaded from: {cls.metrics_file}")
+
+    @classmethod
+    def save(cls):
+        """
+        Saves the sizes for later runs if any have been measured since they were last saved
+        """
+        with cls.lock:
+            if not cls.persist or not cls.unsaved:
+                return
+            sizes = {key: tuple(size) for key, size in cls.sizes.items()}
+            cls.unsaved = 0
+        try:
+            data = pickle.dumps({'fingerprint': cls.font_fingerprint(), 'sizes': sizes},
+                                protocol=pickle.HIGHEST_PROTOCOL)
+            write_atomic(cls.metrics_file, data)
+        except OSError as e:
+            # Not fatal, the text will just be measured again next time
+            _logger.warning(f"Could not save text metrics: {cls.metrics_file} [{e}]")
+            return
+        _logger.info(f"{len(sizes)} text sizes saved: {cls.metrics_file}")
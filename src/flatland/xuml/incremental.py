@@ -0,0 +1,233 @@
+""" incremental.py - Rebuild a diagram reusing whatever an edit to its model or layout left unchanged """
+
+# System
+import logging
+from pathlib import Path
+from typing import NamedTuple, Optional, Dict, List, Tuple, Callable
+
+# Model Integration
+from mls_parser.layout_visitor import DiagramLayout
+from mls_parser.exceptions import LayoutParseError as MLS_LayoutParseError
+
+# Flatland
+from flatland.instrumentation import Instrumentation
+from flatland.xuml.model_parsers import ModelParsers
+from flatland.connector_subsystem.stem import Stem
+from flatland.connector_subsystem.branch import Branch
+
+_logger = logging.getLogger(__name__)
+
+
+class LayoutLines(NamedTuple):
+    """ Layout text split into its sections, each line stripped of comments and trailing spaces """
+    header: Tuple[str, ...]
+    nodes: List[str]
+    connectors: Optional[List[str]]  # None if there is no connector block
+
+
+class ParsedLayout(NamedTuple):
+    """ A parsed layout along with the parse of each of its node and connector lines """
+    text: str
+    content: DiagramLayout
+    lines: Optional[LayoutLines]  # None if the parse could not be matched up with the lines
+    node_specs: Dict[str, dict]  # Parsed node spec by node line
+    connector_specs: Dict[str, dict]  # Parsed connector layout by connector line
+    reparsed: Optional[int]  # Number of lines parsed incrementally, None if the whole layout was parsed
+
+
+def split_layout(text: str) -> Optional[LayoutLines]:
+    """
+    Splits layout text into its layout spec, node and connector lines. Blank and comment lines are dropped
+    since the grammar ignores them.
+
+    :param text: Layout file text
+    :return: The lines of each section or None if the text doesn't have the expected sections
+    """
+    header, nodes, connectors = [], [], None
+    section = header
+    for line in text.splitlines():
+        content = line.split('//', 1)[0].rstrip(' ')
+        if not content:
+            continue
+        if content == 'nodes' and section is header:
+            section = nodes
+        elif content == 'connectors' and section is nodes:
+            section = connectors = []
+        else:
+            section.append(content)
+    if not nodes or connectors == []:
+        return None
+    return LayoutLines(header=tuple(header), nodes=nodes, connectors=connectors)
+
+
+def node_key(spec: dict) -> str:
+    """ The node placement key of a parsed node spec, same as the layout visitor assigns """
+    dup_num = spec.get('duplicate')
+    return spec['node_name'] if not dup_num else f"{spec['node_name']}_{dup_num}"
+
+
+def parse_layout(file_input: Path, previous: Optional[ParsedLayout] = None, use_cache: bool = True) -> ParsedLayout:
+    """
+    Parses a layout file. If the previous parse of the file is supplied and the layout spec at the top
+    is unchanged, only those node and connector lines that weren't in the previous layout are parsed.
+
+    :param file_input: Path to the layout file
+    :param previous: Earlier parse of the same layout
+    :param use_cache: If false, the parse cache is bypassed when the whole layout is parsed
+    """
+    text = ModelParsers.read('mls', file_input)
+    if previous and previous.text == text:
+        return previous
+    lines = split_layout(text)
+
+    if previous and previous.lines and lines and lines.header == previous.lines.header:
+        new_nodes = [n for n in dict.fromkeys(lines.nodes) if n not in previous.node_specs]
+        new_connectors = [c for c in dict.fromkeys(lines.connectors or []) if c not in previous.connector_specs]
+        node_specs = {n: previous.node_specs[n] for n in lines.nodes if n in previous.node_specs}
+        connector_specs = {c: previous.connector_specs[c] for c in lines.connectors or []
+                           if c in previous.connector_specs}
+        try:
+            if new_nodes or new_connectors:
+                # Parse a layout of just the new lines, the grammar requires at least one node
+                partial = list(lines.header) + ['nodes'] + (new_nodes or lines.nodes[:1])
+                if new_connectors:
+                    partial += ['connectors'] + new_connectors
+                content = ModelParsers.parse_text('mls', '\n'.join(partial) + '\n', Path(file_input).name)
+                parsed_nodes = list(content.node_placement.values())
+                parsed_connectors = content.connector_placement or []
+                if len(parsed_nodes) != len(new_nodes or lines.nodes[:1]) or \
+                        len(parsed_connectors) != len(new_connectors):
+                    raise ValueError  # Some new lines place the same node, so the full parse decides
+                node_specs.update(zip(new_nodes, parsed_nodes))
+                connector_specs.update(zip(new_connectors, parsed_connectors))
+        except (MLS_LayoutParseError, ValueError):
+            pass  # Parse the whole layout so that any error is reported against the actual file
+        else:
+            node_placement = {node_key(node_specs[n]): node_specs[n] for n in lines.nodes}
+            connector_placement = [connector_specs[c] for c in lines.connectors] if lines.connectors else None
+            content = DiagramLayout(layout_spec=previous.content.layout_spec, node_placement=node_placement,
+                                    connector_placement=connector_placement)
+            _logger.info(f"Parsed {len(new_nodes) + len(new_connectors)} changed layout lines")
+            return ParsedLayout(text=text, content=content, lines=lines, node_specs=node_specs,
+                                connector_specs=connector_specs, reparsed=len(new_nodes) + len(new_connectors))
+
+    content = ModelParsers.parse_cached('mls', text, Path(file_input).name, use_cache)
+    parsed_nodes = list(content.node_placement.values())
+    parsed_connectors = content.connector_placement or []
+    if lines and len(parsed_nodes) == len(lines.nodes) and len(parsed_connectors) == len(lines.connectors or []):
+        return ParsedLayout(text=text, content=content, lines=lines, node_specs=dict(zip(lines.nodes, parsed_nodes)),
+                            connector_specs=dict(zip(lines.connectors or [], parsed_connectors)), reparsed=None)
+    return ParsedLayout(text=text, content=content, lines=None, node_specs={}, connector_specs={}, reparsed=None)
+
+
+class DrawnConnectors(NamedTuple):
+    """ The connectors drawn by one call of a diagram builder draw method """
+    connectors: list
+    node_geometry: dict  # Type, position and size of each node they attach to, as they were when drawn
+
+
+def node_refs(layout) -> Optional[set]:
+    """
+    Collects every node referenced in connector layout data
+
+    :param layout: Parsed connector layout, possibly along with the model data drawn with it
+    :return: Referenced node names, or None if a connector runs along grid lanes. Those add rows and columns
+    to the grid as they are drawn, so they are never reused.
+    """
+    refs = set()
+    pending = [layout]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, dict):
+            if item.get('paths') or item.get('path'):
+                return None
+            if 'node_ref' in item:
+                refs.add(item['node_ref'])
+            if 'leaf_faces' in item:
+                # Leaf faces of a branch are keyed by node name
+                refs.update(item['leaf_faces'].keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+    return refs
+
+
+def stems(item):
+    """ Yields each stem of a connector, including those in its branches """
+    for v in vars(item).values():
+        for member in v if isinstance(v, (list, set, tuple)) else [v]:
+            if isinstance(member, Stem):
+                yield member
+            elif isinstance(member, Branch):
+                yield from stems(member)
+
+
+class ConnectorReuse:
+    """
+    Draws connectors for a diagram builder, taking those connectors the previous build of the diagram drew
+    with the same model and layout data between nodes that are where they were then.
+
+    Connectors are laid out entirely as they are created, so a reused connector only needs to be moved onto
+    the new diagram and its stems attached to the new nodes.
+    """
+
+    def __init__(self, diagram, nodes: dict, previous: Optional['ConnectorReuse'] = None):
+        """
+        :param diagram: The Diagram being built
+        :param nodes: The diagram nodes by name
+        :param previous: Connectors of the previous build
+        """
+        self.Diagram = diagram
+        self.Nodes = nodes
+        self.Previous = previous
+        self.Drawn = {}  # DrawnConnectors by draw call
+        self.Reused = 0
+        self.Node_moves = None  # Each previous node by id mapped to its counterpart in this build
+
+    def node_geometry(self, refs: set) -> Optional[dict]:
+        geometry = {}
+        for r in refs:
+            node = self.Nodes.get(r)
+            if not node:
+                return None
+            geometry[r] = (node.Node_type_name, node.Canvas_position, node.Size)
+        return geometry
+
+    def draw(self, draw: Callable, **args):
+        """
+        Calls a builder draw method unless the previous build made the same call
+
+        :param draw: Draw method, creating one or more connectors from its keyword arguments
+        """
+        # Each connector is timed under the name of its relationship or event, the first name in its arguments
+        label = next((v for v in args.values() if isinstance(v, str)), draw.__name__)
+        with Instrumentation.span("connector", label):
+            key = (draw.__name__, repr(sorted(args.items())))
+            refs = node_refs(list(args.values()))
+            geometry = self.node_geometry(refs) if refs else None
+            drawn = self.Previous.Drawn.get(key) if self.Previous and geometry else None
+            if drawn and drawn.node_geometry == geometry:
+                if self.Node_moves is None:
+                    self.Node_moves = {id(node): self.Nodes[name] for name, node in self.Previous.Nodes.items()
+                                       if name in self.Nodes}
+                for c in drawn.connectors:
+                    c.Diagram = self.Diagram
+                    for s in stems(c):
+                        s.Node = self.Node_moves.get(id(s.Node), s.Node)
+                    self.Diagram.Grid.Connectors.append(c)
+                    c.index_segments()
+                self.Drawn[key] = drawn
+                self.Reused += len(drawn.connectors)
+                return
+            already_drawn = len(self.Diagram.Grid.Connectors)
+            draw(**args)
+            if geometry:
+                self.Drawn[key] = DrawnConnectors(connectors=self.Diagram.Grid.Connectors[already_drawn:],
+                                                  node_geometry=geometry)
+
+    def finish(self):
+        """
+        Lets go of the previous build once every connector is drawn
+        """
+        self.Previous = None
+        self.Node_moves = None
@@ -0,0 +1,141 @@
+""" model_parsers.py - Shared access to the model and layout parsers """
+
+# System
+import threading
+from pathlib import Path
+from typing import NamedTuple, Any, Optional
+
+# Model Integration
+from arpeggio import visit_parse_tree, NoMatch
+from arpeggio.cleanpeg import ParserPEG
+from xcm_parser.class_model_parser import ClassModelParser
+from xcm_parser.class_model_visitor import SubsystemVisitor
+from xcm_parser.exceptions import ModelParseError as XCM_ModelParseError
+from xcm_parser.exceptions import ModelInputFileOpen as XCM_ModelInputFileOpen
+from xsm_parser.state_model_parser import StateModelParser
+from xsm_parser.state_model_visitor import StateModelVisitor
+from xsm_parser.exceptions import ModelParseError as XSM_ModelParseError
+from xsm_parser.exceptions import ModelInputFileOpen as XSM_ModelInputFileOpen
+from mls_parser.layout_parser import LayoutParser
+from mls_parser.layout_visitor import LayoutVisitor
+from mls_parser.exceptions import LayoutParseError as MLS_LayoutParseError
+from mls_parser.exceptions import LayoutInputFileOpen as MLS_LayoutInputFileOpen
+
+# Flatland
+from flatland.xuml.parse_cache import ParseCache
+
+# The xcm, xsm and mls parsers hold the text being parsed in class attributes, so a diagram builder
+# must hold this lock while parsing to keep another thread's file from being swapped in underneath it
+parser_lock = threading.Lock()
+
+
+class Grammar(NamedTuple):
+    parser: type  # Parser class of the package, naming its grammar file and root rule
+    visitor: type
+    parse_error: type
+    input_open_error: type
+    distribution: str  # Installed package name
+
+
+grammars = {
+    'xcm': Grammar(parser=ClassModelParser, visitor=SubsystemVisitor,
+                   parse_error=XCM_ModelParseError, input_open_error=XCM_ModelInputFileOpen,
+                   distribution='xcm-parser'),
+    'xsm': Grammar(parser=StateModelParser, visitor=StateModelVisitor,
+                   parse_error=XSM_ModelParseError, input_open_error=XSM_ModelInputFileOpen,
+                   distribution='xsm-parser'),
+    'mls': Grammar(parser=LayoutParser, visitor=LayoutVisitor,
+                   parse_error=MLS_LayoutParseError, input_open_error=MLS_LayoutInputFileOpen,
+                   distribution='mls-parser'),
+}
+
+
+class ParsedFile(NamedTuple):
+    """ A parsed model or layout file along with the text it was parsed from """
+    text: str
+    content: Any
+
+
+class ModelParsers:
+    """
+    Each parser package builds a new arpeggio parser from its grammar file every time it parses a file,
+    which takes longer than the parse itself. So here we build each one just once and then parse with
+    it the same way the package would, raising the same exceptions.
+    """
+    compiled = {}  # Arpeggio parser by grammar name
+
+    @classmethod
+    def read(cls, grammar: str, file_input: Path) -> str:
+        """
+        Returns the text of a model or layout file
+
+        :param grammar: xcm, xsm or mls
+        :param file_input: Path to the file
+        """
+        try:
+            with open(file_input, 'r') as f:
+                # At least one newline at end simplifies grammar rules
+                return f.read() + '\n'
+        except OSError:
+            raise grammars[grammar].input_open_error(file_input)
+
+    @classmethod
+    def parse_text(cls, grammar: str, text: str, file_name: str) -> Any:
+        """
+        Parses model or layout text
+
+        :param grammar: xcm, xsm or mls
+        :param text: Text to parse, ending with a newline
+        :param file_name: Name of the file to report in any parse error
+        :return: The visitor's result for the text
+        """
+        g = grammars[grammar]
+        with parser_lock:
+            parser = cls.compiled.get(grammar)
+            if not parser:
+                # We interpret newlines and indents in our grammars, so whitespace must be preserved
+                parser = ParserPEG(g.parser.grammar_file.read_text(), g.parser.root_rule_name, skipws=False)
+                cls.compiled[grammar] = parser
+            try:
+                parse_tree = parser.parse(text)
+            except NoMatch as e:
+                raise g.parse_error(file_name, e) from None
+            return visit_parse_tree(parse_tree, g.visitor(debug=False))
+
+    @classmethod
+    def parse_cached(cls, grammar: str, text: str, file_name: str, use_cache: bool = True) -> Any:
+        """
+        Parses the entire text of a model or layout file unless the same text was parsed before
+        and its result saved in the parse cache
+
+        :param grammar: xcm, xsm or mls
+        :param text: Text to parse, ending with a newline
+        :param file_name: Name of the file to report in any parse error
+        :param use_cache: If false, the text is parsed and nothing is saved
+        :return: The visitor's result for the text
+        """
+        if not use_cache:
+            return cls.parse_text(grammar, text, file_name)
+        g = grammars[grammar]
+        key = ParseCache.key(grammar, ParseCache.parser_id(grammar, g.parser, g.visitor, g.distribution), text)
+        content = ParseCache.load(grammar, key)
+        if content is None:
+            content = cls.parse_text(grammar, text, file_name)
+            ParseCache.save(grammar, key, content)
+        return content
+
+    @classmethod
+    def parse_file(cls, grammar: str, file_input: Path, previous: Optional[ParsedFile] = None,
+                   use_cache: bool = True) -> ParsedFile:
+        """
+        Parses a model or layout file
+
+        :param grammar: xcm, xsm or mls
+        :param file_input: Path to the file
+        :param previous: The same file as parsed earlier, reused if the text has not changed since
+        :param use_cache: If false, the parse cache is bypassed
+        """
+        text = cls.read(grammar, file_input)
+        if previous and previous.text == text:
+            return previous
+        return ParsedFile(text=text, content=cls.parse_cached(grammar, text, Path(file_input).name, use_cache))
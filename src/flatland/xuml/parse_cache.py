@@ -0,0 +1,142 @@
+""" parse_cache.py - Save parsed model and layout files for reuse by later runs """
+
+# System
+import io
+import sys
+import pickle
+import logging
+import hashlib
+import importlib
+from pathlib import Path
+from importlib.metadata import version as package_version, PackageNotFoundError
+from typing import Any, Optional
+
+# Flatland
+from flatland.names import cache_dir, write_atomic
+
+_logger = logging.getLogger(__name__)
+
+
+def named_tuple(module: str, name: str, fields: tuple):
+    """ Rebuilds a named tuple saved by CachePickler """
+    return getattr(importlib.import_module(module), name)(*fields)
+
+
+class CachePickler(pickle.Pickler):
+    """
+    Some parser result named tuples are given a type name that differs from the module attribute naming them,
+    so pickle can't find them by name. We save those by their attribute name instead.
+    """
+
+    def reducer_override(self, obj):
+        cls = type(obj)
+        if isinstance(obj, tuple) and hasattr(cls, '_fields'):
+            module = sys.modules.get(cls.__module__)
+            if getattr(module, cls.__name__, None) is not cls:
+                for name, value in vars(module).items():
+                    if value is cls:
+                        return named_tuple, (cls.__module__, name, tuple(obj))
+        return NotImplemented
+
+
+class ParseCache:
+    """
+    Parse results of model and layout files, saved on disk
+
+    Parsing is most of the work of drawing a diagram, and usually only one of its two files changed since
+    it was last drawn. So each parse result is saved under a key computed from the text that was parsed,
+    the version of the parser package and the content of its grammar and visitor. A file parsed before,
+    in any directory, is then loaded instead of parsed. A new parser yields a new key, so a stale result
+    is never loaded.
+    """
+    # Bump this whenever the saved form changes
+    format_version = 1
+
+    parse_dir = cache_dir / "parse"
+    max_entries = 1000  # Oldest results are removed beyond this many
+
+    parser_ids = {}  # Parser id by grammar name, computed once
+
+    @classmethod
+    def parser_id(cls, grammar: str, parser: type, visitor: type, distribution: str) -> str:
+        """
+        Identifies the parser package version, grammar and visitor used for a kind of file
+
+        :param grammar: xcm, xsm or mls
+        :param parser: Parser class of the package, naming its grammar file
+        :param visitor: Visitor class of the package, building the parse result
+        :param distribution: Name of the installed parser package
+        """
+        pid = cls.parser_ids.get(grammar)
+        if not pid:
+            try:
+                v = package_version(distribution)
+            except PackageNotFoundError:
+                v = "unknown"
+            # A package installed for development can change without a new version
+            h = hashlib.sha256(Path(parser.grammar_file).read_bytes())
+            h.update(Path(sys.modules[visitor.__module__].__file__).read_bytes())
+            pid = f"{v}:{h.hexdigest()}"
+            cls.parser_ids[grammar] = pid
+        return pid
+
+    @classmethod
+    def key(cls, grammar: str, parser_id: str, text: str) -> str:
+        """
+        Computes the key of a parse result
+
+        :param grammar: xcm, xsm or mls
+        :param parser_id: Identifies the parser, see parser_id
+        :param text: The text that was parsed
+        :return: A hex digest string
+        """
+        h = hashlib.sha256()
+        h.update(f"{cls.format_version}:{grammar}:{parser_id}\n".encode())
+        h.update(text.encode())
+        return h.hexdigest()
+
+    @classmethod
+    def path(cls, grammar: str, key: str) -> Path:
+        return cls.parse_dir / f"{grammar}_{key[:32]}.pickle"
+
+    @classmethod
+    def load(cls, grammar: str, key: str) -> Optional[Any]:
+        """
+        Loads the parse result saved under the key, if there is one
+
+        :return: The parse result or None if the text must be parsed
+        """
+        result_file = cls.path(grammar, key)
+        try:
+            with open(result_file, 'rb') as f:
+                result = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Truncated or written by some other version of a parser package, either way we parse again
+            _logger.warning(f"Ignoring unreadable parse result: {result_file} [{e}]")
+            result_file.unlink(missing_ok=True)
+            return None
+        _logger.info(f"Parse result loaded from: {result_file}")
+        return result
+
+    @classmethod
+    def save(cls, grammar: str, key: str, result: Any):
+        """
+        Saves a parse result under the key, removing the oldest results if there are too many
+        """
+        result_file = cls.path(grammar, key)
+        try:
+            buffer = io.BytesIO()
+            CachePickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(result)
+            write_atomic(result_file, buffer.getvalue())
+            saved = list(cls.parse_dir.glob("*.pickle"))
+            if len(saved) > cls.max_entries:
+                saved.sort(key=lambda p: p.stat().st_mtime)
+                for stale_file in saved[:len(saved) - cls.max_entries]:
+                    stale_file.unlink(missing_ok=True)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            # Not fatal, we'll just have to parse the file again next time
+            _logger.warning(f"Could not save parse result: {result_file} [{e}]")
+            return
+        _logger.info(f"Parse result saved: {result_file}")
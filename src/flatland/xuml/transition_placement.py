@@ -0,0 +1,81 @@
+""" transition_placement.py - Connector placements of a state machine layout indexed by state and event """
+
+# System
+from typing import Dict, List, Tuple, Set
+
+
+class TransitionPlacement:
+    """
+    The connector placements of a state machine layout sorted by kind of stem and indexed so that each
+    transition finds its placement in a single lookup, however many transitions leave its state.
+
+    A transition placement has a tstem on the state the transition leaves, an initial transition placement
+    has a named ustem on the initial state and a deletion placement has an unnamed ustem on the deletion state.
+    """
+
+    def __init__(self, connector_placement: List[Dict]):
+        """
+        Index each connector placement in the layout
+
+        :param connector_placement: Connector placements parsed from the layout
+        """
+        self.transitions: Dict[Tuple[str, str], Dict] = {}  # By (from state, event name)
+        self.initial_transitions: Dict[Tuple[str, str], Dict] = {}  # By (initial state, event name)
+        self.deletions: Dict[str, Dict] = {}  # By deletion state
+        self.duplicates: List[str] = []  # Descriptions of the placements ignored since they repeat an earlier one
+
+        for c in connector_placement:
+            tstem = c.get('tstem')
+            if tstem:
+                index, key, kind = self.transitions, (tstem['node_ref'], c.get('cname')), 'transition'
+            elif c.get('cname'):
+                index, key, kind = self.initial_transitions, (c['ustem']['node_ref'], c['cname']), 'initial transition'
+            else:
+                index, key, kind = self.deletions, c['ustem']['node_ref'], 'deletion'
+            if key in index:
+                # The first placement has always been the one drawn
+                self.duplicates.append(f"{kind} {key}")
+                continue
+            index[key] = c
+
+    def validate(self, states, initial_states: Dict[str, str], events) -> List[str]:
+        """
+        Finds every transition in the model that can't be drawn, either because its event is undefined
+        or because the layout doesn't place it
+
+        :param states: State blocks of the state model
+        :param initial_states: Event name of each initial transition by the state it enters
+        :param events: Names of the events defined in the state model
+        :return: An error message for each transition that can't be drawn
+        """
+        placed = self.states()
+        errors = []
+        for state_block in states:
+            state = state_block.state.name
+            if state not in placed:
+                continue  # Must be a final, non-deletion state with no transitions to draw
+            evname = initial_states.get(state)
+            if evname and (state, evname) not in self.initial_transitions:
+                errors.append(f'Initial transition [{evname}] into state [{state}] does not name any connector '
+                              f'in layout.')
+            if state_block.state.deletion and state not in self.deletions:
+                errors.append(f'Deletion state [{state}] has no deletion stem in layout.')
+            for t in state_block.transitions or []:
+                if len(t) != 2:  # CH or IG
+                    continue
+                evname = t[0]
+                if evname not in events:
+                    # An event is being referenced in some state of the model file that does not correspond
+                    # to any event defined in the event specification list near the top of the file
+                    errors.append(f'Undefined event [{evname}] used on transition from state [{state}]. '
+                                  f'Check event list in model file.')
+                elif (state, evname) not in self.transitions:
+                    errors.append(f'Model event [{evname}] on transition from state [{state}] does not name any '
+                                  f'connector in layout.')
+        return errors
+
+    def states(self) -> Set[str]:
+        """
+        Returns the name of each state with at least one placement
+        """
+        return {k[0] for k in self.transitions} | {k[0] for k in self.initial_transitions} | set(self.deletions)
@@ -6,16 +6,19 @@ xUML_class_diagram.py – Generates an xuml diagram for an xuml model using the
 import sys
 import logging
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from collections import namedtuple
 
 # Model Integration
 from xcm_parser.exceptions import ModelInputFileOpen as XCM_ModelInputFileOpen
-from xcm_parser.class_model_parser import ClassModelParser
-from mls_parser.layout_parser import LayoutParser
 from mls_parser.exceptions import LayoutInputFileOpen as MLS_LayoutInputFileOpen
 
 # Flatland
+from flatland.xuml.model_parsers import ModelParsers
+from flatland.instrumentation import Instrumentation
+from flatland.text.text_metrics import TextMetrics
+from flatland.configuration.config_loader import ConfigLoader
+from flatland.xuml.incremental import parse_layout, ConnectorReuse
 from flatland.datatypes.connection_types import NodeFace
 from flatland.exceptions import (ModelParseError, LayoutParseError, MultipleFloatsInSameBranch, FlatlandModelException)
 from flatland.node_subsystem.canvas import Canvas
@@ -30,7 +33,7 @@ from flatland.datatypes.command_interface import (New_Trunk_Branch, New_Offshoot
                                                   New_Branch_Set)
 from flatland.connector_subsystem.straight_binary_connector import StraightBinaryConnector
 from flatland.connector_subsystem.bending_binary_connector import BendingBinaryConnector
-from flatland.datatypes.connection_types import ConnectorName, OppositeFace, StemName, NodeFace
+from flatland.datatypes.connection_types import ConnectorName, OppositeFace, StemName, NodeFace, Orientation
 from flatland.text.text_block import TextBlock
 
 BranchLeaves = namedtuple('BranchLeaves', 'leaf_stems local_graft next_graft floating_leaf_stem')
@@ -38,106 +41,173 @@ BranchLeaves = namedtuple('BranchLeaves', 'leaf_stems local_graft next_graft flo
 class XumlClassDiagram:
     """
     Draws an Executable UML Class Diagram
+
+    All state is held by the instance, so any number of diagrams may be built at once, each on its own thread
+    if need be. Call build() to lay out the diagram and then render() to output it.
     """
 
-    @classmethod
-    def __init__(cls, xuml_model_path: Path, flatland_layout_path: Path, diagram_file_path: Path,
-                 show_grid: bool, show_rulers: bool, nodes_only: bool, no_color: bool, show_ref_types: bool):
+    def __init__(self, xuml_model_path: Path, flatland_layout_path: Path, diagram_file_path: Path,
+                 show_grid: bool, show_rulers: bool, nodes_only: bool, no_color: bool, show_ref_types: bool,
+                 no_parse_cache: bool = False):
         """
         :param xuml_model_path: Path to the model (.xcm) file
         :param flatland_layout_path: Path to the layotu (.mls) file
-        :param diagram_file_path: Path of the generated PDF
+        :param diagram_file_path: Path of the generated diagram, the suffix selects the format
         :param show_grid: If true, a grid is drawn showing node rows and columns
+        :param show_rulers: If true, a ruler grid is drawn to check canvas positions
         :param nodes_only: If true, only nodes are drawn, no connectors
         :param no_color: If true, the canvas background will be white, overriding any specified background color
-        :param ref_attr_types: If true, display attribute types for referential attributes also
+        :param show_ref_types: If true, display attribute types for referential attributes also
+        :param no_parse_cache: If true, the model and layout are always parsed rather than loaded from the parse cache
 
         """
-        cls.logger = logging.getLogger(__name__)
-        cls.xuml_model_path = xuml_model_path
-        cls.flatland_layout_path = flatland_layout_path
-        cls.diagram_file_path = diagram_file_path
-        cls.show_grid = show_grid
-        cls.show_rulers = show_rulers
-        cls.no_color = no_color
-        cls.show_ref_types = show_ref_types
+        self.logger = logging.getLogger(__name__)
+        self.xuml_model_path = xuml_model_path
+        self.flatland_layout_path = flatland_layout_path
+        self.diagram_file_path = diagram_file_path
+        self.show_grid = show_grid
+        self.show_rulers = show_rulers
+        self.nodes_only = nodes_only
+        self.no_color = no_color
+        self.show_ref_types = show_ref_types
+        self.no_parse_cache = no_parse_cache
+
+        # Set when the diagram is built
+        self.model = None
+        self.layout = None
+        self.flatland_canvas = None
+        self.frame = None
+        self.nodes = {}
+        self.connectors = None
+
+        # Kept from one build to the next so that a rebuild can reuse whatever hasn't changed
+        self.model_file = None
+        self.layout_file = None
+
+    def build(self):
+        """
+        Parses the model and layout files and lays out the diagram on a new canvas
 
+        When called again to pick up edits, only the changed parts of the files are parsed and only those
+        connectors attached to changed or moved nodes are laid out again.
+        """
         # First we parse both the model and layout files
+        previous_spec = self.layout.layout_spec if self.layout else None
 
         # Model
-        cls.logger.info("Parsing the class model")
+        self.logger.info("Parsing the class model")
         try:
-            cls.model = ClassModelParser.parse_file(file_input=cls.xuml_model_path, debug=False)
+            with Instrumentation.span("model parse"):
+                self.model_file = ModelParsers.parse_file('xcm', self.xuml_model_path, previous=self.model_file,
+                                                          use_cache=not self.no_parse_cache)
+            self.model = self.model_file.content
         except XCM_ModelInputFileOpen as e:
-            cls.logger.error(f"Cannot open class model file: {cls.xuml_model_path}")
+            self.logger.error(f"Cannot open class model file: {self.xuml_model_path}")
             sys.exit(str(e))
 
         # Layout
-        cls.logger.info("Parsing the layout")
+        self.logger.info("Parsing the layout")
         try:
-            cls.layout = LayoutParser.parse_file(file_input=cls.flatland_layout_path, debug=False)
+            with Instrumentation.span("layout parse"):
+                self.layout_file = parse_layout(self.flatland_layout_path, previous=self.layout_file,
+                                                use_cache=not self.no_parse_cache)
+            self.layout = self.layout_file.content
         except MLS_LayoutInputFileOpen as e:
-            cls.logger.error(f"Cannot open layout file: {cls.flatland_layout_path}")
+            self.logger.error(f"Cannot open layout file: {self.flatland_layout_path}")
             sys.exit(str(e))
 
         # Draw the blank canvas of the appropriate size, diagram type and presentation style
-        cls.logger.info("Creating the canvas")
-        cls.flatland_canvas = cls.create_canvas()
+        self.logger.info("Creating the canvas")
+        with Instrumentation.span("canvas"):
+            self.flatland_canvas = self.create_canvas()
 
         # Draw the frame and title block if one was supplied
-        if cls.layout.layout_spec.frame:
-            cls.logger.info("Creating the frame")
-            cls.frame = Frame(
-                name=cls.layout.layout_spec.frame, presentation=cls.layout.layout_spec.frame_presentation,
-                canvas=cls.flatland_canvas, metadata=cls.model.metadata
-            )
+        if self.layout.layout_spec.frame:
+            self.logger.info("Creating the frame")
+            with Instrumentation.span("frame"):
+                self.frame = Frame(
+                    name=self.layout.layout_spec.frame, presentation=self.layout.layout_spec.frame_presentation,
+                    canvas=self.flatland_canvas, metadata=self.model.metadata
+                )
+
+        # Add all of the classes to the grid
+        self.logger.info("Drawing the classes")
+        with Instrumentation.span("node placement"):
+            self.nodes = self.draw_classes()
 
-        # Draw all of the classes
-        cls.logger.info("Drawing the classes")
-        cls.nodes = cls.draw_classes()
+        # Connectors from the previous build are drawn the same way only with the same layout spec
+        previous = self.connectors if self.layout.layout_spec == previous_spec else None
+        self.connectors = ConnectorReuse(diagram=self.flatland_canvas.Diagram, nodes=self.nodes, previous=previous)
+
+        # Connectors are only laid out once the grid is solved, so first we collect each connector to draw
+        # along with the grid lanes it runs along
+        connector_draws = []  # (draw method, its arguments)
+        lanes = []
 
         # We verify that there are:
         #   1. Relationships specified in the model
         #   2. Nodes only arg was not specified
         #   3. There is a connector block in the model layout sheet
         # If so, we process any specified relationships with connection layouts
-        if cls.model.rels and not nodes_only and cls.layout.connector_placement:
-            cp = {p['cname']: p for p in cls.layout.connector_placement}
-            for r in cls.model.rels:  # r is the model data without any layout info
+        if self.model.rels and not self.nodes_only and self.layout.connector_placement:
+            cp = {p['cname']: p for p in self.layout.connector_placement}
+            for r in self.model.rels:  # r is the model data without any layout info
                 rnum = r['rnum']
                 rlayout = cp.get(rnum)  # How this r is to be laid out on the diagram
                 if not rlayout:
-                    cls.logger.warning(f"Relationship {rnum} skipped, no cplace in layout sheet.")
+                    self.logger.warning(f"Relationship {rnum} skipped, no cplace in layout sheet.")
                     continue
 
                 if 'superclass' in r.keys():
                     # Generalization
-                    cls.draw_generalization(rnum=rnum, generalization=r, tree_layout=rlayout)
+                    connector_draws.append(
+                        (self.draw_generalization, dict(rnum=rnum, generalization=r, tree_layout=rlayout)))
                 elif r['rnum'][0] == 'R':
                     # Association named R<n>
-                    cls.draw_association(rnum=rnum, association=r, binary_layout=rlayout)
+                    connector_draws.append(
+                        (self.draw_association, dict(rnum=rnum, association=r, binary_layout=rlayout)))
+                    # The T stem is on the model's t side class whatever order the layout gives the stems in
+                    tstem = rlayout['tstem'] if rlayout['tstem']['node_ref'] == r['t_side']['cname'] \
+                        else rlayout['pstem']
+                    lanes += self.path_lanes(tstem=tstem, binary_layout=rlayout)
                 elif r['rnum'][:2] == 'OR':
                     # Ordinal relationship named OR<n>
-                    cls.draw_ordinal(rnum=rnum, association=r, binary_layout=rlayout)
+                    connector_draws.append(
+                        (self.draw_ordinal, dict(rnum=rnum, association=r, binary_layout=rlayout)))
+                    lanes += self.path_lanes(tstem=rlayout['tstem'], binary_layout=rlayout)
                 else:
                     # Undefined relationship type
-                    cls.logger.exception(f"Encountered undefined relationship type in model input: [{r['rnum']}]")
+                    self.logger.exception(f"Encountered undefined relationship type in model input: [{r['rnum']}]")
                     raise FlatlandModelException
 
             # Check to see if any connector placements were specified for non-existent relationships
             rnum_placements = {r for r in cp.keys()}
-            rnum_defs = {r['rnum'] for r in cls.model.rels}
+            rnum_defs = {r['rnum'] for r in self.model.rels}
             orphaned_placements = rnum_placements - rnum_defs
             if orphaned_placements:
-                cls.logger.warning(f"Connector placements {orphaned_placements} in layout sheet refer to undeclared relationships")
+                self.logger.warning(f"Connector placements {orphaned_placements} in layout sheet refer to undeclared relationships")
+
+        # Size the rows and columns to fit every class and add the lanes the connectors run along
+        with Instrumentation.span("grid solve"):
+            self.flatland_canvas.Diagram.Grid.solve(lanes=lanes)
+
+        for draw, args in connector_draws:
+            self.connectors.draw(draw, **args)
+        self.connectors.finish()
 
-        # Render the Canvas so it can be displayed and output a PDF
-        cls.flatland_canvas.render()
+    def render(self):
+        """
+        Outputs the built diagram in the format selected by the diagram file suffix
+        """
+        self.logger.info("Rendering the Canvas")
+        self.flatland_canvas.render()
+        # Keep any newly measured text and parsed configuration for the next run
+        TextMetrics.save()
+        ConfigLoader.save()
 
-    @classmethod
-    def create_canvas(cls) -> Canvas:
+    def create_canvas(self) -> Canvas:
         """Create a blank canvas"""
-        lspec = cls.layout.layout_spec
+        lspec = self.layout.layout_spec
         return Canvas(
             diagram_type=lspec.dtype,
             presentation=lspec.pres,
@@ -145,15 +215,14 @@ class XumlClassDiagram:
             standard_sheet_name=lspec.sheet,
             orientation=lspec.orientation,
             diagram_padding=lspec.padding,
-            drawoutput=cls.diagram_file_path,
-            show_grid=cls.show_grid,
-            no_color=cls.no_color,
-            show_rulers=cls.show_rulers,
+            drawoutput=self.diagram_file_path,
+            show_grid=self.show_grid,
+            no_color=self.no_color,
+            show_rulers=self.show_rulers,
             color=lspec.color,
         )
 
-    @classmethod
-    def flatten_attrs(cls, attrs: List[Dict[str, Any]]) -> List[str]:
+    def flatten_attrs(self, attrs: List[Dict[str, Any]]) -> List[str]:
         attr_content = []
         for a in attrs:
             name = a['name']
@@ -164,7 +233,7 @@ class XumlClassDiagram:
             rtags = a.get('R')  # Formalizes one or more association or generalization relationships
             ortags = a.get('OR')  # Formalizes an ordinal relationship
             type_name = a.get('type')  # The data type
-            if not type_name or rtags and not cls.show_ref_types:
+            if not type_name or rtags and not self.show_ref_types:
                 # Either there is no type name specified, or it is a referential attribute
                 type_name = ""
             else:
@@ -192,23 +261,22 @@ class XumlClassDiagram:
             attr_content.append(a_text)
         return attr_content
 
-    @classmethod
-    def draw_classes(cls) -> Dict[str, SingleCellNode]:
+    def draw_classes(self) -> Dict[str, SingleCellNode]:
         """Draw all the classes on the class diagram"""
 
         nodes = {}
-        np = cls.layout.node_placement # Layout data for all classes
+        np = self.layout.node_placement # Layout data for all classes
 
-        for c in cls.model.classes:
+        for c in self.model.classes:
 
             # Get the class name from the model
             cname = c['name']
-            cls.logger.info(f'Processing class: {cname}')
+            self.logger.info(f'Processing class: {cname}')
 
             # Get the layout data for this class
             nlayout = np.get(cname)
             if not nlayout:
-                cls.logger.warning(f"Skipping class [{cname}] -- No cplace specified in layout sheet")
+                self.logger.warning(f"Skipping class [{cname}] -- No cplace specified in layout sheet")
                 continue
 
             # Layout data for all placements
@@ -232,7 +300,7 @@ class XumlClassDiagram:
             # One list item per compartment in descending vertical order of display
             # (class name, attributes and optional methods)
             h_expand = nlayout.get('node_height_expansion', {})
-            attr_text = cls.flatten_attrs(c['attributes'])
+            attr_text = self.flatten_attrs(c['attributes'])
             if internal_ref:
                 attr_text = attr_text + internal_ref
             text_content = [
@@ -272,7 +340,7 @@ class XumlClassDiagram:
                     nodes[node_name] = SingleCellNode(
                         node_type_name=node_type_name,
                         content=text_content,
-                        grid=cls.flatland_canvas.Diagram.Grid,
+                        grid=self.flatland_canvas.Diagram.Grid,
                         row=row_span[0], column=col_span[0],
                         tag=nlayout.get('color_tag', None),
                         local_alignment=Alignment(vertical=v, horizontal=h),
@@ -287,7 +355,7 @@ class XumlClassDiagram:
                     nodes[node_name] = SpanningNode(
                         node_type_name=node_type_name,
                         content=text_content,
-                        grid=cls.flatland_canvas.Diagram.Grid,
+                        grid=self.flatland_canvas.Diagram.Grid,
                         low_row=low_row, high_row=high_row,
                         left_column=left_col, right_column=right_col,
                         tag=nlayout.get('color_tag', None),
@@ -296,8 +364,16 @@ class XumlClassDiagram:
                     )
         return nodes
 
-    @classmethod
-    def draw_ordinal(cls, rnum, association, binary_layout):
+    @staticmethod
+    def path_lanes(tstem, binary_layout) -> List[Tuple[int, Orientation]]:
+        """Each grid lane a binary connector's paths run along, if any"""
+        if not binary_layout.get('paths', None):
+            return []
+        return BendingBinaryConnector.path_lanes(
+            t_face=NodeFace[tstem['face']],
+            paths=[New_Path(lane=p['lane'], rut=p['rut']) for p in binary_layout['paths']])
+
+    def draw_ordinal(self, rnum, association, binary_layout):
         """Draw the ordinal relationship"""
         tstem = binary_layout['tstem']
         pstem = binary_layout['pstem']
@@ -311,7 +387,7 @@ class XumlClassDiagram:
         node_ref = tstem['node_ref']
         hstem_face = NodeFace[tstem['face']]
         h_stem = New_Stem(stem_position='class face', semantic='ordinal',
-                          node=cls.nodes[node_ref], face=hstem_face,
+                          node=self.nodes[node_ref], face=hstem_face,
                           anchor=tstem.get('anchor', None), stem_name=h_phrase)
         l_phrase = StemName(
             text=TextBlock(line=low_text, wrap=pstem['wrap']),
@@ -320,7 +396,7 @@ class XumlClassDiagram:
         node_ref = pstem['node_ref']
         lstem_face = NodeFace[pstem['face']]
         l_stem = New_Stem(stem_position='class face', semantic='ordinal',
-                          node=cls.nodes[node_ref], face=lstem_face,
+                          node=self.nodes[node_ref], face=lstem_face,
                           anchor=pstem.get('anchor', None), stem_name=l_phrase)
         rnum_data = ConnectorName(
             text=rnum, side=binary_layout['dir'], bend=binary_layout['bend'], notch=binary_layout['notch'],
@@ -330,7 +406,7 @@ class XumlClassDiagram:
             [New_Path(lane=p['lane'], rut=p['rut']) for p in binary_layout['paths']]
 
         BendingBinaryConnector(
-            diagram=cls.flatland_canvas.Diagram,
+            diagram=self.flatland_canvas.Diagram,
             ctype_name='binary association',
             anchored_stem_p=l_stem,
             anchored_stem_t=h_stem,
@@ -339,8 +415,7 @@ class XumlClassDiagram:
             name=rnum_data)
         pass
 
-    @classmethod
-    def draw_association(cls, rnum, association, binary_layout):
+    def draw_association(self, rnum, association, binary_layout):
         """Draw the binary association"""
         # Straight or bent connector?
         tstem = binary_layout['tstem']
@@ -356,7 +431,7 @@ class XumlClassDiagram:
             # (the 2nd element indicates duplicate cplace, if any, and is not relevant for the comparison above)
             tstem, pstem = pstem, tstem
             _reversed = True
-            cls.logger.info(f"Stems order in layout file does not match model, swapping stem order for connector {rnum}")
+            self.logger.info(f"Stems order in layout file does not match model, swapping stem order for connector {rnum}")
 
         t_phrase = StemName(
             text=TextBlock(t_side['phrase'], wrap=tstem['wrap']),
@@ -365,7 +440,7 @@ class XumlClassDiagram:
         node_ref = tstem['node_ref']
         tstem_face = NodeFace[tstem['face']]
         t_stem = New_Stem(stem_position='class face', semantic=t_side['mult'] + ' mult',
-                          node=cls.nodes[node_ref], face=tstem_face,
+                          node=self.nodes[node_ref], face=tstem_face,
                           anchor=tstem.get('anchor', None), stem_name=t_phrase)
 
         # Same as for the t_side, but with p instead
@@ -376,10 +451,10 @@ class XumlClassDiagram:
         )
         node_ref = pstem['node_ref']
         try:
-            pnode = cls.nodes[node_ref]
+            pnode = self.nodes[node_ref]
         except KeyError:
             missing_side = "p-stem" if not _reversed else "t-stem"
-            cls.logger.error(f"In layout sheet {missing_side} of {rnum} class [{node_ref}] is not defined in model")
+            self.logger.error(f"In layout sheet {missing_side} of {rnum} class [{node_ref}] is not defined in model")
             sys.exit(1)
         pstem_face = NodeFace[pstem['face']]
         p_stem = New_Stem(stem_position='class face', semantic=p_side['mult'] + ' mult',
@@ -391,20 +466,20 @@ class XumlClassDiagram:
             try:
                 semantic = association['assoc_mult'] + ' mult'
             except KeyError:
-                cls.logger.error(
+                self.logger.error(
                     f"Layout sheet calls for ternary stem, but class model does not specify any"
                     f" association class on association: {rnum}")
                 sys.exit(1)
             try:
-                node= cls.nodes[node_ref]
+                node= self.nodes[node_ref]
             except KeyError:
-                cls.logger.error(
+                self.logger.error(
                     f"Association class [{node_ref}] is missing in relationship {rnum}"
                 )
                 sys.exit(1)
             a_stem_face = NodeFace[astem['face']]
             a_stem = New_Stem(stem_position='association', semantic=semantic,
-                              node=cls.nodes[node_ref], face=a_stem_face, anchor=astem.get('anchor', None),
+                              node=self.nodes[node_ref], face=a_stem_face, anchor=astem.get('anchor', None),
                               stem_name=None)
         else:
             a_stem = None
@@ -420,7 +495,7 @@ class XumlClassDiagram:
         pstem_f = NodeFace[pstem['face']]
         if not paths and (OppositeFace[tstem_f] == pstem_f):
             StraightBinaryConnector(
-                diagram=cls.flatland_canvas.Diagram,
+                diagram=self.flatland_canvas.Diagram,
                 ctype_name='binary association',
                 t_stem=t_stem,
                 p_stem=p_stem,
@@ -429,7 +504,7 @@ class XumlClassDiagram:
             )
         else:
             BendingBinaryConnector(
-                diagram=cls.flatland_canvas.Diagram,
+                diagram=self.flatland_canvas.Diagram,
                 ctype_name='binary association',
                 anchored_stem_p=p_stem,
                 anchored_stem_t=t_stem,
@@ -437,8 +512,7 @@ class XumlClassDiagram:
                 paths=paths,
                 name=rnum_data)
 
-    @classmethod
-    def process_leaf_stems(cls, lfaces, preceeding_graft: Optional[New_Stem]) -> BranchLeaves:
+    def process_leaf_stems(self, lfaces, preceeding_graft: Optional[New_Stem]) -> BranchLeaves:
         """
 
         :param lfaces:
@@ -467,11 +541,11 @@ class XumlClassDiagram:
 
             # Current leaf stem
             try:
-                node = cls.nodes[name]
+                node = self.nodes[name]
             except KeyError:
-                cls.logger.error(f'Node name [{name}] missing placement in layout file.')
+                self.logger.error(f'Node name [{name}] missing placement in layout file.')
                 sys.exit(1)
-            lstem = New_Stem(stem_position='subclass face', semantic='subclass', node=cls.nodes[name],
+            lstem = New_Stem(stem_position='subclass face', semantic='subclass', node=self.nodes[name],
                              face=NodeFace[lfaces[name]['face']], anchor=anchor, stem_name=None)
             leaf_stems.add(lstem)
 
@@ -494,14 +568,13 @@ class XumlClassDiagram:
         return BranchLeaves(leaf_stems=leaf_stems, local_graft=graft, next_graft=next_branch_graft,
                             floating_leaf_stem=floating_leaf_stem)
 
-    @classmethod
-    def draw_generalization(cls, rnum, generalization, tree_layout):
+    def draw_generalization(self, rnum, generalization, tree_layout):
         """
         One of the rare times it is a good idea to draw one – LS
         """
         trunk_layout = tree_layout['trunk_face']
         node_ref = trunk_layout['node_ref']
-        trunk_node = cls.nodes[node_ref]
+        trunk_node = self.nodes[node_ref]
 
         # Process trunk branch
         trunk_stem = New_Stem(stem_position='superclass face', semantic='superclass', node=trunk_node,
@@ -509,7 +582,7 @@ class XumlClassDiagram:
         tbranch = tree_layout['branches'][0]  # First branch is required and it is the trunk branch
         path_fields = tbranch.get('path', None)
         tbranch_path = None if not path_fields else New_Path(**path_fields)
-        leaves = cls.process_leaf_stems(
+        leaves = self.process_leaf_stems(
             lfaces=tbranch['leaf_faces'],
             preceeding_graft=trunk_stem if trunk_layout['graft'] else None
         )
@@ -526,7 +599,7 @@ class XumlClassDiagram:
         for obranch in tree_layout['branches'][1:]:
             path_fields = obranch.get('path', None)
             obranch_path = None if not path_fields else New_Path(**path_fields)
-            leaves = cls.process_leaf_stems(
+            leaves = self.process_leaf_stems(
                 lfaces=obranch['leaf_faces'],
                 preceeding_graft=next_branch_graft
             )
@@ -538,5 +611,5 @@ class XumlClassDiagram:
         # Now draw the generalization
         branches = New_Branch_Set(trunk_branch=trunk_branch, offshoot_branches=obranches)
         rnum_data = ConnectorName(text=rnum, side=tree_layout['dir'], bend=None, notch=tree_layout['notch'], wrap=1)
-        TreeConnector(diagram=cls.flatland_canvas.Diagram, ctype_name='generalization',
+        TreeConnector(diagram=self.flatland_canvas.Diagram, ctype_name='generalization',
                       branches=branches, name=rnum_data)
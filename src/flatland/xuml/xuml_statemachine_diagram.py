@@ -8,13 +8,17 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 
 # Model Integration
-from xsm_parser.state_model_parser import StateModelParser
 from xsm_parser.state_model_visitor import Parameter_a
 from xsm_parser.exceptions import ModelInputFileOpen as XSM_ModelInputFileOpen
 from mls_parser.exceptions import LayoutInputFileOpen as MLS_LayoutInputFileOpen
-from mls_parser.layout_parser import LayoutParser
 
 # Flatland
+from flatland.xuml.model_parsers import ModelParsers
+from flatland.instrumentation import Instrumentation
+from flatland.text.text_metrics import TextMetrics
+from flatland.configuration.config_loader import ConfigLoader
+from flatland.xuml.incremental import parse_layout, ConnectorReuse
+from flatland.xuml.transition_placement import TransitionPlacement
 from flatland.node_subsystem.canvas import Canvas
 from flatland.sheet_subsystem.frame import Frame
 from flatland.node_subsystem.single_cell_node import SingleCellNode
@@ -24,7 +28,7 @@ from flatland.datatypes.command_interface import New_Stem, New_Path, New_Compart
 from flatland.connector_subsystem.unary_connector import UnaryConnector
 from flatland.connector_subsystem.straight_binary_connector import StraightBinaryConnector
 from flatland.connector_subsystem.bending_binary_connector import BendingBinaryConnector
-from flatland.datatypes.connection_types import ConnectorName, OppositeFace, NodeFace
+from flatland.datatypes.connection_types import ConnectorName, OppositeFace, NodeFace, Orientation
 from flatland.text.text_block import TextBlock
 
 
@@ -35,101 +39,152 @@ def make_event_cname(evname : str, signature: List[Parameter_a]) -> str:
 
 
 class XumlStateMachineDiagram:
-
-    @classmethod
-    def __init__(cls, xuml_model_path: Path, flatland_layout_path: Path, diagram_file_path: Path,
-                 show_grid: bool, show_rulers: bool, nodes_only: bool, no_color: bool):
-        """Constructor"""
-        cls.logger = logging.getLogger(__name__)
-        cls.xuml_model_path = xuml_model_path
-        cls.flatland_layout_path = flatland_layout_path
-        cls.diagram_file_path = diagram_file_path
-        cls.show_grid = show_grid
-        cls.show_rulers = show_rulers
-        cls.no_color = no_color
-
+    """
+    Draws an Executable UML State Machine Diagram
+
+    All state is held by the instance, so any number of diagrams may be built at once, each on its own thread
+    if need be. Call build() to lay out the diagram and then render() to output it.
+    """
+
+    def __init__(self, xuml_model_path: Path, flatland_layout_path: Path, diagram_file_path: Path,
+                 show_grid: bool, show_rulers: bool, nodes_only: bool, no_color: bool,
+                 no_parse_cache: bool = False):
+        """
+        :param xuml_model_path: Path to the model (.xsm) file
+        :param flatland_layout_path: Path to the layout (.mls) file
+        :param diagram_file_path: Path of the generated diagram, the suffix selects the format
+        :param show_grid: If true, a grid is drawn showing node rows and columns
+        :param show_rulers: If true, a ruler grid is drawn to check canvas positions
+        :param nodes_only: If true, only nodes are drawn, no connectors
+        :param no_color: If true, the canvas background will be white, overriding any specified background color
+        :param no_parse_cache: If true, the model and layout are always parsed rather than loaded from the parse cache
+        """
+        self.logger = logging.getLogger(__name__)
+        self.xuml_model_path = xuml_model_path
+        self.flatland_layout_path = flatland_layout_path
+        self.diagram_file_path = diagram_file_path
+        self.show_grid = show_grid
+        self.show_rulers = show_rulers
+        self.nodes_only = nodes_only
+        self.no_color = no_color
+        self.no_parse_cache = no_parse_cache
+
+        # Set when the diagram is built
+        self.model = None
+        self.layout = None
+        self.flatland_canvas = None
+        self.frame = None
+        self.nodes = {}
+        self.connectors = None
+
+        # Kept from one build to the next so that a rebuild can reuse whatever hasn't changed
+        self.model_file = None
+        self.layout_file = None
+
+    def build(self):
+        """
+        Parses the model and layout files and lays out the diagram on a new canvas
+
+        When called again to pick up edits, only the changed parts of the files are parsed and only those
+        connectors attached to changed or moved nodes are laid out again.
+        """
         # First we parse both the model and layout files
+        previous_spec = self.layout.layout_spec if self.layout else None
 
         # Model
-        cls.logger.info("Parsing the state model")
+        self.logger.info("Parsing the state model")
         try:
-            cls.model = StateModelParser.parse_file(file_input=cls.xuml_model_path, debug=False)
+            with Instrumentation.span("model parse"):
+                self.model_file = ModelParsers.parse_file('xsm', self.xuml_model_path, previous=self.model_file,
+                                                          use_cache=not self.no_parse_cache)
+            self.model = self.model_file.content
         except XSM_ModelInputFileOpen as e:
-            cls.logger.error(f"Cannot open state model file: {cls.xuml_model_path}")
+            self.logger.error(f"Cannot open state model file: {self.xuml_model_path}")
             sys.exit(str(e))
 
         # Layout
-        cls.logger.info("Parsing the layout")
+        self.logger.info("Parsing the layout")
         try:
-            cls.layout = LayoutParser.parse_file(file_input=cls.flatland_layout_path, debug=False)
+            with Instrumentation.span("layout parse"):
+                self.layout_file = parse_layout(self.flatland_layout_path, previous=self.layout_file,
+                                                use_cache=not self.no_parse_cache)
+            self.layout = self.layout_file.content
         except MLS_LayoutInputFileOpen as e:
-            cls.logger.error(f"Cannot open layout file: {cls.flatland_layout_path}")
+            self.logger.error(f"Cannot open layout file: {self.flatland_layout_path}")
             sys.exit(str(e))
 
         # Draw the blank canvas of the appropriate size, diagram type and presentation style
-        cls.logger.info("Creating the canvas")
-        cls.flatland_canvas = cls.create_canvas()
+        self.logger.info("Creating the canvas")
+        with Instrumentation.span("canvas"):
+            self.flatland_canvas = self.create_canvas()
 
         # Draw the frame and title block if one was supplied
-        if cls.layout.layout_spec.frame:
-            cls.logger.info("Creating the frame")
-            cls.frame = Frame(
-                name=cls.layout.layout_spec.frame, presentation=cls.layout.layout_spec.frame_presentation,
-                canvas=cls.flatland_canvas, metadata=cls.model.metadata
-            )
-
-        # Draw all of the states
-        cls.logger.info("Drawing the states")
-        cls.nodes = cls.draw_states()
+        if self.layout.layout_spec.frame:
+            self.logger.info("Creating the frame")
+            with Instrumentation.span("frame"):
+                self.frame = Frame(
+                    name=self.layout.layout_spec.frame, presentation=self.layout.layout_spec.frame_presentation,
+                    canvas=self.flatland_canvas, metadata=self.model.metadata
+                )
+
+        # Add all of the states to the grid
+        self.logger.info("Drawing the states")
+        with Instrumentation.span("node placement"):
+            self.nodes = self.draw_states()
+
+        # Connectors from the previous build are drawn the same way only with the same layout spec
+        previous = self.connectors if self.layout.layout_spec == previous_spec else None
+        self.connectors = ConnectorReuse(diagram=self.flatland_canvas.Diagram, nodes=self.nodes, previous=previous)
 
         # Index all (if any) event signatures by state
-        state_sigs = {s.state.name: s.state.signature for s in cls.model.states if s.state.signature}
+        state_sigs = {s.state.name: s.state.signature for s in self.model.states if s.state.signature}
+
+        # Connectors are only laid out once the grid is solved, so first we collect each connector to draw
+        # along with the grid lanes it runs along
+        connector_draws = []  # (draw method, its arguments)
+        lanes = []
 
         # We verify that there are:
         #   1. Nodes only arg was not specified
         #   2. There is a connector block in the model layout sheet
         # If so, we process the state transitions, otherwise, skip
 
-        if not nodes_only and cls.layout.connector_placement:
-            # Index all transitions by state
-            cp = cls.layout.connector_placement
-            cp_dict = {}
-            for c in cp:
-                tstem = c.get('tstem')
-                if tstem:
-                    k = tstem['node_ref']
-                else:
-                    k = c['ustem']['node_ref']
-                if cp_dict.get(k):
-                    cp_dict[k].append(c)
-                else:
-                    cp_dict[k] = [c]
+        if not self.nodes_only and self.layout.connector_placement:
+            # Index all transitions by state and event
+            placement = TransitionPlacement(self.layout.connector_placement)
+            for d in placement.duplicates:
+                self.logger.warning(f"Duplicate {d} placement in layout sheet ignored")
 
             # Create a dictionary of initial states (by looking at the initial transitions)
-            initial_states = {t.to_state: t.event for t in cls.model.initial_transitions}
-
-            cls.logger.info("Drawing the transitions")
-            for state_block in cls.model.states:
-                try:
-                    # See if this state has any connector placement information in the layout
-                    state_place = cp_dict[state_block.state.name]  # State placement (layout) info
-                except KeyError:
+            initial_states = {t.to_state: t.event for t in self.model.initial_transitions}
+
+            # Report every transition we can't draw before drawing any of them
+            errors = placement.validate(states=self.model.states, initial_states=initial_states,
+                                        events=self.model.events)
+            if errors:
+                for e in errors:
+                    self.logger.error(e)
+                sys.exit(1)
+
+            placed_states = placement.states()
+            for state_block in self.model.states:
+                state_name = state_block.state.name
+                if state_name not in placed_states:
                     continue  # Must be a final, non-deletion state with no transitions to draw
-                if state_block.state.name in initial_states.keys():
+                if state_name in initial_states:
                     # This is an initial state
                     # So we draw the one and only initial transition into this state
-                    # cname = make_event_cname(cls.model.events[itrans.event])
-                    evname = initial_states[state_block.state.name]
-                    if state_block.state.name in state_sigs:
-                        cname = make_event_cname(evname=evname, signature=state_sigs[state_block.state.name])
+                    evname = initial_states[state_name]
+                    if state_name in state_sigs:
+                        cname = make_event_cname(evname=evname, signature=state_sigs[state_name])
                     else:
                         cname = evname
-                    # Find the initial transition specification in the state's transitions
-                    it_place = [t for t in cp_dict[state_block.state.name] if t['cname'] == evname][0]
-                    cls.draw_initial_transition(event_name=cname, cplace=it_place)
+                    it_place = placement.initial_transitions[(state_name, evname)]
+                    connector_draws.append(
+                        (self.draw_initial_transition, dict(event_name=cname, cplace=it_place)))
                 if state_block.state.deletion:
-                    it_place = [tp for tp in state_place if tp.get('ustem')][0]
-                    cls.draw_deletion_transition(cplace=it_place)
+                    connector_draws.append(
+                        (self.draw_deletion_transition, dict(cplace=placement.deletions[state_name])))
                 # TODO: No creation states anymore, need to handle initial transitions
                 if state_block.transitions:
                     for t in state_block.transitions:
@@ -142,78 +197,87 @@ class XumlStateMachineDiagram:
                             else:
                                 # Otherwise, the connector name is just the event name
                                 cname = evname
-                            if evname not in cls.model.events:
-                                # An event is being referenced in some state of the model file that does not correspond
-                                # to any event defined in the event specification list near the top of the file
-                                cls.logger.error(
-                                    f'Undefined event [{evname}] used on transition from state [{state_block.state.name}]. '
-                                    f'Check event list in model file.'
-                                )
-                                sys.exit(1)
-                            try:
-                                # Note the and condition to ensure that there is, in fact, a connector name
-                                # before comparing. Initial transitions may not have an associated event
-                                t_place = [tp for tp in state_place if tp.get('cname') and tp['cname'] == evname][0]
-                            except IndexError:
-                                cls.logger.error(f'Model event [{evname}] does not name any connector in layout.')
-                                sys.exit(1)
-                            if t_place:
-                                cls.draw_transition(evname=cname, tlayout=t_place)
-
-        cls.logger.info("Rendering the Canvas")
-        cls.flatland_canvas.render()
-
-    @classmethod
-    def draw_deletion_transition(cls, cplace):
+                            t_place = placement.transitions[(state_name, evname)]
+                            connector_draws.append((self.draw_transition, dict(evname=cname, tlayout=t_place)))
+                            lanes += self.path_lanes(tlayout=t_place)
+
+        # Size the rows and columns to fit every state and add the lanes the transitions run along
+        with Instrumentation.span("grid solve"):
+            self.flatland_canvas.Diagram.Grid.solve(lanes=lanes)
+
+        if connector_draws:
+            self.logger.info("Drawing the transitions")
+        for draw, args in connector_draws:
+            self.connectors.draw(draw, **args)
+        self.connectors.finish()
+
+    def render(self):
+        """
+        Outputs the built diagram in the format selected by the diagram file suffix
+        """
+        self.logger.info("Rendering the Canvas")
+        self.flatland_canvas.render()
+        # Keep any newly measured text and parsed configuration for the next run
+        TextMetrics.save()
+        ConfigLoader.save()
+
+    def draw_deletion_transition(self, cplace):
         """Draw a deletion transition to a final pseudo-state"""
         ustem = cplace['ustem']
         node_ref = ustem['node_ref']
         u_stem = New_Stem(stem_position='from final state', semantic='final pseudo state',
-                          node=cls.nodes[node_ref], face=NodeFace[ustem['face']],
+                          node=self.nodes[node_ref], face=NodeFace[ustem['face']],
                           anchor=ustem.get('anchor', None), stem_name=None)
         UnaryConnector(
-            diagram=cls.flatland_canvas.Diagram,
+            diagram=self.flatland_canvas.Diagram,
             ctype_name='deletion transition',
             stem=u_stem,
             name=None
         )
 
-    @classmethod
-    def draw_initial_transition(cls, event_name, cplace):
+    def draw_initial_transition(self, event_name, cplace):
         """Draw an initial transition with or without an event"""
         ustem = cplace['ustem']
         node_ref = ustem['node_ref']
         u_stem = New_Stem(stem_position='to initial state', semantic='initial pseudo state',
-                          node=cls.nodes[node_ref], face=NodeFace[ustem['face']],
+                          node=self.nodes[node_ref], face=NodeFace[ustem['face']],
                           anchor=ustem.get('anchor', None), stem_name=None)
         try:
             evname_data = None if not event_name else ConnectorName(
                 text=event_name, side=cplace['dir'], bend=cplace['bend'],
                 notch=cplace['notch'], wrap=cplace['wrap'])
         except KeyError:
-            cls.logger.error(f'No placement defined for creation event [{event_name}] entering state [{node_ref}]')
+            self.logger.error(f'No placement defined for creation event [{event_name}] entering state [{node_ref}]')
             sys.exit(1)
         UnaryConnector(
-            diagram=cls.flatland_canvas.Diagram,
+            diagram=self.flatland_canvas.Diagram,
             ctype_name='initial transition',
             stem=u_stem,
             name=evname_data
         )
 
-    @classmethod
-    def draw_transition(cls, evname, tlayout):
+    @staticmethod
+    def path_lanes(tlayout) -> List[Tuple[int, Orientation]]:
+        """Each grid lane a transition's paths run along, if any"""
+        if not tlayout.get('paths', None):
+            return []
+        return BendingBinaryConnector.path_lanes(
+            t_face=NodeFace[tlayout['tstem']['face']],
+            paths=[New_Path(lane=p['lane'], rut=p['rut']) for p in tlayout['paths']])
+
+    def draw_transition(self, evname, tlayout):
         """Draw a normal (non initial/non deletion transition)"""
         tstem = tlayout['tstem']
         pstem = tlayout['pstem']
         node_ref = tstem['node_ref']
         t_stem = New_Stem(stem_position='from state', semantic='source state',
-                          node=cls.nodes[node_ref], face=NodeFace[tstem['face']],
+                          node=self.nodes[node_ref], face=NodeFace[tstem['face']],
                           anchor=tstem.get('anchor', None), stem_name=None)
         node_ref = pstem['node_ref']
         try:
-            node = cls.nodes[node_ref]
+            node = self.nodes[node_ref]
         except KeyError:
-            cls.logger.error(f'Transition connector [{evname}] refers to undeclared state node [{node_ref}]')
+            self.logger.error(f'Transition connector [{evname}] refers to undeclared state node [{node_ref}]')
             sys.exit(1)
         p_stem = New_Stem(stem_position='to state', semantic='target state',
                           node=node, face=NodeFace[pstem['face']],
@@ -226,7 +290,7 @@ class XumlStateMachineDiagram:
                                     wrap=tlayout['wrap'])
         if not paths and OppositeFace[t_stem.face] == p_stem.face:
             StraightBinaryConnector(
-                diagram=cls.flatland_canvas.Diagram,
+                diagram=self.flatland_canvas.Diagram,
                 ctype_name='transition',
                 t_stem=t_stem,
                 p_stem=p_stem,
@@ -234,17 +298,16 @@ class XumlStateMachineDiagram:
             )
         else:
             BendingBinaryConnector(
-                diagram=cls.flatland_canvas.Diagram,
+                diagram=self.flatland_canvas.Diagram,
                 ctype_name='transition',
                 anchored_stem_p=p_stem,
                 anchored_stem_t=t_stem,
                 paths=paths,
                 name=evname_data)
 
-    @classmethod
-    def create_canvas(cls) -> Canvas:
+    def create_canvas(self) -> Canvas:
         """Create a blank canvas"""
-        lspec = cls.layout.layout_spec
+        lspec = self.layout.layout_spec
         return Canvas(
             diagram_type=lspec.dtype,
             presentation=lspec.pres,
@@ -252,24 +315,23 @@ class XumlStateMachineDiagram:
             standard_sheet_name=lspec.sheet,
             orientation=lspec.orientation,
             diagram_padding=lspec.padding,
-            drawoutput=cls.diagram_file_path,
-            show_grid=cls.show_grid,
-            no_color=cls.no_color,
-            show_rulers=cls.show_rulers,
+            drawoutput=self.diagram_file_path,
+            show_grid=self.show_grid,
+            no_color=self.no_color,
+            show_rulers=self.show_rulers,
             color=lspec.color,
         )
 
-    @classmethod
-    def draw_states(cls) -> Dict[str, SingleCellNode]:
+    def draw_states(self) -> Dict[str, SingleCellNode]:
         """Draw all the states on the state machine diagram"""
 
         nodes = {}
-        np = cls.layout.node_placement  # Layout data for all states
+        np = self.layout.node_placement  # Layout data for all states
 
-        for state_block in cls.model.states:
+        for state_block in self.model.states:
 
             # Get the state name from the model
-            cls.logger.info(f'Processing state: {state_block.state.name}')
+            self.logger.info(f'Processing state: {state_block.state.name}')
 
             # Determine node type name (state or name only)
             ntype_name = 'state' if state_block.activity else 'state name only'
@@ -277,7 +339,7 @@ class XumlStateMachineDiagram:
             # Get the layout data for this state
             nlayout = np.get(state_block.state.name)
             if not nlayout:
-                cls.logger.warning(f"Skipping state [{state_block.state.name}] -- No placement specified in layout sheet")
+                self.logger.warning(f"Skipping state [{state_block.state.name}] -- No placement specified in layout sheet")
                 continue
 
             # Layout data for all placements
@@ -312,7 +374,7 @@ class XumlStateMachineDiagram:
                     nodes[node_name] = SingleCellNode(
                         node_type_name=ntype_name,
                         content=text_content,
-                        grid=cls.flatland_canvas.Diagram.Grid,
+                        grid=self.flatland_canvas.Diagram.Grid,
                         row=row_span[0], column=col_span[0],
                         tag=nlayout.get('color_tag', None),
                         local_alignment=Alignment(vertical=v, horizontal=h),
@@ -327,7 +389,7 @@ class XumlStateMachineDiagram:
                     nodes[node_name] = SpanningNode(
                         node_type_name=ntype_name,
                         content=text_content,
-                        grid=cls.flatland_canvas.Diagram.Grid,
+                        grid=self.flatland_canvas.Diagram.Grid,
                         low_row=low_row, high_row=high_row,
                         left_column=left_col, right_column=right_col,
                         tag=nlayout.get('color_tag', None),
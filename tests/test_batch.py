@@ -0,0 +1,63 @@
+""" test_batch.py - test rendering several diagrams from a batch manifest"""
+
+import os
+from pathlib import Path
+from flatland.batch import Batch, option_names
+
+manifest = """
+[[diagram]]
+model = "{tests}/class_diagrams/aircraft2.xcm"
+layout = "{tests}/model_style_sheets/xUML_cd/t001_straight_binary_horiz.mls"
+diagram = "out/t001.svg"
+
+[[diagram]]
+model = "{tests}/class_diagrams/no_such_model.xcm"
+layout = "{tests}/model_style_sheets/xUML_cd/t001_straight_binary_horiz.mls"
+diagram = "out/missing.svg"
+
+[[diagram]]
+model = "{tests}/class_diagrams/elevator.xcm"
+layout = "{tests}/model_style_sheets/Starr_cd/elevator_Starr.mls"
+show_grid = true
+"""
+
+def test_batch_continues_past_failure(flatland_db, tmp_path):
+
+    manifest_path = tmp_path / "batch.toml"
+    manifest_path.write_text(manifest.format(tests=Path(__file__).parent))
+    batch = Batch.load(source=str(manifest_path), options={o: False for o in option_names}, diagram_suffix='.svg')
+    assert batch.Jobs[2].options['show_grid'] and not batch.Jobs[0].options['show_grid']
+    assert batch.Jobs[2].diagram.name == "elevator.svg"
+
+    results = batch.run()
+    assert [r.error is None for r in results] == [True, False, True]
+    assert (tmp_path / "out" / "t001.svg").exists()
+    assert batch.failed
+
+def test_parallel_batch(flatland_db, tmp_path):
+
+    manifest_path = tmp_path / "batch.toml"
+    manifest_path.write_text(manifest.format(tests=Path(__file__).parent))
+    batch = Batch.load(source=str(manifest_path), options={o: False for o in option_names}, diagram_suffix='.svg')
+    results = batch.run(workers=2)
+    # Results come back in batch order no matter which worker rendered them
+    assert [r.job for r in results] == batch.Jobs
+    assert [r.error is None for r in results] == [True, False, True]
+    assert (tmp_path / "elevator.svg").exists()
+
+class Crash:
+    """Ends whichever process unpickles it, just as a crash in Tcl or cairo would"""
+    def __reduce__(self):
+        return os._exit, (1,)
+
+def test_worker_crash(flatland_db, tmp_path):
+
+    manifest_path = tmp_path / "batch.toml"
+    manifest_path.write_text(manifest.format(tests=Path(__file__).parent))
+    batch = Batch.load(source=str(manifest_path), options={o: False for o in option_names}, diagram_suffix='.svg')
+    batch.Jobs.append(batch.Jobs[0]._replace(model=Crash(), diagram=tmp_path / "crash.svg"))
+    results = batch.run(workers=2)
+    # Every diagram gets a result, the crashed one reported as failed
+    assert [r.job.diagram for r in results] == [j.diagram for j in batch.Jobs]
+    assert results[-1].error == "worker process died before finishing the diagram"
+    assert batch.failed
@@ -0,0 +1,42 @@
+""" test_boundaries.py - test that grid boundaries move exactly as the boundary lists they replace"""
+
+import random
+from flatland.geometry_domain.boundaries import Boundaries
+from flatland.geometry_domain.linear_geometry import expand_boundaries
+
+def test_boundaries():
+    rand = random.Random(3)
+    expected = [0]
+    boundaries = Boundaries()
+    for _ in range(500):
+        if len(expected) < 2 or rand.random() < 0.3:
+            extent = rand.choice([110, 70, 12.5, 100 / 3])
+            expected.append(expected[-1] + extent)
+            boundaries.add(extent)
+        else:
+            start, expansion = rand.randrange(1, len(expected)), rand.choice([4, 0.5, 17 / 3])
+            expected = expand_boundaries(boundaries=expected, start_boundary=start, expansion=expansion)
+            boundaries.expand(start_boundary=start, expansion=expansion)
+    # Same values and types, so that boundaries are drawn with the same text
+    assert [repr(b) for b in boundaries] == [repr(b) for b in expected]
+    assert len(boundaries) == len(expected)
+    assert boundaries[-1] == expected[-1] and boundaries[1:4] == expected[1:4]
+
+def test_grid_expansion():
+    # Rows and columns of a 100 by 100 grid, each node widening every lane it spans as Grid places it
+    rand = random.Random(5)
+    for extents in ([110, 70], [12.5, 100 / 3, 40]):
+        expected = [0]
+        boundaries = Boundaries()
+        for _ in range(100):
+            extent = rand.choice(extents)
+            expected.append(expected[-1] + extent)
+            boundaries.add(extent)
+        for _ in range(300):
+            low = rand.randrange(1, 101)
+            high = min(100, low + rand.randrange(3))
+            expansion = rand.choice([6, 17 / (high - low + 1)])
+            for lane in range(low, high + 1):
+                expected = expand_boundaries(boundaries=expected, start_boundary=lane, expansion=expansion)
+                boundaries.expand(start_boundary=lane, expansion=expansion)
+        assert [repr(b) for b in boundaries] == [repr(b) for b in expected]
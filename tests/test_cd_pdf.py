@@ -53,7 +53,7 @@ diagrams = [
 @pytest.mark.parametrize("model, layout", diagrams)
 def test_xUML_cd(flatland_db, model, layout, ext):
 
-    XumlClassDiagram(
+    diagram = XumlClassDiagram(
         xuml_model_path=Path(f"class_diagrams/{model}.xcm"),
         flatland_layout_path=Path(f"model_style_sheets/xUML_cd/{layout}.mls"),
         diagram_file_path=Path(f"output/xUML_cd/{layout.split('_')[0]}.{ext}"),
@@ -63,6 +63,8 @@ def test_xUML_cd(flatland_db, model, layout, ext):
         show_rulers=False,
         show_ref_types=True
     )
+    diagram.build()
+    diagram.render()
 
     assert True
 
@@ -70,7 +72,7 @@ def test_xUML_cd(flatland_db, model, layout, ext):
 @pytest.mark.parametrize("model, layout", diagrams)
 def test_Starr_cd(flatland_db, model, layout, ext):
 
-    XumlClassDiagram(
+    diagram = XumlClassDiagram(
         xuml_model_path=Path(f"class_diagrams/{model}.xcm"),
         flatland_layout_path=Path(f"model_style_sheets/Starr_cd/{layout}.mls"),
         diagram_file_path=Path(f"output/Starr_cd/{layout.split('_')[0]}.{ext}"),
@@ -80,5 +82,7 @@ def test_Starr_cd(flatland_db, model, layout, ext):
         show_rulers=False,
         show_ref_types=True
     )
+    diagram.build()
+    diagram.render()
 
     assert True
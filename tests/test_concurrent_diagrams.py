@@ -0,0 +1,59 @@
+""" test_concurrent_diagrams.py - test that diagrams built together match diagrams built one at a time"""
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+diagrams = [
+    ("aircraft2", "t001_straight_binary_horiz"),
+    ("tall_class", "t013_spanning_node_middle_tall_wide"),
+    ("aircraft3", "t033_2bend_tertiary_below"),
+    ("aircraft_tree4", "t055_p2_three_branch_one_graft"),
+]
+
+def class_diagram(model, layout, output_dir):
+    return XumlClassDiagram(
+        xuml_model_path=Path(f"class_diagrams/{model}.xcm"),
+        flatland_layout_path=Path(f"model_style_sheets/xUML_cd/{layout}.mls"),
+        diagram_file_path=output_dir / f"{layout}.svg",
+        show_grid=True,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+
+def svg_lines(path):
+    # Element order can vary between runs, but not the elements themselves
+    return sorted(path.read_text().splitlines())
+
+def test_interleaved_and_threaded(flatland_db, tmp_path):
+
+    serial_dir = tmp_path / "serial"
+    for model, layout in diagrams:
+        d = class_diagram(model, layout, serial_dir)
+        d.build()
+        d.render()
+
+    # Build every diagram before rendering any of them
+    interleaved_dir = tmp_path / "interleaved"
+    built = [class_diagram(model, layout, interleaved_dir) for model, layout in diagrams]
+    for d in built:
+        d.build()
+    for d in built:
+        d.render()
+
+    threaded_dir = tmp_path / "threaded"
+
+    def build_and_render(model_layout):
+        d = class_diagram(*model_layout, threaded_dir)
+        d.build()
+        d.render()
+
+    with ThreadPoolExecutor(max_workers=len(diagrams)) as executor:
+        list(executor.map(build_and_render, diagrams))
+
+    for _, layout in diagrams:
+        expected = svg_lines(serial_dir / f"{layout}.svg")
+        assert svg_lines(interleaved_dir / f"{layout}.svg") == expected
+        assert svg_lines(threaded_dir / f"{layout}.svg") == expected
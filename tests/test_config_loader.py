@@ -0,0 +1,40 @@
+""" test_config_loader.py - test that each yaml configuration file is parsed once and reloaded when changed"""
+
+import os
+from typing import NamedTuple
+from flatland.configuration.config_loader import ConfigLoader
+
+class Size(NamedTuple):
+    height: float
+    width: float
+
+def test_config_loader(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigLoader, 'parsed', {})
+    monkeypatch.setattr(ConfigLoader, 'cache_file', tmp_path / "config.pickle")
+    monkeypatch.setattr(ConfigLoader, 'loaded', False)
+    monkeypatch.setattr(ConfigLoader, 'unsaved', 0)
+    library = tmp_path / "library"
+    library.mkdir()
+    (library / "sheet.yaml").write_text("letter:\n  height: 8.5\n  width: 11\n")
+    user_file = tmp_path / "user" / "sheet.yaml"
+
+    # A missing user file is copied in from the library, and each item is loaded into the named tuple
+    sheets = ConfigLoader.load_config(file_path=user_file, nt_type=Size, lib_config_dir=library)
+    assert user_file.exists() and sheets == {'letter': Size(height=8.5, width=11)}
+
+    # Every caller gets its own copy
+    raw = ConfigLoader.load_file(user_file)
+    raw['letter']['width'] = 0
+    assert ConfigLoader.load_file(user_file) == {'letter': {'height': 8.5, 'width': 11}}
+
+    # A later run starts with the saved data and parses only a changed file
+    ConfigLoader.save()
+    monkeypatch.setattr(ConfigLoader, 'parsed', {})
+    monkeypatch.setattr(ConfigLoader, 'loaded', False)
+    monkeypatch.setattr(ConfigLoader, 'loads', [])
+    monkeypatch.setattr('flatland.instrumentation.Instrumentation.enabled', True)
+    ConfigLoader.load_file(user_file)
+    user_file.write_text("letter:\n  height: 8.5\n  width: 14\n")
+    os.utime(user_file, ns=(0, 0))
+    assert ConfigLoader.load_file(user_file) == {'letter': {'height': 8.5, 'width': 14}}
+    assert [l.source for l in ConfigLoader.loads] == ['cached', 'parsed']
@@ -0,0 +1,36 @@
+""" test_db_snapshot.py - test that a saved Flatland database snapshot loads back intact"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+import pytest
+import flatland
+
+# A PyRAL session can be opened only once per process, so each build runs in its own interpreter
+build_script = """
+import sys
+from pyral.database import Database
+from pyral.relation import Relation
+from flatland.database.flatland_db import FlatlandDB
+FlatlandDB.create_db(rebuild=sys.argv[1] == 'rebuild')
+r = Relation.restrict(db='flatland', relation='Node_Type', restriction='Name:<class>, Diagram_type:<class>')
+print(len(FlatlandDB.relvar_names.split()), len(FlatlandDB.rel_names.split()), r.body[0]['Default_size_w'])
+"""
+
+def build_db(cache_dir, mode):
+    # Import the flatland under test, whether or not it is installed
+    env = dict(os.environ, XDG_CACHE_HOME=str(cache_dir), PYTHONPATH=str(Path(flatland.__file__).parents[1]))
+    result = subprocess.run([sys.executable, "-c", build_script, mode], env=env, capture_output=True, text=True,
+                            check=True)
+    return result.stdout.split()
+
+@pytest.mark.parametrize("cache_name", ["cache", "flatland cache"])
+def test_snapshot_roundtrip(tmp_path, cache_name):
+    cache_dir = tmp_path / cache_name
+    built = build_db(cache_dir, "rebuild")
+    snapshots = list((cache_dir / "flatland" / "db").glob("flatland_*.ral"))
+    assert len(snapshots) == 1
+
+    loaded = build_db(cache_dir, "load")
+    assert loaded == built
@@ -28,7 +28,7 @@ diagrams = [
 @pytest.mark.parametrize("model", diagrams)
 def test_Starr_pdf(flatland_db, model, ext):
 
-    XumlClassDiagram(
+    diagram = XumlClassDiagram(
         xuml_model_path=Path(f"class_diagrams/{model}.xcm"),
         flatland_layout_path=Path(f"model_style_sheets/Starr_cd/{model}{"_Starr"}.mls"),
         diagram_file_path=Path(f"output/Starr_cd/{model}{"_Starr"}.{ext}"),
@@ -38,5 +38,7 @@ def test_Starr_pdf(flatland_db, model, ext):
         show_rulers=False,
         show_ref_types=True
     )
+    diagram.build()
+    diagram.render()
 
     assert True
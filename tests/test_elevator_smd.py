@@ -17,7 +17,7 @@ diagrams = [
 @pytest.mark.parametrize("model", diagrams)
 def test_pdf(flatland_db, model, ext):
 
-    XumlStateMachineDiagram(
+    diagram = XumlStateMachineDiagram(
         xuml_model_path=Path(f"state_machines/{model}.xsm"),
         flatland_layout_path=Path(f"model_style_sheets/xUML_smd/{model}.mls"),
         diagram_file_path=Path(f"output/xUML_smd/{model}.{ext}"),
@@ -26,5 +26,7 @@ def test_pdf(flatland_db, model, ext):
         nodes_only=False,
         no_color=False,
     )
+    diagram.build()
+    diagram.render()
 
     assert True
@@ -13,7 +13,7 @@ diagrams = [
 @pytest.mark.parametrize("model", diagrams)
 def test_Starr_pdf(flatland_db, model, ext):
 
-    XumlClassDiagram(
+    diagram = XumlClassDiagram(
         xuml_model_path=Path(f"class_diagrams/{model}.xcm"),
         flatland_layout_path=Path(f"model_style_sheets/xUML_cd/{model}{"_xUML"}.mls"),
         diagram_file_path=Path(f"output/xUML_cd/{model}{"_xUML"}.{ext}"),
@@ -23,6 +23,8 @@ def test_Starr_pdf(flatland_db, model, ext):
         show_rulers=False,
         show_ref_types=True
     )
+    diagram.build()
+    diagram.render()
 
     assert True
 
@@ -30,7 +32,7 @@ def test_Starr_pdf(flatland_db, model, ext):
 @pytest.mark.parametrize("model", diagrams)
 def test_xUML_pdf(flatland_db, model, ext):
 
-    XumlClassDiagram(
+    diagram = XumlClassDiagram(
         xuml_model_path=Path(f"class_diagrams/{model}.xcm"),
         flatland_layout_path=Path(f"model_style_sheets/Starr_cd/{model}{"_Starr"}.mls"),
         diagram_file_path=Path(f"output/Starr_cd/{model}{"_Starr"}.{ext}"),
@@ -40,5 +42,7 @@ def test_xUML_pdf(flatland_db, model, ext):
         show_rulers=False,
         show_ref_types=True
     )
+    diagram.build()
+    diagram.render()
 
     assert True
@@ -0,0 +1,39 @@
+""" test_frame_template.py - test that a frame is compiled once and drawn the same on each diagram"""
+
+from pathlib import Path
+from flatland.sheet_subsystem.frame import Frame
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def draw(output: Path) -> list[str]:
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/elevator.xcm"),
+        flatland_layout_path=Path("model_style_sheets/Starr_cd/elevator_Starr.mls"),
+        diagram_file_path=output,
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    d.render()
+    # Elements drawn in the same layer may be ordered differently from one drawing to the next
+    return sorted(output.read_text().splitlines())
+
+def test_frame_template(flatland_db, tmp_path, monkeypatch):
+    compiled = []
+    compile_template = Frame.compile_template
+
+    def record_compile(**kwargs):
+        compiled.append(kwargs['name'])
+        return compile_template(**kwargs)
+
+    monkeypatch.setattr(Frame, 'templates', {})
+    monkeypatch.setattr(Frame, 'compile_template', staticmethod(record_compile))
+    first = draw(tmp_path / "first.svg")
+    second = draw(tmp_path / "second.svg")
+    assert compiled == ["Model Integration Diagram"]
+    assert first == second
+
+    template = Frame.templates["Model Integration Diagram", "D", "landscape"][1]
+    assert template.title_block_pattern and template.slots and template.borders
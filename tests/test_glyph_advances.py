@@ -0,0 +1,47 @@
+""" test_glyph_advances.py - test that text measured with glyph tables matches Pillow's measurements"""
+
+import random
+from pathlib import Path
+
+import pytest
+from tabletsvg.configuration.styles import TextStyle
+from PIL import ImageFont
+from flatland.text.font_paths import FontPaths
+from flatland.text.glyph_advances import GlyphAdvances
+
+dejavu = Path("/usr/share/fonts/truetype/dejavu")
+
+def test_glyph_advances(tmp_path, monkeypatch):
+    if not (dejavu / "DejaVuSans.ttf").exists():
+        pytest.skip("DejaVu fonts not installed")
+    font_paths = {'DejaVu': {'normal': {'path': str(dejavu / "DejaVuSans.ttf")},
+                             'bold': {'path': str(dejavu / "DejaVuSans-Bold.ttf")}}}
+    monkeypatch.setattr(FontPaths, 'paths', font_paths)
+    monkeypatch.setattr(GlyphAdvances, 'fonts', {})
+    monkeypatch.setattr(GlyphAdvances, 'tables_dir', tmp_path)
+
+    rand = random.Random(7)
+    # Past either end of the tables, control characters and DEL are measured by Pillow
+    chars = [chr(c) for c in range(32, 127)] + ['é', '→', '\x7f', '\t', '\x01']
+    blocks = [["Cabin", "", "ID : Nominal {I}", "Floor ref -> Floor.Name {R43}"]] + \
+             [["".join(rand.choice(chars) for _ in range(rand.randint(0, 30))) for _ in range(rand.randint(1, 4))]
+              for _ in range(200)]
+    styles = [TextStyle(typeface='DejaVu', size=size, slant='normal', weight=weight, color='black', spacing=1.2)
+              for size in (9, 11, 14.5) for weight in ('normal', 'bold')]
+    for style in styles:
+        pil_font = ImageFont.truetype(font_paths['DejaVu'][style.weight]['path'], size=style.size)
+        for block in blocks:
+            size = GlyphAdvances.text_block_size(style=style, text_block=block)
+            assert size.width == max(int(pil_font.getlength(line)) for line in block)
+    assert len(list(tmp_path.glob("*.npz"))) == len(styles)
+
+    # Tables saved by an earlier run are loaded rather than measured again
+    measured = GlyphAdvances.metrics(styles[0]).table
+    monkeypatch.setattr(GlyphAdvances, 'fonts', {})
+    monkeypatch.setattr(ImageFont.FreeTypeFont, 'getlength', None)
+    loaded = GlyphAdvances.metrics(styles[0]).table
+    assert (loaded.advances == measured.advances).all() and (loaded.kerning == measured.kerning).all()
+
+    # Without the font file, text is approximated as tabletsvg approximates it
+    unknown = styles[0]._replace(typeface='Unknown')
+    assert GlyphAdvances.text_block_size(style=unknown, text_block=["Cabin", "Floor"]).width == int(9 * 0.6 * 5)
@@ -0,0 +1,39 @@
+""" test_grid_solve.py - test that the grid is fully sized before any connector is laid out"""
+
+from pathlib import Path
+
+import pytest
+from flatland.node_subsystem.grid import Grid
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def test_grid_solve(flatland_db, tmp_path, monkeypatch):
+    solved = []
+    solve = Grid.solve
+
+    def record_solve(grid, lanes=()):
+        # Nodes wait to be placed until the grid is solved
+        assert not grid.Nodes and len(grid.Unplaced) == 2
+        # and no node has a position before then
+        with pytest.raises(AssertionError, match="before the Grid was solved"):
+            grid.Unplaced[0].Canvas_position
+        solve(grid, lanes=lanes)
+        solved.append((list(grid.Row_boundaries), list(grid.Col_boundaries)))
+
+    monkeypatch.setattr(Grid, 'solve', record_solve)
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/aircraft2.xcm"),
+        flatland_layout_path=Path("model_style_sheets/Starr_cd/t023_bending_binary_twice.mls"),
+        diagram_file_path=tmp_path / "solved.svg",
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    grid = d.flatland_canvas.Diagram.Grid
+    assert len(solved) == 1 and len(grid.Connectors) == 1 and not grid.Unplaced
+    # The connector runs along row 3, above both classes, which was added when the grid was solved
+    rows, cols = solved[0]
+    assert len(rows) == 4
+    assert (list(grid.Row_boundaries), list(grid.Col_boundaries)) == (rows, cols)
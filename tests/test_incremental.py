@@ -0,0 +1,55 @@
+""" test_incremental.py - test that rebuilding an edited diagram matches building it from scratch"""
+
+import shutil
+from pathlib import Path
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+model_path = Path("class_diagrams/elevator.xcm")
+layout_path = Path("model_style_sheets/Starr_cd/elevator_Starr.mls")
+
+def class_diagram(model, layout, diagram):
+    return XumlClassDiagram(
+        xuml_model_path=model,
+        flatland_layout_path=layout,
+        diagram_file_path=diagram,
+        show_grid=True,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+
+def svg_lines(path):
+    return sorted(path.read_text().splitlines())
+
+def test_rebuild_after_edit(flatland_db, tmp_path):
+
+    model = tmp_path / model_path.name
+    layout = tmp_path / layout_path.name
+    shutil.copy(model_path, model)
+    shutil.copy(layout_path, layout)
+
+    diagram = class_diagram(model, layout, tmp_path / "incremental.svg")
+    diagram.build()
+    diagram.render()
+    connector_count = len(diagram.flatland_canvas.Diagram.Grid.Connectors)
+
+    # Move one class and reposition one stem
+    text = layout.read_text()
+    layout.write_text(text.replace("    Building 11,8", "    Building 11,7").replace(
+        "-R4 : +/2 t+1|Cabin", "-R4 : +/2 t+2|Cabin"))
+    diagram.build()
+    diagram.render()
+    assert diagram.layout_file.reparsed == 2
+    assert 0 < diagram.connectors.Reused < connector_count
+
+    full = class_diagram(model, layout, tmp_path / "full.svg")
+    full.build()
+    full.render()
+    assert svg_lines(tmp_path / "incremental.svg") == svg_lines(tmp_path / "full.svg")
+
+    # Reused connectors are indexed in the rebuilt grid just as the full build indexes them
+    def indexed(d):
+        segments = d.flatland_canvas.Diagram.Grid.Segments
+        return {o: sorted(s[:3] for s in a.ordered()[1]) for o, a in segments.Segments.items()}
+    assert indexed(diagram) == indexed(full)
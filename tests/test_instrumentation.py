@@ -0,0 +1,42 @@
+""" test_instrumentation.py - test that each stage of drawing a diagram is timed when requested"""
+
+import io
+import json
+from pathlib import Path
+from flatland.instrumentation import Instrumentation
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def test_stage_timing(flatland_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(Instrumentation, 'enabled', False)
+    monkeypatch.setattr(Instrumentation, 'spans', [])
+    monkeypatch.setattr(Instrumentation, 'started', None)
+    Instrumentation.enable()
+
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/aircraft_tree4.xcm"),
+        flatland_layout_path=Path("model_style_sheets/xUML_cd/t055_p2_three_branch_one_graft.mls"),
+        diagram_file_path=tmp_path / "timed.svg",
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    d.render()
+
+    stages = {s.stage for s in Instrumentation.spans}
+    assert {"model parse", "layout parse", "canvas", "tablet setup", "node placement", "connector",
+            "canvas render", "tablet render"} <= stages
+    assert {s.detail for s in Instrumentation.spans if s.stage == "connector"} == {"R1"}
+    # The tablet is set up while the canvas is created
+    assert {s.depth for s in Instrumentation.spans if s.stage == "tablet setup"} == {1}
+
+    report = io.StringIO()
+    Instrumentation.report(out=report)
+    assert "node placement" in report.getvalue()
+
+    Instrumentation.save_trace(tmp_path / "timed.trace.json")
+    events = json.loads((tmp_path / "timed.trace.json").read_text())["traceEvents"]
+    assert len(events) == len(Instrumentation.spans)
+    assert all(e["ph"] == "X" and e["ts"] >= 0 and e["dur"] >= 0 for e in events)
@@ -0,0 +1,53 @@
+""" test_output_formats.py - test that each output format is converted from a single rendering"""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from flatland.exceptions import OutputConverterUnavailable
+from flatland.node_subsystem.output_formats import OutputFormats
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def draw(output: Path):
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/elevator.xcm"),
+        flatland_layout_path=Path("model_style_sheets/Starr_cd/elevator_Starr.mls"),
+        diagram_file_path=output,
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    d.render()
+
+def test_output_formats(flatland_db, tmp_path, monkeypatch):
+    draw(tmp_path / "single.svg")
+
+    converted = {}
+
+    def convert(svg, output_format, output_file):
+        # Record what cairosvg would be given rather than depend on the cairo library being installed
+        converted[output_format] = (svg, threading.current_thread().name)
+        output_file.write_bytes(svg)
+
+    monkeypatch.setattr(OutputFormats, 'convert', staticmethod(convert))
+    monkeypatch.setattr(OutputFormats, 'formats', ('svg', 'png'))
+    draw(tmp_path / "multi.pdf")
+
+    # Elements drawn in the same layer may be ordered differently from one drawing to the next
+    single = sorted((tmp_path / "single.svg").read_text().splitlines())
+    svg = (tmp_path / "multi.svg").read_text()
+    assert sorted(svg.splitlines()) == single
+    assert set(converted) == {'pdf', 'png'}
+    for output_format, (source, thread) in converted.items():
+        assert source == svg.encode() and thread != threading.main_thread().name
+    assert (tmp_path / "multi.pdf").exists() and (tmp_path / "multi.png").exists()
+
+def test_converter_unavailable(tmp_path, monkeypatch):
+    # As if cairosvg weren't installed
+    monkeypatch.setitem(sys.modules, 'cairosvg', None)
+    with pytest.raises(OutputConverterUnavailable, match="pdf"):
+        OutputFormats.convert(b"<svg />", 'pdf', tmp_path / "diagram.pdf")
@@ -0,0 +1,47 @@
+""" test_parse_cache.py - test that diagrams drawn from saved parse results match freshly parsed ones"""
+
+from pathlib import Path
+from flatland.xuml.parse_cache import ParseCache
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def class_diagram(diagram, no_parse_cache):
+    return XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/aircraft_tree4.xcm"),
+        flatland_layout_path=Path("model_style_sheets/xUML_cd/t055_p2_three_branch_one_graft.mls"),
+        diagram_file_path=diagram,
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True,
+        no_parse_cache=no_parse_cache
+    )
+
+def test_parse_cache(flatland_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(ParseCache, 'parse_dir', tmp_path / "parse")
+
+    # Bypassing the cache saves nothing
+    parsed = class_diagram(tmp_path / "parsed.svg", no_parse_cache=True)
+    parsed.build()
+    parsed.render()
+    assert not (tmp_path / "parse").exists()
+
+    # The first build saves the model and layout, the second loads them
+    for name in ("saving.svg", "loaded.svg"):
+        d = class_diagram(tmp_path / name, no_parse_cache=False)
+        d.build()
+        d.render()
+        assert sorted(p.name[:4] for p in (tmp_path / "parse").iterdir()) == ["mls_", "xcm_"]
+        assert d.model == parsed.model
+        assert d.layout == parsed.layout
+
+    # Element order can vary between runs, but not the elements themselves
+    expected = sorted((tmp_path / "parsed.svg").read_text().splitlines())
+    assert sorted((tmp_path / "loaded.svg").read_text().splitlines()) == expected
+
+    # A corrupt result is discarded and the file parsed again
+    for p in (tmp_path / "parse").iterdir():
+        p.write_bytes(b"not a pickle")
+    d = class_diagram(tmp_path / "reparsed.svg", no_parse_cache=False)
+    d.build()
+    assert d.model == parsed.model
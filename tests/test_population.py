@@ -0,0 +1,27 @@
+""" test_population.py - test that the database is populated in one transaction with one insert per relvar"""
+
+from pyral.relvar import Relvar
+from pyral.transaction import Transaction
+from flatland.database.population import Population
+from flatland.database.relvar_cache import RelvarCache, instance_type
+from flatland.database.pop_sheet_subsys import SheetSubsysDB
+from flatland.database.pop_node_subsys import NodeSubsysDB
+from flatland.database.pop_layout_spec import LayoutSpecDB
+from flatland.database.pop_connector_subsys import ConnectorSubsysDB
+
+def test_population(flatland_db, monkeypatch):
+    population = Population()
+    for subsystem in (SheetSubsysDB, NodeSubsysDB, LayoutSpecDB, ConnectorSubsysDB):
+        subsystem.populate(population)
+    # Every relvar gets as many instances as the database was populated with
+    assert sorted(population.Instances) == sorted(instance_type)
+    for relvar, tuples in population.Instances.items():
+        assert len(tuples) == len(RelvarCache.all(relvar)), relvar
+
+    statements = []
+    monkeypatch.setattr(Transaction, 'open', lambda db, name: statements.append(('open', name)))
+    monkeypatch.setattr(Relvar, 'insert', lambda db, relvar, tuples, tr=None: statements.append((tr, relvar)))
+    monkeypatch.setattr(Transaction, 'execute', lambda db, name: statements.append(('execute', name)))
+    population.insert()
+    assert statements == [('open', 'populate'), *[('populate', r) for r in population.Instances],
+                          ('execute', 'populate')]
@@ -0,0 +1,27 @@
+""" test_relvar_cache.py - test typed lookups through the in memory copy of the Flatland database"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pyral.relation import Relation
+from flatland.database.relvar_cache import RelvarCache
+
+def test_lookup_matches_db(flatland_db):
+
+    result = Relation.restrict(db='flatland', relation='Node_Type', restriction="Name:<class>, Diagram_type:<class>")
+    node_type = RelvarCache.lookup('Node_Type', Name='class', Diagram_type='class')
+    assert node_type.Default_size_w == int(result.body[0]['Default_size_w'])
+
+def test_select(flatland_db):
+
+    ctypes = RelvarCache.select('Compartment_Type', Node_type='class', Diagram_type='class')
+    assert sorted(c.Stack_order for c in ctypes) == [1, 2, 3]
+    assert RelvarCache.select('Compartment_Type', Node_type='no such node type', Diagram_type='class') == []
+    assert RelvarCache.lookup('Sheet', Name='no such sheet') is None
+
+def test_index_built_once(flatland_db):
+
+    # Threads asking for the same new index all get the one that was built
+    RelvarCache.indexes.pop(('Compartment_Type', ('Stack_order',)), None)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        indexes = list(executor.map(lambda _: RelvarCache._index('Compartment_Type', ('Stack_order',)), range(32)))
+    assert all(i is indexes[0] for i in indexes)
+    assert indexes[0] is RelvarCache.indexes['Compartment_Type', ('Stack_order',)]
@@ -0,0 +1,27 @@
+""" test_segment_index.py - test finding connector segments near a point or line"""
+
+from flatland.datatypes.connection_types import Orientation
+from flatland.datatypes.geometry_types import Position
+from flatland.geometry_domain.segment_index import SegmentIndex
+
+def test_segment_index():
+    segments = SegmentIndex()
+    for x, y1, y2 in [(1, 0, 15), (5, 15, 25), (10, 7, 25), (12, 2, 11), (13, 20, 29), (20, 7, 17),
+                      (25, 20, 32), (30, 7, 27)]:
+        segments.add(Position(x, y1), Position(x, y2), owner='a')
+    segments.add_path([Position(0, 18), Position(40, 18), Position(40, 40)], owner='b')
+    assert len(segments) == 10
+
+    point = Position(15, 17)
+    vertical = Orientation.Vertical
+    # The segment at 13 starts 3 points above the point, which is close enough to meet it
+    assert segments.nearest_parallel(point=point, orientation=vertical, ascending=False) == 13
+    assert segments.nearest_parallel(point=point, orientation=vertical, ascending=False, tolerance=0) == 10
+    assert segments.nearest_parallel(point=point, orientation=vertical, ascending=True) == 20
+    assert segments.nearest_parallel(point=point, orientation=vertical, ascending=True, owner='b') == 40
+    assert segments.nearest_parallel(point=Position(0, 40), orientation=vertical, ascending=True, owner='a') is None
+
+    assert [s.axis for s in segments.crossings(Position(0, 18), Position(40, 18))] == [5, 10, 30, 40]
+    assert [s.owner for s in segments.crossings(Position(12, 5), Position(12, 30))] == ['b']
+    assert [(s.low, s.high) for s in segments.overlaps(Position(10, 25), Position(10, 40))] == []
+    assert [(s.low, s.high) for s in segments.overlaps(Position(10, 20), Position(10, 40))] == [(7, 25)]
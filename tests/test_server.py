@@ -0,0 +1,36 @@
+""" test_server.py - test rendering diagrams through the render server"""
+
+import pytest
+from pathlib import Path
+from flatland.server import RenderServer, RenderClient
+from flatland.exceptions import RenderRequestError
+
+model_path = Path("class_diagrams/aircraft2.xcm")
+layout_path = Path("model_style_sheets/xUML_cd/t001_straight_binary_horiz.mls")
+
+@pytest.fixture
+def render_server(flatland_db, tmp_path):
+    server = RenderServer(port=0, socket_path=tmp_path / "flatland.sock")
+    server.start()
+    yield server
+    server.stop()
+
+def test_render_http_and_socket(render_server):
+
+    http_client = RenderClient(port=render_server.Port)
+    socket_client = RenderClient(socket_path=render_server.Socket_path)
+
+    from_text = http_client.render(model=model_path.read_text(), model_type='xcm', layout=layout_path.read_text())
+    from_paths = socket_client.render(model_path=model_path, layout_path=layout_path)
+    assert from_text.startswith(b'<svg')
+    assert sorted(from_text.splitlines()) == sorted(from_paths.splitlines())
+
+    # A bad model is reported and the connection stays usable
+    with pytest.raises(RenderRequestError, match="Parse error"):
+        socket_client.render(model="not a model", model_type='xcm', layout_path=layout_path)
+    with pytest.raises(RenderRequestError, match="model_type"):
+        socket_client.render(model=model_path.read_text(), layout_path=layout_path)
+    assert socket_client.render(model_path=model_path, layout_path=layout_path) == from_paths
+
+    http_client.close()
+    socket_client.close()
@@ -0,0 +1,39 @@
+""" test_startup.py - test that each command line mode imports only what it needs"""
+
+import os
+import re
+import sys
+import subprocess
+from pathlib import Path
+
+import flatland
+
+# Modules that take most of flatland's startup time, loaded only to draw
+drawing = {'tabletsvg', 'pyral', 'numpy', 'flatland.database.flatland_db', 'flatland.xuml.xuml_classdiagram',
+           'flatland.xuml.xuml_statemachine_diagram', 'flatland.batch', 'flatland.server', 'flatland.watch'}
+
+def imported(args, cwd) -> set[str]:
+    """Runs flatland with python -X importtime and returns every module it imported"""
+    # Run this source tree rather than any installed flatland
+    env = dict(os.environ, PYTHONPATH=str(Path(flatland.__file__).parents[1]))
+    run = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'flatland', *args], cwd=cwd, env=env,
+                         capture_output=True, text=True, timeout=120)
+    return set(re.findall(r'^import time:.*\|\s*([\w.]+)$', run.stderr, re.MULTILINE))
+
+def test_startup(tmp_path):
+    tests = Path(__file__).parent
+    # Informational commands import nothing that draws
+    for args in (['-V'], ['-E'], ['-h'], []):
+        assert not imported(args, cwd=tmp_path) & drawing, args
+    assert (tmp_path / 'examples').is_dir()
+
+    # Drawing a class diagram loads just what it takes to draw one
+    modules = imported(['-m', 'class_diagrams/elevator.xcm', '-l', 'model_style_sheets/Starr_cd/elevator_Starr.mls',
+                        '-d', str(tmp_path / 'elevator.svg')], cwd=tests)
+    assert (tmp_path / 'elevator.svg').exists()
+    assert modules & drawing == {'tabletsvg', 'pyral', 'numpy', 'flatland.database.flatland_db',
+                                 'flatland.xuml.xuml_classdiagram'}
+
+    # The render server and batches load their own modules
+    assert 'flatland.server' in imported(['serve', '-h'], cwd=tmp_path)
+    assert 'flatland.batch' in imported(['-B', str(tmp_path / 'none'), '-d', 'x.svg'], cwd=tmp_path)
@@ -0,0 +1,13 @@
+""" test_stem_geometry.py - test that stems leave each node face in the right direction"""
+
+from flatland.connector_subsystem.stem import Stem
+from flatland.datatypes.connection_types import NodeFace
+from flatland.datatypes.geometry_types import Position
+
+def test_stem_extend():
+    root = Position(548, 120.5)
+    ends = {face: Stem.extend(point=root, face=face, length=20) for face in NodeFace}
+    assert ends == {NodeFace.TOP: (548, 140.5), NodeFace.BOTTOM: (548, 100.5),
+                    NodeFace.RIGHT: (568, 120.5), NodeFace.LEFT: (528, 120.5)}
+    # Whole point coordinates stay whole so that they are drawn the same way
+    assert all(type(end.x) is int for end in ends.values())
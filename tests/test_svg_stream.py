@@ -0,0 +1,52 @@
+""" test_svg_stream.py - test that a streamed svg file is the same as the one the Tablet writes"""
+
+import logging
+from pathlib import Path
+from flatland.node_subsystem.output_formats import OutputFormats
+from tabletsvg.layer import Layer
+from tabletsvg.graphics.diagnostic_marker import DiagnosticMarker
+from flatland.node_subsystem.svg_stream import SVGStream, layer_content
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def test_svg_stream(flatland_db, tmp_path, monkeypatch):
+    # Keep the drawn Tablet so that the same drawing is written both ways, elements drawn in the same
+    # layer may be ordered differently from one drawing to the next
+    tablets = []
+    monkeypatch.setattr(OutputFormats, 'render', tablets.append)
+    # Small slices so that each kind of element is written over several of them
+    monkeypatch.setattr(SVGStream, 'chunk_size', 3)
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/elevator.xcm"),
+        flatland_layout_path=Path("model_style_sheets/Starr_cd/elevator_Starr.mls"),
+        diagram_file_path=tmp_path / "tablet.svg",
+        show_grid=True,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    d.render()
+    tablet = tablets[0]
+    tablet.render()
+    tablet.Output_file = tmp_path / "streamed.svg"
+    SVGStream.write(tablet)
+    drawn = (tmp_path / "tablet.svg").read_bytes()
+    assert drawn.count(b'\n') > 100 and (tmp_path / "streamed.svg").read_bytes() == drawn
+
+    # A layer holding only what we know of is streamed
+    assert not SVGStream.unknown_content(tablet)
+
+def test_layer_content(monkeypatch):
+    # Layer.render must render the lists we stream in the same order, or streamed files would differ
+    rendered = []
+    renderers = [render for render, _ in layer_content] + [DiagnosticMarker.render]
+    for render in renderers:
+        monkeypatch.setattr(render.__self__, render.__name__,
+                            classmethod(lambda cls, layer, r=render: rendered.append(r) or []))
+    # Just enough of a layer to render
+    layer = Layer.__new__(Layer)
+    layer.Name = 'test'
+    layer.logger = logging.getLogger(__name__)
+    Layer.render(layer)
+    assert rendered == renderers
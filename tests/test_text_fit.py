@@ -0,0 +1,50 @@
+""" test_text_fit.py - test that metadata is wrapped onto the fewest lines that fit its data box"""
+
+from pathlib import Path
+from tabletsvg.geometry_types import Rect_Size
+from flatland.sheet_subsystem.frame import Frame
+from flatland.text.text_block import TextBlock
+from flatland.text.text_fit import TextFit
+from flatland.text.text_metrics import TextMetrics
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def test_text_fit(flatland_db, tmp_path, monkeypatch):
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/elevator.xcm"),
+        flatland_layout_path=Path("model_style_sheets/Starr_cd/elevator_Starr.mls"),
+        diagram_file_path=tmp_path / "elevator.svg",
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    presentation = d.frame.Layer.Presentation
+    asset = Frame.template(name=d.frame.Name, sheet=d.flatland_canvas.Sheet,
+                           orientation=d.frame.Orientation).slots[0].asset
+    monkeypatch.setattr(TextFit, 'fits', type(TextFit.fits)())
+
+    def size(lines):
+        return TextMetrics.text_block_size(presentation=presentation, asset=asset, text_block=lines)
+
+    text = "Elevator Application Subsystem Class Diagram With A Rather Long Title For A Small Box"
+    for width in (90, 150, 240, 400):
+        fitted = TextFit.fit(presentation=presentation, asset=asset, text=text,
+                             max_size=Rect_Size(height=1000, width=width))
+        assert " ".join(fitted.lines) == text and fitted.size == size(list(fitted.lines))
+        assert fitted.size.width <= width
+        # No fewer lines than any evenly balanced wrapping that fits
+        fewest = min(len(TextBlock(line=text, wrap=n).text) for n in range(1, text.count(' ') + 2)
+                     if size(TextBlock(line=text, wrap=n).text).width <= width)
+        assert len(fitted.lines) <= fewest
+        # Each line starts with a word that didn't fit on the one before
+        for line, next_line in zip(fitted.lines, fitted.lines[1:]):
+            assert size([f"{line} {next_line.split(' ')[0]}"]).width > width or \
+                   list(fitted.lines) == TextBlock(line=text, wrap=len(fitted.lines)).text
+    # No word fits or there isn't room for the lines
+    assert TextFit.fit(presentation=presentation, asset=asset, text=text, max_size=Rect_Size(height=1000, width=5)) is None
+    assert TextFit.fit(presentation=presentation, asset=asset, text=text, max_size=Rect_Size(height=1, width=150)) is None
+    # Remembered for the next diagram
+    monkeypatch.setattr(TextBlock, '__init__', None)
+    assert TextFit.fit(presentation=presentation, asset=asset, text=text, max_size=Rect_Size(height=1000, width=150))
@@ -0,0 +1,53 @@
+""" test_text_metrics.py - test that remembered text sizes match measured ones"""
+
+from pathlib import Path
+from flatland.text.text_metrics import TextMetrics
+from flatland.xuml.xuml_classdiagram import XumlClassDiagram
+
+def draw(diagram):
+    d = XumlClassDiagram(
+        xuml_model_path=Path("class_diagrams/elevator.xcm"),
+        flatland_layout_path=Path("model_style_sheets/Starr_cd/elevator_Starr.mls"),
+        diagram_file_path=diagram,
+        show_grid=False,
+        nodes_only=False,
+        no_color=False,
+        show_rulers=False,
+        show_ref_types=True
+    )
+    d.build()
+    d.render()
+
+def test_text_metrics(flatland_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(TextMetrics, 'metrics_file', tmp_path / "text_metrics.pickle")
+    monkeypatch.setattr(TextMetrics, 'persist', True)
+    TextMetrics.clear()
+
+    # Measured text is reused within a diagram and saved once the diagram is drawn
+    draw(tmp_path / "measured.svg")
+    measured = TextMetrics.stats()
+    assert measured.misses == measured.entries > 0
+    assert measured.hits > 0
+    assert TextMetrics.metrics_file.exists()
+    sizes = dict(TextMetrics.sizes)
+
+    # The next run loads the saved sizes and measures nothing
+    TextMetrics.clear()
+    draw(tmp_path / "loaded.svg")
+    assert TextMetrics.stats().misses == 0
+    assert dict(TextMetrics.sizes) == sizes
+    expected = sorted((tmp_path / "measured.svg").read_text().splitlines())
+    assert sorted((tmp_path / "loaded.svg").read_text().splitlines()) == expected
+
+    # Sizes measured with some other font configuration are ignored
+    monkeypatch.setattr(TextMetrics, 'font_fingerprint', classmethod(lambda cls: "other fonts"))
+    TextMetrics.clear()
+    TextMetrics.load()
+    assert not TextMetrics.sizes
+
+    # The least recently used sizes are forgotten first
+    monkeypatch.setattr(TextMetrics, 'max_entries', 5)
+    TextMetrics.clear()
+    draw(tmp_path / "bounded.svg")
+    assert TextMetrics.stats().entries == 5
+    TextMetrics.clear()
@@ -0,0 +1,36 @@
+""" test_transition_placement.py - test the index of state machine connector placements"""
+
+from types import SimpleNamespace
+from flatland.xuml.transition_placement import TransitionPlacement
+
+def stem(state):
+    return {'face': 'BOTTOM', 'node_ref': state}
+
+def state_block(name, transitions=(), deletion=False):
+    return SimpleNamespace(state=SimpleNamespace(name=name, deletion=deletion), transitions=list(transitions))
+
+def test_transition_placement():
+    placement = TransitionPlacement([
+        {'cname': 'Execute', 'ustem': stem('WAITING')},
+        {'cname': 'Go', 'tstem': stem('WAITING'), 'pstem': stem('MOVING')},
+        {'cname': 'Go', 'tstem': stem('WAITING'), 'pstem': stem('STOPPED')},
+        {'cname': 'Go', 'tstem': stem('MOVING'), 'pstem': stem('Delete')},
+        {'ustem': stem('Delete')},
+    ])
+    # The same event leaving another state is not a duplicate
+    assert placement.duplicates == ["transition ('WAITING', 'Go')"]
+    assert placement.transitions[('WAITING', 'Go')]['pstem']['node_ref'] == 'MOVING'
+    assert placement.initial_transitions[('WAITING', 'Execute')]['ustem']['node_ref'] == 'WAITING'
+    assert placement.deletions['Delete'] == {'ustem': stem('Delete')}
+
+    states = [
+        state_block('WAITING', transitions=[('Go', 'MOVING'), ('Stop', 'STOPPED')]),
+        state_block('MOVING', transitions=[('Go', 'Delete'), ('Park', 'Delete')]),
+        state_block('STOPPED'),
+        state_block('Delete', deletion=True),
+    ]
+    errors = placement.validate(states=states, initial_states={'WAITING': 'Execute'}, events={'Execute', 'Go', 'Stop'})
+    assert errors == [
+        'Model event [Stop] on transition from state [WAITING] does not name any connector in layout.',
+        'Undefined event [Park] used on transition from state [MOVING]. Check event list in model file.',
+    ]